@@ -1,11 +1,16 @@
 from __future__ import annotations
 
-from typing import Annotated
+import asyncio
+import json
+from collections.abc import AsyncIterator, Callable
+from typing import Annotated, Any
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 
+from app.core.config import get_settings
 from app.core.security import Principal, enforce_tenant, require_scopes
-from app.deps import get_pipeline
+from app.deps import get_chat_limiter, get_pipeline
 from app.rag.pipeline import RagPipeline
 from app.store.metadata import ChatRequest, ChatResponse
 
@@ -14,22 +19,114 @@ router = APIRouter(tags=["chat"])
 # FastAPI DI (enterprise style): use Annotated + Depends to avoid "call in default" lint noise.
 ChatPrincipalDep = Annotated[Principal, Depends(require_scopes("chat"))]
 PipelineDep = Annotated[RagPipeline, Depends(get_pipeline)]
+LimiterDep = Annotated[asyncio.Semaphore, Depends(get_chat_limiter)]
+
+
+async def _admit(limiter: asyncio.Semaphore) -> None:
+    try:
+        await asyncio.wait_for(limiter.acquire(), timeout=get_settings().chat_queue_timeout_s)
+    except TimeoutError as e:
+        raise HTTPException(status_code=503, detail="server_busy") from e
+
+
+class _SlotStreamingResponse(StreamingResponse):
+    """StreamingResponse that always runs `release` once the response is over.
+
+    On a client disconnect Starlette cancels the response while the body generator is
+    suspended at a `yield` and never closes it, so the generator's own `finally` would
+    only run whenever it is garbage-collected.
+    """
+
+    def __init__(
+        self, content: AsyncIterator[str], *, release: Callable[[], None], **kwargs: Any
+    ) -> None:
+        super().__init__(content, **kwargs)
+        self._release = release
+
+    async def __call__(self, scope: Any, receive: Any, send: Any) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            try:
+                await self.body_iterator.aclose()
+            finally:
+                self._release()
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
 
 @router.post("/chat", response_model=ChatResponse)
-def chat(req: ChatRequest, p: ChatPrincipalDep, pipeline: PipelineDep) -> ChatResponse:
+async def chat(
+    req: ChatRequest, p: ChatPrincipalDep, pipeline: PipelineDep, limiter: LimiterDep
+) -> ChatResponse:
     """Secure chat endpoint.
 
     Enforces:
       - AuthN/AuthZ (JWT + scope)
       - tenant ownership
       - prompt injection filters + deny-by-default gates (in pipeline)
+      - bounded concurrency (CHAT_MAX_CONCURRENCY); excess load gets 503, not a queue
     """
 
     enforce_tenant(req.tenant_id, p)
+    await _admit(limiter)
 
     try:
-        return pipeline.answer(tenant_id=req.tenant_id, question=req.question)
+        return await pipeline.aanswer(tenant_id=req.tenant_id, question=req.question)
     except ValueError as e:
         # Secure-by-default: suspicious prompts are blocked.
         raise HTTPException(status_code=400, detail=str(e)) from e
+    finally:
+        limiter.release()
+
+
+@router.post("/chat/stream")
+async def chat_stream(
+    req: ChatRequest, p: ChatPrincipalDep, pipeline: PipelineDep, limiter: LimiterDep
+) -> StreamingResponse:
+    """Streaming chat (Server-Sent Events), same gates as /chat.
+
+    Blocked prompts still get a plain 400 before the stream starts. The stream is:
+      - `evidence`: the guarded evidence list, once
+      - `token`: {"text": ...} answer deltas, already redacted
+      - `done`: {"tenant_id": ...}
+    The request holds its concurrency slot until the stream ends.
+    """
+
+    enforce_tenant(req.tenant_id, p)
+    await _admit(limiter)
+    released = False
+
+    def release() -> None:
+        # Both the stream's end and the response wrapper call this; release only once.
+        nonlocal released
+        if not released:
+            released = True
+            limiter.release()
+
+    try:
+        evidence, context = await pipeline.aprepare(tenant_id=req.tenant_id, question=req.question)
+    except ValueError as e:
+        release()
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    except BaseException:
+        release()
+        raise
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            yield _sse("evidence", [e.model_dump() for e in evidence])
+            async for delta in pipeline.astream_answer(question=req.question, context=context):
+                yield _sse("token", {"text": delta})
+            yield _sse("done", {"tenant_id": req.tenant_id})
+        finally:
+            release()
+
+    return _SlotStreamingResponse(
+        events(),
+        release=release,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.core.security import Principal, enforce_tenant, require_scopes
+from app.deps import get_store
+from app.store.vector import VectorStoreAdapter
+
+router = APIRouter(tags=["documents"])
+
+IngestPrincipalDep = Annotated[Principal, Depends(require_scopes("ingest:write"))]
+StoreDep = Annotated[VectorStoreAdapter, Depends(get_store)]
+TenantQuery = Annotated[str, Query(min_length=1, max_length=64)]
+
+
+@router.get("/documents/stats")
+async def document_stats(tenant_id: TenantQuery, p: IngestPrincipalDep, store: StoreDep):
+    """Live and tombstoned (awaiting compaction) chunk counts for the caller's tenant."""
+
+    enforce_tenant(tenant_id, p)
+    return {"tenant_id": tenant_id, **await store.achunk_stats(tenant_id)}
+
+
+@router.delete("/documents/{doc_id}")
+async def delete_document(
+    doc_id: str, tenant_id: TenantQuery, p: IngestPrincipalDep, store: StoreDep
+):
+    """Delete every chunk of a document (same scope and tenant rules as ingest)."""
+
+    enforce_tenant(tenant_id, p)
+
+    deleted = await store.adelete_document(tenant_id, doc_id)
+    if not deleted:
+        raise HTTPException(status_code=404, detail="document_not_found")
+
+    return {"status": "deleted", "doc_id": doc_id, "chunks": deleted}
@@ -1,15 +1,19 @@
 from __future__ import annotations
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
 
 router = APIRouter(tags=["health"])
 
 
+# async: served on the event loop, so they never wait for a worker-thread slot.
 @router.get("/health")
-def health() -> dict:
+async def health() -> dict:
     return {"status": "ok"}
 
 
 @router.get("/ready")
-def ready() -> dict:
-    return {"status": "ready"}
+async def ready(request: Request):
+    # Not ready until the background warm-up (started by the lifespan) has finished.
+    warmup = request.app.state.warmup
+    return JSONResponse(warmup.status(), status_code=200 if warmup.ready else 503)
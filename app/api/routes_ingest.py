@@ -2,13 +2,19 @@ from __future__ import annotations
 
 import hashlib
 import uuid
+from collections.abc import AsyncIterator
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
 
+from app.core.config import get_settings
 from app.core.security import Principal, enforce_tenant, require_scopes
 from app.deps import get_store
-from app.store.metadata import ChunkMetadata, DocumentChunk, IngestRequest
+from app.rag.chunking import adecode_utf8, aiter_chunks, iter_chunks
+from app.rag.guardrails import guard_version, stamp_guard_verdict
+from app.store.metadata import ChunkMetadata, DocumentChunk, IngestBatchRequest, IngestRequest
 from app.store.vector import VectorStoreAdapter
 
 router = APIRouter(tags=["ingest"])
@@ -17,33 +23,45 @@ router = APIRouter(tags=["ingest"])
 IngestPrincipalDep = Annotated[Principal, Depends(require_scopes("ingest:write"))]
 StoreDep = Annotated[VectorStoreAdapter, Depends(get_store)]
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
 
-def _split(text: str, *, max_chars: int = 900) -> list[str]:
-    """Split large text into chunks (simple, deterministic).
+RequiredQuery = Annotated[str, Query(min_length=1, max_length=256)]
 
-    In real deployments you'd normalize whitespace, handle token limits, preserve metadata,
-    and optionally run document sanitization before chunking.
-    """
 
-    text = text.strip()
-    if not text:
-        return []
+def _chunk(tenant_id: str, source: str, doc_id: str, i: int, text: str) -> DocumentChunk:
+    meta = ChunkMetadata(
+        tenant_id=tenant_id,
+        source=source,
+        doc_id=doc_id,
+        chunk_id=f"{uuid.uuid4().hex[:8]}-{i}",
+    )
+    return DocumentChunk(metadata=meta, text=text)
 
-    out: list[str] = []
-    buf: list[str] = []
-    size = 0
 
-    for line in text.splitlines():
-        if size + len(line) + 1 > max_chars and buf:
-            out.append("\n".join(buf).strip())
-            buf, size = [], 0
-        buf.append(line)
-        size += len(line) + 1
+def _to_chunks(req: IngestRequest) -> tuple[str, list[DocumentChunk]]:
+    # Stable doc_id for demos/tests. Use a modern hash (Bandit flags SHA1 as weak).
+    # We only need a short deterministic identifier here, not a cryptographic guarantee.
+    doc_id = req.doc_id or hashlib.blake2s(req.text.encode("utf-8"), digest_size=6).hexdigest()
 
-    if buf:
-        out.append("\n".join(buf).strip())
+    settings = get_settings()
+    texts = iter_chunks(
+        [req.text], max_chars=settings.chunk_max_chars, overlap=settings.chunk_overlap_chars
+    )
+    return doc_id, [
+        _chunk(req.tenant_id, req.source, doc_id, i, text) for i, text in enumerate(texts)
+    ]
 
-    return [c for c in out if c]
+
+def _screen(chunks: list[DocumentChunk]) -> list[DocumentChunk]:
+    """Stamp each chunk with its retrieval-guard verdict; return only the safe ones.
+
+    Unsafe chunks never reach the index, so they cannot take top_k slots at query time.
+    They are not kept anywhere either: a later, looser ruleset or allowlist needs a
+    re-ingest to bring them back.
+    """
+
+    version = guard_version()
+    return [c for c in chunks if stamp_guard_verdict(c, version=version)]
 
 
 @router.post("/ingest", status_code=201)
@@ -53,26 +71,235 @@ def ingest(req: IngestRequest, p: IngestPrincipalDep, store: StoreDep):
     Enforces:
       - AuthN/AuthZ scope: ingest:write
       - tenant ownership (no cross-tenant writes)
+
+    Re-ingesting a doc_id replaces the stored version of that document.
     """
 
     enforce_tenant(req.tenant_id, p)
 
-    # Stable doc_id for demos/tests. Use a modern hash (Bandit flags SHA1 as weak).
-    # We only need a short deterministic identifier here, not a cryptographic guarantee.
-    doc_id = req.doc_id or hashlib.blake2s(req.text.encode("utf-8"), digest_size=6).hexdigest()
-
-    chunks = _split(req.text)
+    doc_id, chunks = _to_chunks(req)
     if not chunks:
         raise HTTPException(status_code=400, detail="empty_document")
 
-    for i, c in enumerate(chunks):
-        chunk_id = f"{uuid.uuid4().hex[:8]}-{i}"
-        meta = ChunkMetadata(
-            tenant_id=req.tenant_id,
-            source=req.source,
-            doc_id=doc_id,
-            chunk_id=chunk_id,
-        )
-        store.upsert(DocumentChunk(metadata=meta, text=c))
-
-    return {"status": "ingested", "doc_id": doc_id, "chunks": len(chunks)}
+    safe = _screen(chunks)
+    replaced = store.replace_documents(req.tenant_id, [doc_id], safe)
+
+    return {
+        "status": "ingested",
+        "doc_id": doc_id,
+        "chunks": len(safe),
+        "quarantined": len(chunks) - len(safe),
+        "replaced": replaced,
+    }
+
+
+class _BatchWriter:
+    """Buffers chunks for a single-tenant batch and flushes them in bounded bulk upserts.
+
+    The tenant is authorized once, on the first document; every later document only has
+    to match that tenant_id. Whole documents (`add`) are never split across flushes, so
+    each flush replaces whole documents; a doc_id repeated in one batch keeps its last
+    version. A streamed document (`add_streamed`) is written as it arrives: its first
+    flush replaces the stored version and later flushes append to it.
+    """
+
+    def __init__(self, store: VectorStoreAdapter, p: Principal, *, flush_chunks: int) -> None:
+        self._store = store
+        self._principal = p
+        self._flush_chunks = max(1, flush_chunks)
+        self._pending: list[DocumentChunk] = []
+        self._pending_docs: set[str] = set()  # replaced by the next flush
+        self._streamed: set[str] = set()
+        self.tenant_id: str | None = None
+        self.doc_ids: list[str] = []
+        self.chunks = 0
+        self.quarantined = 0
+        self.replaced = 0
+        self.skipped = 0
+
+    def bind_tenant(self, tenant_id: str) -> None:
+        if self.tenant_id is None:
+            enforce_tenant(tenant_id, self._principal)
+            self.tenant_id = tenant_id
+        elif tenant_id != self.tenant_id:
+            raise HTTPException(status_code=403, detail="Tenant mismatch")
+
+    async def add(self, req: IngestRequest) -> None:
+        self.bind_tenant(req.tenant_id)
+
+        doc_id, chunks = _to_chunks(req)
+        if not chunks:
+            self.skipped += 1
+            return
+
+        self.doc_ids.append(doc_id)
+        if doc_id in self._pending_docs:
+            self._pending = [c for c in self._pending if c.metadata.doc_id != doc_id]
+        self._pending_docs.add(doc_id)
+        self._pending.extend(chunks)
+        if len(self._pending) >= self._flush_chunks:
+            await self.flush()
+
+    async def add_streamed(self, chunk: DocumentChunk) -> None:
+        """Next chunk of a document that is too large to buffer (tenant already bound)."""
+
+        doc_id = chunk.metadata.doc_id
+        if doc_id not in self._streamed:
+            self._streamed.add(doc_id)
+            self.doc_ids.append(doc_id)
+            self._pending_docs.add(doc_id)
+        self._pending.append(chunk)
+        if len(self._pending) >= self._flush_chunks:
+            await self.flush()
+
+    async def flush(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        doc_ids, self._pending_docs = self._pending_docs, set()
+        # Guard scan, embedding and index updates are CPU-bound; keep them off the loop.
+        stored, replaced = await run_in_threadpool(self._write, doc_ids, pending)
+        self.chunks += stored
+        self.quarantined += len(pending) - stored
+        self.replaced += replaced
+
+    def _write(self, doc_ids: set[str], chunks: list[DocumentChunk]) -> tuple[int, int]:
+        safe = _screen(chunks)
+        replaced = self._store.replace_documents(self.tenant_id, doc_ids, safe)
+        return len(safe), replaced
+
+
+def _line_too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail="ndjson_line_too_large")
+
+
+async def _ndjson_lines(request: Request, *, max_line_bytes: int) -> AsyncIterator[bytes]:
+    """Non-empty lines of an NDJSON body; 413 for a line over `max_line_bytes`.
+
+    Only the bytes of each new network chunk are searched for newlines, so a long line
+    arriving in many chunks costs linear time, and at most one line is buffered.
+    """
+
+    buf = bytearray()
+    async for part in request.stream():
+        scan = len(buf)
+        buf += part
+        start = 0
+        while (end := buf.find(b"\n", scan)) != -1:
+            if end - start > max_line_bytes:
+                raise _line_too_large()
+            line = bytes(buf[start:end])
+            if line.strip():
+                yield line
+            start = scan = end + 1
+        del buf[:start]
+        if len(buf) > max_line_bytes:
+            raise _line_too_large()
+    if buf.strip():
+        yield bytes(buf)
+
+
+@router.post("/ingest/batch", status_code=201)
+async def ingest_batch(request: Request, p: IngestPrincipalDep, store: StoreDep):
+    """Bulk ingest for backfills.
+
+    Accepts either a JSON body ({"documents": [IngestRequest, ...]}) or, for large payloads,
+    an NDJSON stream (Content-Type: application/x-ndjson, one IngestRequest per line) that is
+    parsed incrementally; a line over INGEST_MAX_LINE_BYTES is rejected with 413. All
+    documents must belong to one tenant. Chunks are embedded and written in bulk batches of
+    INGEST_BATCH_CHUNKS; chunks that fail the retrieval guard are counted as quarantined and
+    not stored. If an NDJSON stream fails part-way, the documents before the failing line
+    stay ingested.
+    """
+
+    settings = get_settings()
+    writer = _BatchWriter(store, p, flush_chunks=settings.ingest_batch_chunks)
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+
+    try:
+        if content_type == NDJSON_MEDIA_TYPE:
+            line_no = 0
+            lines = _ndjson_lines(request, max_line_bytes=settings.ingest_max_line_bytes)
+            async for line in lines:
+                line_no += 1
+                try:
+                    doc = IngestRequest.model_validate_json(line)
+                except ValidationError as e:
+                    raise HTTPException(
+                        status_code=400, detail=f"invalid_document:line_{line_no}"
+                    ) from e
+                await writer.add(doc)
+        else:
+            try:
+                batch = IngestBatchRequest.model_validate_json(await request.body())
+            except ValidationError as e:
+                raise HTTPException(status_code=400, detail="invalid_batch") from e
+            # Reject mixed-tenant bodies before anything is written.
+            if len({d.tenant_id for d in batch.documents}) > 1:
+                raise HTTPException(status_code=403, detail="Tenant mismatch")
+            for doc in batch.documents:
+                await writer.add(doc)
+    finally:
+        await writer.flush()
+
+    if writer.tenant_id is None:
+        raise HTTPException(status_code=400, detail="empty_batch")
+
+    return {
+        "status": "ingested",
+        "documents": len(writer.doc_ids),
+        "skipped": writer.skipped,
+        "chunks": writer.chunks,
+        "quarantined": writer.quarantined,
+        "replaced": writer.replaced,
+        "doc_ids": writer.doc_ids,
+    }
+
+
+@router.post("/ingest/stream", status_code=201)
+async def ingest_stream(
+    request: Request,
+    p: IngestPrincipalDep,
+    store: StoreDep,
+    tenant_id: RequiredQuery,
+    doc_id: RequiredQuery,
+    source: str = "unknown",
+):
+    """Ingest one large plain-text document from a streamed request body.
+
+    The body (UTF-8) is decoded, chunked and written incrementally, in batches of
+    INGEST_BATCH_CHUNKS, so memory stays flat whatever the document size. `doc_id` is
+    required: a content hash would only be known after the whole body. The first batch
+    replaces any stored version of the document; if the stream fails part-way, the
+    chunks written so far stay and re-sending the document replaces them.
+    """
+
+    settings = get_settings()
+    writer = _BatchWriter(store, p, flush_chunks=settings.ingest_batch_chunks)
+    writer.bind_tenant(tenant_id)
+
+    texts = aiter_chunks(
+        adecode_utf8(request.stream()),
+        max_chars=settings.chunk_max_chars,
+        overlap=settings.chunk_overlap_chars,
+    )
+    n = 0
+    try:
+        async for text in texts:
+            await writer.add_streamed(_chunk(tenant_id, source, doc_id, n, text))
+            n += 1
+    except UnicodeDecodeError as e:
+        raise HTTPException(status_code=400, detail="invalid_utf8") from e
+    finally:
+        await writer.flush()
+
+    if n == 0:
+        raise HTTPException(status_code=400, detail="empty_document")
+
+    return {
+        "status": "ingested",
+        "doc_id": doc_id,
+        "chunks": writer.chunks,
+        "quarantined": writer.quarantined,
+        "replaced": writer.replaced,
+    }
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import PROMETHEUS_CONTENT_TYPE
+from app.core.security import Principal, require_scopes
+
+router = APIRouter(tags=["metrics"])
+
+# Operator scope: the corpus gauges are labelled with every tenant's id.
+MetricsPrincipalDep = Annotated[Principal, Depends(require_scopes("metrics:read"))]
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics(request: Request, _: MetricsPrincipalDep) -> PlainTextResponse:
+    """Prometheus text exposition of the process's counters, gauges and histograms."""
+
+    registry = request.app.state.metrics
+    if registry is None:
+        raise HTTPException(status_code=404, detail="metrics_disabled")
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -17,20 +17,83 @@ class Settings(BaseSettings):
     app_env: str = Field(default="dev", alias="APP_ENV")
     app_name: str = Field(default="secure-rag-pipeline", alias="APP_NAME")
     log_level: str = Field(default="INFO", alias="LOG_LEVEL")
+    # Bounded queue to a background log writer; 0 = synchronous stdout writes
+    log_queue_size: int = Field(default=10000, alias="LOG_QUEUE_SIZE")
+    # Latency histograms, counters and corpus gauges, served at /metrics (metrics:read)
+    metrics_enabled: bool = Field(default=True, alias="METRICS_ENABLED")
 
     # Auth
     jwt_secret: str = Field(default="change-me", alias="JWT_SECRET")
     jwt_algorithm: str = Field(default="HS256", alias="JWT_ALGORITHM")
+    # OIDC: verify against the provider's JWKS (cached, refreshed in the background)
+    # instead of JWT_SECRET; issuer/audience are enforced when set.
+    jwt_jwks_url: str = Field(default="", alias="JWT_JWKS_URL")
+    jwt_issuer: str = Field(default="", alias="JWT_ISSUER")
+    jwt_audience: str = Field(default="", alias="JWT_AUDIENCE")
+    jwks_refresh_seconds: float = Field(default=300.0, alias="JWKS_REFRESH_SECONDS")
+    # Signing algorithms accepted in JWKS mode (asymmetric only: HS* is refused there)
+    jwt_jwks_algorithms: str = Field(default="RS256,ES256", alias="JWT_JWKS_ALGORITHMS")
+    # Verified-token LRU (0 disables); entries expire at the token's exp, or after the TTL
+    token_cache_size: int = Field(default=4096, alias="TOKEN_CACHE_SIZE")
+    token_cache_ttl_seconds: float = Field(default=300.0, alias="TOKEN_CACHE_TTL_SECONDS")
 
     # RAG
     vector_backend: str = Field(default="inmemory", alias="VECTOR_BACKEND")
     allowlist_sources: str = Field(default="", alias="ALLOWLIST_SOURCES")
     max_prompt_chars: int = Field(default=8000, alias="MAX_PROMPT_CHARS")
     top_k: int = Field(default=5, alias="TOP_K")
+    # vector | lexical (BM25) | hybrid (BM25 + vector, reciprocal-rank fusion)
+    retrieval_mode: str = Field(default="vector", alias="RETRIEVAL_MODE")
+    ingest_batch_chunks: int = Field(default=512, alias="INGEST_BATCH_CHUNKS")
+    # Largest accepted line (one document) of an NDJSON /ingest/batch body
+    ingest_max_line_bytes: int = Field(default=16 * 1024 * 1024, alias="INGEST_MAX_LINE_BYTES")
+    # Chunking: max characters per chunk and characters shared by consecutive chunks
+    chunk_max_chars: int = Field(default=900, alias="CHUNK_MAX_CHARS")
+    chunk_overlap_chars: int = Field(default=100, alias="CHUNK_OVERLAP_CHARS")
+    # Background compaction of deleted/replaced chunks: at least this many dead rows
+    # and this fraction of the tenant's rows
+    compact_min_dead: int = Field(default=1024, alias="COMPACT_MIN_DEAD")
+    compact_dead_ratio: float = Field(default=0.25, alias="COMPACT_DEAD_RATIO")
+
+    # Embeddings: model name ("hash" toy, "ngram" local CPU model), dims (0 = model
+    # default) and LRU size for query embeddings (0 disables)
+    embedding_model: str = Field(default="hash", alias="EMBEDDING_MODEL")
+    embedding_dims: int = Field(default=0, alias="EMBEDDING_DIMS")
+    query_embedding_cache: int = Field(default=4096, alias="QUERY_EMBEDDING_CACHE")
+
+    # ANN (ivf backend): cells per tenant (0 = auto) and cells scanned per query
+    ivf_nlist: int = Field(default=0, alias="IVF_NLIST")
+    ivf_nprobe: int = Field(default=8, alias="IVF_NPROBE")
+
+    # Persistent store (mmap backend)
+    vector_store_path: str = Field(default="./data/vectors", alias="VECTOR_STORE_PATH")
+
+    # Shared store server for multi-worker deployments (remote backend)
+    store_socket_path: str = Field(default="./data/store.sock", alias="STORE_SOCKET_PATH")
+    store_server_backend: str = Field(default="numpy", alias="STORE_SERVER_BACKEND")
+    store_pool_size: int = Field(default=8, alias="STORE_POOL_SIZE")
+
+    # Concurrency: CPU stage executors and the /chat admission limit
+    cpu_workers: int = Field(default=4, alias="CPU_WORKERS")
+    redaction_processes: int = Field(default=0, alias="REDACTION_PROCESSES")
+    redaction_workers: int = Field(default=2, alias="REDACTION_WORKERS")
+    redaction_batch_max: int = Field(default=32, alias="REDACTION_BATCH_MAX")
+    redaction_batch_wait_ms: float = Field(default=2.0, alias="REDACTION_BATCH_WAIT_MS")
+    stream_redaction_window: int = Field(default=128, alias="STREAM_REDACTION_WINDOW")
+    answer_cache_max_entries: int = Field(default=1024, alias="ANSWER_CACHE_MAX_ENTRIES")
+    answer_cache_max_mb: float = Field(default=64.0, alias="ANSWER_CACHE_MAX_MB")
+    answer_cache_ttl_s: float = Field(default=300.0, alias="ANSWER_CACHE_TTL_S")
+    answer_cache_similarity: float = Field(default=0.0, alias="ANSWER_CACHE_SIMILARITY")
+    chat_max_concurrency: int = Field(default=32, alias="CHAT_MAX_CONCURRENCY")
+    chat_queue_timeout_s: float = Field(default=2.0, alias="CHAT_QUEUE_TIMEOUT_S")
 
     # Optional vector db config
     qdrant_url: str = Field(default="http://qdrant:6333", alias="QDRANT_URL")
 
+    @property
+    def jwt_jwks_algorithms_list(self) -> list[str]:
+        return [a.strip() for a in self.jwt_jwks_algorithms.split(",") if a.strip()]
+
     @property
     def allowlist_sources_list(self) -> list[str]:
         if not self.allowlist_sources.strip():
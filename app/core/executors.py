@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any
+
+from app.core.config import get_settings
+
+_lock = threading.Lock()
+_cpu: ThreadPoolExecutor | None = None
+_redaction: Executor | None = None
+
+
+def get_cpu_executor() -> ThreadPoolExecutor:
+    """Thread pool for CPU stages that release the GIL (NumPy, hashing) or are short."""
+
+    global _cpu
+    with _lock:
+        if _cpu is None:
+            _cpu = ThreadPoolExecutor(
+                max_workers=get_settings().cpu_workers, thread_name_prefix="rag-cpu"
+            )
+        return _cpu
+
+
+def get_redaction_executor() -> Executor:
+    """Dedicated redaction pool, so batched NLP passes never queue behind retrieval.
+
+    A process pool when REDACTION_PROCESSES > 0 (Presidio holds the GIL), otherwise
+    REDACTION_WORKERS threads.
+    """
+
+    global _redaction
+    settings = get_settings()
+    with _lock:
+        if _redaction is None:
+            if settings.redaction_processes > 0:
+                _redaction = ProcessPoolExecutor(max_workers=settings.redaction_processes)
+            else:
+                _redaction = ThreadPoolExecutor(
+                    max_workers=max(1, settings.redaction_workers),
+                    thread_name_prefix="rag-redact",
+                )
+        return _redaction
+
+
+async def run_in(executor: Executor, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+
+
+def shutdown_executors() -> None:
+    global _cpu, _redaction
+    with _lock:
+        for ex in (_redaction, _cpu):
+            if ex is not None:
+                ex.shutdown(wait=False, cancel_futures=True)
+        _cpu = _redaction = None
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+
+import httpx
+import jwt
+
+logger = logging.getLogger(__name__)
+
+
+class JwksKeySet:
+    """Signing keys from an OIDC provider's JWKS endpoint, cached in process.
+
+    Requests only ever read the local `{kid: key}` map. A background thread refetches the
+    set every `refresh_seconds`, and earlier when a token names an unknown `kid` (a key
+    rotation in progress), at most once per `min_refresh_seconds` so forged `kid`s cannot
+    turn into a fetch storm. Such a token is rejected rather than waiting on the network;
+    the client retries once the new key has landed. Failed fetches are retried with
+    exponential backoff from `min_refresh_seconds` up to `refresh_seconds`.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        refresh_seconds: float = 300.0,
+        min_refresh_seconds: float = 10.0,
+        timeout: float = 5.0,
+        on_keys_removed: Callable[[], None] | None = None,
+    ) -> None:
+        self.url = url
+        self.refresh_seconds = refresh_seconds
+        self.min_refresh_seconds = min_refresh_seconds
+        self.timeout = timeout
+        self._on_keys_removed = on_keys_removed
+        self._keys: dict[str, jwt.PyJWK] = {}
+        self._last_fetch = 0.0
+        self._failures = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self._keys)
+
+    def get(self, kid: str) -> jwt.PyJWK | None:
+        key = self._keys.get(kid)
+        if key is None:
+            self._wake.set()
+        return key
+
+    def refresh(self) -> None:
+        """Fetch the key set now (blocking) and swap it in."""
+
+        resp = httpx.get(self.url, timeout=self.timeout)
+        resp.raise_for_status()
+        fetched = jwt.PyJWKSet.from_dict(resp.json())
+        keys = {k.key_id: k for k in fetched.keys if k.key_id}
+        self._last_fetch = time.monotonic()
+        removed = self._keys.keys() - keys.keys()
+        # One reference swap: readers see the old set or the new one, never a mix.
+        self._keys = keys
+        if removed and self._on_keys_removed is not None:
+            self._on_keys_removed()
+
+    def start(self) -> None:
+        """First fetch (blocking), then refresh in the background.
+
+        A failed first fetch is logged, not raised: the refresh thread starts regardless
+        and retries with backoff, so a provider that is briefly down at startup does not
+        leave the process without keys until a restart.
+        """
+
+        try:
+            self.refresh()
+        except Exception as e:
+            self._failed()
+            logger.warning(f"JWKS fetch failed, retrying in the background: {type(e).__name__}")
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="jwks-refresh", daemon=True)
+            self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def _failed(self) -> None:
+        self._failures += 1
+        self._last_fetch = time.monotonic()
+
+    def _next_wait(self) -> float:
+        if not self._failures:
+            return self.refresh_seconds
+        backoff = self.min_refresh_seconds * 2 ** min(self._failures - 1, 16)
+        return min(self.refresh_seconds, backoff)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self._next_wait())
+            if self._stop.is_set():
+                return
+            wait = self._last_fetch + self.min_refresh_seconds - time.monotonic()
+            if wait > 0 and self._stop.wait(wait):
+                return
+            self._wake.clear()
+            try:
+                self.refresh()
+                self._failures = 0
+            except Exception as e:
+                # Keep serving the last good key set; retry after the backoff.
+                self._failed()
+                logger.warning(f"JWKS refresh failed: {type(e).__name__}")
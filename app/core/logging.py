@@ -1,10 +1,34 @@
 from __future__ import annotations
 
+import atexit
 import json
 import logging
+import queue
 import sys
-from datetime import UTC, datetime
-from typing import Any
+import threading
+import time
+from collections.abc import Callable
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, TextIO
+
+# Optional fast serializer; the stdlib encoder is the fallback.
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# The only record attributes copied into a log line (PII-safe whitelist).
+_EXTRA_FIELDS = ("request_id", "tenant_id", "path", "method", "status_code")
+
+_json_encode = json.JSONEncoder(ensure_ascii=False, default=str).encode
+
+
+def _dumps(payload: dict[str, Any]) -> str:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload, default=str).decode()
+    return _json_encode(payload)
 
 
 class JsonFormatter(logging.Formatter):
@@ -16,34 +40,200 @@ class JsonFormatter(logging.Formatter):
       - keep correlation IDs and tenant IDs for auditability
     """
 
+    def __init__(self) -> None:
+        super().__init__()
+        # "YYYY-mm-ddTHH:MM:SS" only changes once a second; reuse it between records.
+        self._ts_second = -1
+        self._ts_prefix = ""
+
+    def _timestamp(self, created: float) -> str:
+        second = int(created)
+        if second != self._ts_second:
+            self._ts_prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+            self._ts_second = second
+        return f"{self._ts_prefix}.{int((created - second) * 1000):03d}+00:00"
+
     def format(self, record: logging.LogRecord) -> str:
         base: dict[str, Any] = {
-            "ts": datetime.now(UTC).isoformat(timespec="milliseconds"),
+            "ts": self._timestamp(record.created),
             "level": record.levelname,
             "logger": record.name,
             "msg": record.getMessage(),
         }
 
         # Extra fields (best effort)
-        for k in ("request_id", "tenant_id", "path", "method", "status_code"):
+        for k in _EXTRA_FIELDS:
             v = getattr(record, k, None)
             if v is not None:
                 base[k] = v
 
         if record.exc_info:
             base["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            base["exc"] = record.exc_text
+
+        return _dumps(base)
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """Hands records to the writer thread; drops (and counts) them when the queue is full.
+
+    A full queue means stdout cannot keep up. Dropping keeps the request path from
+    blocking on it; the count is exposed as `rag_log_records_dropped_total`.
+    """
+
+    def __init__(self, q: queue.Queue[logging.LogRecord], formatter: JsonFormatter) -> None:
+        super().__init__(q)
+        self._formatter = formatter
+        self._dropped = 0
+        self._lock = threading.Lock()
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Freeze what cannot cross threads safely (mutable args, live tracebacks), but
+        # leave the JSON formatting to the writer thread.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.count_dropped()
+
+    def count_dropped(self) -> None:
+        with self._lock:
+            self._dropped += 1
+
+
+# How long stop() waits for the writer to make room for its sentinel in a full queue.
+_STOP_TIMEOUT_S = 1.0
+
 
-        return json.dumps(base, ensure_ascii=False)
+class _DrainingQueueListener(QueueListener):
+    """QueueListener whose stop() still gets through when the bounded queue is full.
 
+    The stdlib enqueues the stop sentinel with put_nowait, which raises queue.Full
+    exactly when a backlog is waiting: the writer would never be joined and its last
+    batch would be lost. Here the sentinel waits for room, then makes room by dropping
+    (and counting) the oldest queued record.
+    """
+
+    def __init__(
+        self,
+        q: queue.Queue[logging.LogRecord],
+        handler: logging.Handler,
+        on_drop: Callable[[], None],
+    ) -> None:
+        super().__init__(q, handler)
+        self._on_drop = on_drop
+
+    def enqueue_sentinel(self) -> None:
+        try:
+            self.queue.put(self._sentinel, timeout=_STOP_TIMEOUT_S)
+            return
+        except queue.Full:
+            pass
+        while True:
+            try:
+                self.queue.get_nowait()
+                self.queue.task_done()
+                self._on_drop()
+            except queue.Empty:
+                pass
+            try:
+                self.queue.put_nowait(self._sentinel)
+                return
+            except queue.Full:
+                continue  # refilled by another thread meanwhile
+
+
+class _BatchingStreamHandler(logging.StreamHandler):
+    """Stream handler for the writer thread: one write + flush per drained batch."""
+
+    def __init__(
+        self, stream: TextIO, pending: queue.Queue[logging.LogRecord], max_batch: int = 256
+    ) -> None:
+        super().__init__(stream)
+        self._pending = pending
+        self._max_batch = max_batch
+        self._lines: list[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self._lines.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+        # Write when the queue is drained (the listener would block) or the batch is full.
+        if len(self._lines) >= self._max_batch or self._pending.empty():
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._lines:
+            return
+        data = "\n".join(self._lines) + "\n"
+        self._lines.clear()
+        with self.lock:
+            self.stream.write(data)
+            self.stream.flush()
+
+
+_listener: QueueListener | None = None
+_queue_handler: _DroppingQueueHandler | None = None
+
+
+def _stop_listener() -> None:
+    global _listener, _queue_handler
+    if _listener is not None:
+        # Drains whatever is still queued, then writes the writer's last partial batch.
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.flush()
+    _listener = _queue_handler = None
+
+
+atexit.register(_stop_listener)
+
+
+def dropped_log_records() -> int:
+    """Records dropped because the log queue was full (0 in synchronous mode)."""
+
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+def configure_logging(level: str = "INFO", *, queue_size: int = 0) -> None:
+    """JSON logs to stdout.
+
+    With `queue_size` > 0, records go through a bounded queue to a background writer
+    thread, so request handlers never block on stdout; otherwise writes are synchronous.
+    """
 
-def configure_logging(level: str = "INFO") -> None:
+    global _listener, _queue_handler
     root = logging.getLogger()
     root.handlers.clear()
+    _stop_listener()
     root.setLevel(level.upper())
 
-    handler = logging.StreamHandler(sys.stdout)
-    handler.setFormatter(JsonFormatter())
-    root.addHandler(handler)
+    formatter = JsonFormatter()
+    if queue_size > 0:
+        pending: queue.Queue[logging.LogRecord] = queue.Queue(maxsize=queue_size)
+        writer = _BatchingStreamHandler(sys.stdout, pending)
+        writer.setFormatter(formatter)
+        _queue_handler = _DroppingQueueHandler(pending, formatter)
+        _listener = _DrainingQueueListener(pending, writer, _queue_handler.count_dropped)
+        _listener.start()
+        root.addHandler(_queue_handler)
+    else:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(formatter)
+        root.addHandler(handler)
 
     # Reduce noisy loggers
     logging.getLogger("uvicorn").setLevel(level.upper())
@@ -0,0 +1,344 @@
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from collections import deque
+from collections.abc import Callable, Iterator, Sequence
+from typing import Any
+
+# Seconds; spans cache hits (sub-millisecond) to slow redaction passes.
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)  # fmt: skip
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = tuple[str, ...]
+
+logger = logging.getLogger(__name__)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values, strict=True))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class _Shard:
+    """Holder of one thread's values; collected when the thread's locals are."""
+
+    __slots__ = ("values", "__weakref__")
+
+    def __init__(self, values: list[float]) -> None:
+        self.values = values
+
+
+class _ThreadShards:
+    """Per-thread value slots, summed on read.
+
+    Each thread only ever writes its own list, so recording is a plain index increment:
+    no lock and no lost updates between threads. The lock is taken once per thread (to
+    register its list) and on reads. When a thread exits its holder is collected and its
+    list is folded into `_base`, so short-lived threads (AnyIO workers, compactions) do
+    not accumulate shards.
+    """
+
+    __slots__ = ("_width", "_local", "_all", "_base", "_retired", "_lock")
+
+    def __init__(self, width: int) -> None:
+        self._width = width
+        self._local = threading.local()
+        self._all: dict[int, list[float]] = {}
+        self._base = [0.0] * width
+        # Lists of exited threads. Filled from a GC callback, which may run on any thread
+        # (even one holding _lock), so it only appends and readers fold under the lock.
+        self._retired: deque[list[float]] = deque()
+        self._lock = threading.Lock()
+
+    def mine(self) -> list[float]:
+        try:
+            return self._local.values
+        except AttributeError:
+            values = [0.0] * self._width
+            shard = _Shard(values)
+            with self._lock:
+                self._fold_retired()
+                self._all[id(values)] = values
+            weakref.finalize(shard, self._retired.append, values).atexit = False
+            self._local.shard = shard
+            self._local.values = values
+            return values
+
+    def _fold_retired(self) -> None:
+        while self._retired:
+            values = self._retired.popleft()
+            if self._all.pop(id(values), None) is not None:
+                for i, v in enumerate(values):
+                    self._base[i] += v
+
+    def totals(self) -> list[float]:
+        with self._lock:
+            self._fold_retired()
+            shards = [list(self._base), *self._all.values()]
+        return [sum(col) for col in zip(*shards, strict=True)]
+
+    def __len__(self) -> int:
+        """Live shards (threads that recorded and have not exited)."""
+
+        with self._lock:
+            self._fold_retired()
+            return len(self._all)
+
+
+class _CounterChild:
+    __slots__ = ("_shards",)
+
+    def __init__(self) -> None:
+        self._shards = _ThreadShards(1)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._shards.mine()[0] += amount
+
+    @property
+    def value(self) -> float:
+        return self._shards.totals()[0]
+
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class _Timer:
+    __slots__ = ("_child", "_t0")
+
+    def __init__(self, child: _HistogramChild) -> None:
+        self._child = child
+
+    def __enter__(self) -> None:
+        self._t0 = time.perf_counter()
+
+    def __exit__(self, *exc: object) -> None:
+        self._child.observe(time.perf_counter() - self._t0)
+
+
+class _HistogramChild:
+    __slots__ = ("_bounds", "_shards")
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self._bounds = bounds
+        # One slot per bucket (non-cumulative), +Inf, then the sum.
+        self._shards = _ThreadShards(len(bounds) + 2)
+
+    def observe(self, value: float) -> None:
+        values = self._shards.mine()
+        values[bisect_left(self._bounds, value)] += 1
+        values[-1] += value
+
+    def time(self) -> _Timer:
+        """Context manager observing the wall time of its block."""
+
+        return _Timer(self)
+
+    def snapshot(self) -> tuple[list[float], float]:
+        """(cumulative bucket counts incl. +Inf, sum)."""
+
+        totals = self._shards.totals()
+        cumulative, running = [], 0.0
+        for count in totals[:-1]:
+            running += count
+            cumulative.append(running)
+        return cumulative, totals[-1]
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str]) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: dict[Labels, Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str) -> Any:
+        """The child for these label values; cache it on hot paths."""
+
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name}: expected labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def samples(self) -> Iterator[tuple[str, Labels, Labels, float]]:
+        """(suffix, extra label names, label values, value) per exposed sample."""
+
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def samples(self) -> Iterator[tuple[str, Labels, Labels, float]]:
+        for values, child in list(self._children.items()):
+            yield "", (), values, child.value
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def remove(self, *values: str) -> None:
+        with self._lock:
+            self._children.pop(values, None)
+
+    def samples(self) -> Iterator[tuple[str, Labels, Labels, float]]:
+        for values, child in list(self._children.items()):
+            yield "", (), values, child.value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str],
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def samples(self) -> Iterator[tuple[str, Labels, Labels, float]]:
+        bounds = [_format_value(b) for b in (*self.buckets, float("inf"))]
+        for values, child in list(self._children.items()):
+            cumulative, total = child.snapshot()
+            for le, count in zip(bounds, cumulative, strict=True):
+                yield "_bucket", ("le",), (*values, le), count
+            yield "_count", (), values, cumulative[-1]
+            yield "_sum", (), values, total
+
+
+class _FuncMetric:
+    """Values read from a callback at scrape time (existing stats objects, sizes)."""
+
+    def __init__(
+        self,
+        kind: str,
+        name: str,
+        help: str,
+        labelnames: Sequence[str],
+        fn: Callable[[], dict[Labels, float]],
+    ) -> None:
+        self.kind = kind
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._fn = fn
+
+    def samples(self) -> Iterator[tuple[str, Labels, Labels, float]]:
+        try:
+            values = self._fn()
+        except Exception as e:
+            # One broken source must not fail the whole scrape.
+            logger.warning(f"Metric callback {self.name} failed: {type(e).__name__}")
+            return
+        for labels, value in values.items():
+            yield "", (), labels, value
+
+
+class MetricsRegistry:
+    """Counters, gauges and histograms rendered in the Prometheus text format.
+
+    Recording is lock-free (see `_ThreadShards`), so instrumentation can stay on in
+    production; aggregation cost is paid by the scrape. Callback metrics expose stats
+    that are already kept elsewhere (caches, redaction) without double bookkeeping.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_add(self, name: str, factory: Callable[[], Any]) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = factory()
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_add(name, lambda: Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_add(name, lambda: Gauge(name, help, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._get_or_add(name, lambda: Histogram(name, help, labelnames, buckets))
+
+    def register_func(
+        self,
+        kind: str,
+        name: str,
+        help: str,
+        fn: Callable[[], dict[Labels, float]],
+        labelnames: Sequence[str] = (),
+    ) -> None:
+        """Expose `fn()` ({label values: value}) as a counter or gauge, read per scrape."""
+
+        with self._lock:
+            self._metrics[name] = _FuncMetric(kind, name, help, labelnames, fn)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: list[str] = []
+        for m in metrics:
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            for suffix, extra, values, value in m.samples():
+                labels = _format_labels((*m.labelnames, *extra), values)
+                lines.append(f"{m.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
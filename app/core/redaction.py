@@ -1,10 +1,23 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+import re
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections.abc import Callable, Iterable, Sequence
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from itertools import accumulate
+from typing import Any, NamedTuple
+
+from app.core.config import get_settings
+from app.core.executors import get_redaction_executor, run_in
 
 # Enterprise Standard for PII Redaction: Microsoft Presidio
 try:
-    from presidio_analyzer import AnalyzerEngine
+    from presidio_analyzer import AnalyzerEngine, BatchAnalyzerEngine
     from presidio_anonymizer import AnonymizerEngine
 
     PRESIDIO_AVAILABLE = True
@@ -13,6 +26,218 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+REDACTION_ERROR_TEXT = "[REDACTION_ERROR - CONTENT BLOCKED]"
+
+# Luhn: every second digit from the right is doubled, and 2*d > 9 counts as 2*d - 9.
+# Mapping those digits through a translate table keeps the whole sum in C.
+_LUHN_DOUBLED = str.maketrans("0123456789", "0246813579")
+
+
+def luhn_valid(digits: str) -> bool:
+    """Luhn checksum over a string of ASCII digits (payment card numbers pass it)."""
+
+    plain = digits[-1::-2].encode("ascii")
+    doubled = digits[-2::-2].translate(_LUHN_DOUBLED).encode("ascii")
+    return (sum(plain) + sum(doubled) - 48 * len(digits)) % 10 == 0
+
+
+_DIGIT_GROUP = re.compile(r"\d+")
+
+
+def _card_spans(run: str) -> list[tuple[int, int]]:
+    """Parts of a run of digit groups covered by a Luhn-valid 13-19 digit card number.
+
+    Candidates start and end on group boundaries, and every valid one is redacted: a run
+    like "ref 12 4111 1111 1111 1111" fails Luhn as a whole but still holds a card, and
+    covering all candidates makes the result independent of where scanning started.
+    """
+
+    groups = [m.span() for m in _DIGIT_GROUP.finditer(run)]
+    if len(groups) == 1:
+        a, b = groups[0]
+        return [(a, b)] if 13 <= b - a <= 19 and luhn_valid(run[a:b]) else []
+
+    digits = "".join(run[a:b] for a, b in groups)
+    if len(groups) <= 16:
+
+        def valid(first: int, last: int) -> bool:
+            return luhn_valid(digits[first:last])
+
+    else:
+        # Long runs (e.g. "1 2 3 4 ..."): up to 7 candidates per group, so check them in
+        # O(1) from prefix sums. prefix[p][k] is the Luhn sum of digits[:k] when digits
+        # with index parity p are the undoubled ones (candidates ending on parity p).
+        plain = digits.encode("ascii")
+        doubled = digits.translate(_LUHN_DOUBLED).encode("ascii")
+        prefix = []
+        for p in (0, 1):
+            mixed = bytearray(doubled)
+            mixed[p::2] = plain[p::2]
+            prefix.append(list(accumulate(mixed, initial=0)))
+
+        def valid(first: int, last: int) -> bool:
+            sums = prefix[(last - 1) % 2]
+            return (sums[last] - sums[first] - 48 * (last - first)) % 10 == 0
+
+    starts, ends = [0], []
+    for a, b in groups:
+        ends.append(starts[-1] + (b - a))
+        starts.append(ends[-1])
+
+    out: list[tuple[int, int]] = []
+    for i in range(len(groups)):
+        first = starts[i]
+        lo = bisect_left(ends, first + 13, i)
+        hi = bisect_right(ends, first + 19, i) - 1
+        # Longest valid candidate from this group; shorter ones lie inside it.
+        for j in range(hi, lo - 1, -1):
+            if valid(first, ends[j]):
+                span = (groups[i][0], groups[j][1])
+                if out and span[0] < out[-1][1]:
+                    out[-1] = (out[-1][0], max(out[-1][1], span[1]))
+                else:
+                    out.append(span)
+                break
+    return out
+
+
+class RedactionSpan(NamedTuple):
+    start: int
+    end: int
+    placeholder: str
+
+
+def merge_spans(spans: Iterable[RedactionSpan]) -> list[RedactionSpan]:
+    """Sort spans and merge overlapping ones (the earliest placeholder is kept)."""
+
+    out: list[RedactionSpan] = []
+    for span in sorted(spans):
+        if out and span.start < out[-1].end:
+            last = out[-1]
+            out[-1] = RedactionSpan(last.start, max(last.end, span.end), last.placeholder)
+        else:
+            out.append(span)
+    return out
+
+
+def apply_spans(text: str, spans: Sequence[RedactionSpan]) -> str:
+    """Replace sorted, non-overlapping spans with their placeholders."""
+
+    parts: list[str] = []
+    pos = 0
+    for start, end, placeholder in spans:
+        parts.append(text[pos:start])
+        parts.append(placeholder)
+        pos = end
+    parts.append(text[pos:])
+    return "".join(parts)
+
+
+@dataclass(frozen=True)
+class FallbackEntity:
+    """One entity type of the regex fallback.
+
+    `pattern` must not contain capturing groups. `refine`, when set, returns the parts of
+    a match to redact, as (start, end) offsets into it (none: the match is left as is).
+    `trigger`, when set, is a regex that every match contains; text without it skips the
+    pass (see has_pii_candidates). Without one, every text is scanned.
+    """
+
+    name: str
+    pattern: str
+    placeholder: str
+    refine: Callable[[str], Iterable[tuple[int, int]]] | None = None
+    trigger: str | None = None
+
+
+class RegexRedactor:
+    """All entity patterns in one compiled alternation: one pass over the text whatever
+    the number of entity types, with the replacement picked by the matching group.
+
+    Earlier entities win when two could match at the same position.
+    """
+
+    # No entity may start inside an ASCII letter/digit run (each pattern starts at a \b or
+    # after a non-local-part char). Checking that once up front lets sre skip most
+    # positions in prose without trying every branch.
+    START_GUARD = r"(?<![A-Za-z0-9])"
+
+    def __init__(self, entities: Sequence[FallbackEntity]) -> None:
+        self.entities = {e.name: e for e in entities}
+        branches = "|".join(f"(?P<{e.name}>{e.pattern})" for e in entities)
+        self._regex = re.compile(f"{self.START_GUARD}(?:{branches})")
+        triggers = [e.trigger for e in entities]
+        self._triggers = None if None in triggers else re.compile("|".join(triggers))
+
+    def has_candidates(self, text: str) -> bool:
+        """False only when no entity's trigger occurs in `text`, so nothing can match."""
+
+        return self._triggers is None or self._triggers.search(text) is not None
+
+    def redact(self, text: str) -> str:
+        return self._regex.sub(self._replace, text)
+
+    def spans(self, text: str) -> list[RedactionSpan]:
+        out: list[RedactionSpan] = []
+        for m in self._regex.finditer(text):
+            entity = self.entities[m.lastgroup or ""]
+            if entity.refine is None:
+                out.append(RedactionSpan(m.start(), m.end(), entity.placeholder))
+                continue
+            base = m.start()
+            for a, b in entity.refine(m.group()):
+                out.append(RedactionSpan(base + a, base + b, entity.placeholder))
+        return out
+
+    def _replace(self, m: re.Match[str]) -> str:
+        entity = self.entities[m.lastgroup or ""]
+        if entity.refine is None:
+            return entity.placeholder
+        parts = [RedactionSpan(a, b, entity.placeholder) for a, b in entity.refine(m.group())]
+        return apply_spans(m.group(), parts)
+
+
+# Patterns are written to stay linear: the e-mail local part may only start where a run of
+# local-part characters starts (a plain \b is quadratic on inputs like "a.a.a.a..."), and
+# the card pattern takes a whole run of digits and separators as one character class
+# (no nested repeat to backtrack into); _card_spans then finds the cards in it.
+FALLBACK_ENTITIES = (
+    FallbackEntity(
+        "EMAIL",
+        r"(?i:(?<![A-Z0-9._%+-])[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,})\b",
+        "[EMAIL]",
+        trigger="@",
+    ),
+    FallbackEntity("CARD", r"\b\d[\d -]{11,}\d\b", "[CARD]", _card_spans, trigger=r"\d"),
+    FallbackEntity("AWS_KEY", r"\bAKIA[0-9A-Z]{16}\b", "[AWS_KEY]", trigger="AKIA"),
+)
+
+_FALLBACK = RegexRedactor(FALLBACK_ENTITIES)
+
+
+def has_pii_candidates(text: str, *, presidio: bool | None = None) -> bool:
+    """Cheap pre-screen: False only for text no configured detector can match.
+
+    Only the regex fallback is pre-screened (by its entities' triggers). Presidio's NER
+    entities (PERSON, LOCATION, NRP, DATE_TIME like "march first") need no particular
+    characters, so with Presidio every non-blank text is analyzed.
+    """
+
+    if not text or not text.strip():
+        return False
+    if PRESIDIO_AVAILABLE if presidio is None else presidio:
+        return True
+    return _FALLBACK.has_candidates(text)
+
+
+@dataclass
+class RedactionBatch:
+    """Result of one `redact_many` call: texts in input order plus seconds per stage."""
+
+    texts: list[str]
+    skipped: int = 0
+    timings: dict[str, float] = field(default_factory=dict)
+
 
 class PIIRedactor:
     """
@@ -25,6 +250,7 @@ class PIIRedactor:
         if self.use_presidio:
             logger.info("Initializing Microsoft Presidio for NLP-based PII Redaction.")
             self.analyzer = AnalyzerEngine()
+            self.batch_analyzer = BatchAnalyzerEngine(analyzer_engine=self.analyzer)
             self.anonymizer = AnonymizerEngine()
         else:
             logger.warning(
@@ -33,42 +259,330 @@ class PIIRedactor:
             )
 
     def redact(self, text: str) -> str:
-        if not text or not text.strip():
-            return text
+        return self.redact_many([text]).texts[0]
 
-        if self.use_presidio:
-            return self._redact_presidio(text)
-        return self._redact_regex_fallback(text)
+    def redact_many(self, texts: Sequence[str]) -> RedactionBatch:
+        """Redact a batch; texts without candidate entity shapes are returned untouched."""
+
+        timings: dict[str, float] = {}
+        t0 = time.perf_counter()
+        todo = [i for i, t in enumerate(texts) if has_pii_candidates(t, presidio=self.use_presidio)]
+        timings["prescreen"] = time.perf_counter() - t0
+
+        out = list(texts)
+        if todo:
+            batch = [texts[i] for i in todo]
+            if self.use_presidio:
+                redacted = self._redact_presidio(batch, timings)
+            else:
+                t0 = time.perf_counter()
+                redacted = [self._redact_regex_fallback(t) for t in batch]
+                timings["regex"] = time.perf_counter() - t0
+            for i, text in zip(todo, redacted, strict=True):
+                out[i] = text
+
+        return RedactionBatch(texts=out, skipped=len(texts) - len(todo), timings=timings)
+
+    def find_spans(self, text: str) -> list[RedactionSpan]:
+        """Sorted, non-overlapping entity spans in `text` (for incremental redaction)."""
 
-    def _redact_presidio(self, text: str) -> str:
+        if not has_pii_candidates(text, presidio=self.use_presidio):
+            return []
+        if not self.use_presidio:
+            return _FALLBACK.spans(text)
+        # Placeholders follow the anonymizer's default "replace" operator: <ENTITY_TYPE>.
+        results = self.analyzer.analyze(text=text, entities=[], language="en")
+        return merge_spans(RedactionSpan(r.start, r.end, f"<{r.entity_type}>") for r in results)
+
+    def _redact_presidio(self, texts: list[str], timings: dict[str, float]) -> list[str]:
         # Presidio automatically detects PERSON, LOCATION, EMAIL, PHONE_NUMBER, etc.
+        # One spaCy pipe() over the whole batch instead of one NLP pass per text.
         try:
-            results = self.analyzer.analyze(text=text, entities=[], language="en")
-            anonymized = self.anonymizer.anonymize(text=text, analyzer_results=results)
-            return anonymized.text
+            t0 = time.perf_counter()
+            results = self.batch_analyzer.analyze_iterator(
+                texts, language="en", batch_size=len(texts), entities=[]
+            )
+            t1 = time.perf_counter()
+            redacted = [
+                self.anonymizer.anonymize(text=t, analyzer_results=r).text
+                for t, r in zip(texts, results, strict=True)
+            ]
+            timings["analyze"] = t1 - t0
+            timings["anonymize"] = time.perf_counter() - t1
+            return redacted
         except Exception as e:
             logger.error(f"Presidio redaction failed: {e}. Returning safely redacted text.")
-            return "[REDACTION_ERROR - CONTENT BLOCKED]"
+            return [REDACTION_ERROR_TEXT] * len(texts)
 
     def _redact_regex_fallback(self, text: str) -> str:
         """Basic fallback when Presidio is not available."""
-        import re
 
-        redacted = text
-        # Simple Email Regex
-        redacted = re.sub(
-            r"\b[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}\b", "[EMAIL]", redacted, flags=re.IGNORECASE
+        return _FALLBACK.redact(text)
+
+
+class RedactionStats:
+    """Process-wide redaction counters and cumulative seconds per stage."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._texts = 0
+        self._skipped = 0
+        self._batches = 0
+        self._seconds: dict[str, float] = {}
+
+    def record(self, *, texts: int, skipped: int, batches: int, timings: dict[str, float]) -> None:
+        with self._lock:
+            self._texts += texts
+            self._skipped += skipped
+            self._batches += batches
+            for stage, seconds in timings.items():
+                self._seconds[stage] = self._seconds.get(stage, 0.0) + seconds
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "texts": self._texts,
+                "skipped": self._skipped,
+                "batches": self._batches,
+                "avg_batch": self._texts / self._batches if self._batches else 0.0,
+                "stage_seconds": dict(self._seconds),
+            }
+
+
+@dataclass
+class _PendingBatch:
+    items: list[tuple[str, asyncio.Future[str]]] = field(default_factory=list)
+    opened: float = field(default_factory=time.perf_counter)
+    sealed: bool = False
+
+
+class RedactionBatcher:
+    """Coalesces concurrent async redaction requests into one `redact_many` call.
+
+    The first request opens a batch; it is sealed after `max_wait_s` or once `max_batch`
+    texts are queued, then redacted in a single call on the redaction executor. Texts that
+    fail the pre-screen return immediately, without an executor hop.
+    """
+
+    def __init__(
+        self,
+        redact_many: Callable[[Sequence[str]], RedactionBatch],
+        *,
+        stats: RedactionStats,
+        max_batch: int = 32,
+        max_wait_s: float = 0.002,
+        executor: Callable[[], Executor] = get_redaction_executor,
+    ) -> None:
+        self._redact_many = redact_many
+        self._stats = stats
+        self._max_batch = max(1, max_batch)
+        self._max_wait_s = max(0.0, max_wait_s)
+        self._executor = executor
+        # Keyed by event loop: futures must be resolved on the loop that created them.
+        self._open: dict[asyncio.AbstractEventLoop, _PendingBatch] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def redact(self, text: str) -> str:
+        t0 = time.perf_counter()
+        if not has_pii_candidates(text):
+            timings = {"prescreen": time.perf_counter() - t0}
+            self._stats.record(texts=1, skipped=1, batches=0, timings=timings)
+            return text
+
+        loop = asyncio.get_running_loop()
+        batch = self._open.get(loop)
+        if batch is None:
+            batch = self._open[loop] = _PendingBatch()
+            loop.call_later(self._max_wait_s, self._seal, loop, batch)
+
+        fut: asyncio.Future[str] = loop.create_future()
+        batch.items.append((text, fut))
+        if len(batch.items) >= self._max_batch:
+            self._seal(loop, batch)
+        return await fut
+
+    def _seal(self, loop: asyncio.AbstractEventLoop, batch: _PendingBatch) -> None:
+        if batch.sealed:
+            return
+        batch.sealed = True
+        if self._open.get(loop) is batch:
+            del self._open[loop]
+        task = loop.create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: _PendingBatch) -> None:
+        queued = time.perf_counter() - batch.opened
+        texts = [text for text, _ in batch.items]
+        try:
+            result = await run_in(self._executor(), self._redact_many, texts)
+        except Exception as e:
+            # Never fall back to returning unredacted text.
+            logger.error(f"Batched redaction failed: {type(e).__name__}. Blocking content.")
+            result = RedactionBatch(texts=[REDACTION_ERROR_TEXT] * len(texts))
+
+        self._stats.record(
+            texts=len(texts),
+            skipped=result.skipped,
+            batches=1,
+            timings={**result.timings, "queue_wait": queued},
         )
-        # Simple Credit Card Regex
-        redacted = re.sub(r"\b(?:\d[ -]*?){13,19}\b", "[CARD]", redacted)
-        # AWS Key Regex
-        redacted = re.sub(r"\bAKIA[0-9A-Z]{16}\b", "[AWS_KEY]", redacted)
-        return redacted
+        for (_, fut), redacted in zip(batch.items, result.texts, strict=True):
+            if not fut.done():
+                fut.set_result(redacted)
+
+
+class StreamingRedactor:
+    """Incremental redaction for a streamed answer, one instance per stream.
+
+    Text is only emitted once it is at least `window` characters behind the end of what
+    has been received, and never from inside a detected entity, so an entity split across
+    chunks is still detected whole. Each scan also sees up to `window` characters of
+    already-emitted text as left context. Entities longer than `window` are the limit.
+    A failed scan blocks the rest of the stream.
+    """
+
+    def __init__(
+        self,
+        find_spans: Callable[[str], list[RedactionSpan]],
+        *,
+        window: int = 128,
+        step: int = 32,
+        executor: Callable[[], Executor] = get_redaction_executor,
+    ) -> None:
+        self._find_spans = find_spans
+        self._window = max(1, window)
+        self._step = max(1, step)
+        self._executor = executor
+        self._left = ""  # tail of the emitted raw text, context only
+        self._pending = ""
+        self._failed = False
+
+    async def feed(self, text: str) -> str:
+        """Add streamed text; returns the redacted text that is now safe to emit."""
+
+        self._pending += text
+        if len(self._pending) < self._window + self._step:
+            return ""
+        return await self._emit(final=False)
+
+    async def flush(self) -> str:
+        """End of stream: redact and return everything still held back."""
 
+        return await self._emit(final=True)
 
-# Singleton instance
-_redactor = PIIRedactor()
+    async def _emit(self, *, final: bool) -> str:
+        if self._failed:
+            self._pending = ""
+            return ""
+
+        scan = self._left + self._pending
+        offset = len(self._left)
+        try:
+            if has_pii_candidates(scan):
+                spans = await run_in(self._executor(), self._find_spans, scan)
+            else:
+                spans = []
+        except Exception as e:
+            logger.error(f"Streaming redaction failed: {type(e).__name__}. Blocking content.")
+            self._failed = True
+            self._pending = ""
+            return REDACTION_ERROR_TEXT
+
+        # Spans relative to the pending text. Parts of a span in already-emitted text can't
+        # be recalled; its remainder is still redacted.
+        local = [
+            RedactionSpan(max(0, s - offset), e - offset, p) for s, e, p in spans if e > offset
+        ]
+        cut = len(self._pending) if final else len(self._pending) - self._window
+        for start, end, _ in local:
+            if start < cut < end:
+                cut = start
+                break
+
+        out = apply_spans(self._pending[:cut], [s for s in local if s.end <= cut])
+        self._left = (self._left + self._pending[:cut])[-self._window :]
+        self._pending = self._pending[cut:]
+        return out
+
+
+# Built on first use (or by warm_up), never at import: with Presidio installed the
+# constructor loads spaCy models, which would slow every import of this module.
+_redactor: PIIRedactor | None = None
+_redactor_lock = threading.Lock()
+_stats = RedactionStats()
+_batcher: RedactionBatcher | None = None
+_batcher_lock = threading.Lock()
+
+_WARMUP_SAMPLE = ["Warm-up: contact Jane Doe at jane@example.com or 555 0100."]
+
+
+def get_redactor() -> PIIRedactor:
+    global _redactor
+    with _redactor_lock:
+        if _redactor is None:
+            _redactor = PIIRedactor()
+        return _redactor
+
+
+def redact_many(texts: Sequence[str]) -> RedactionBatch:
+    """Batch entry point; module-level so it can run in a redaction worker process."""
+
+    return get_redactor().redact_many(texts)
+
+
+def warm_up() -> None:
+    """Build the redactor and run one sample through it ahead of the first request.
+
+    With a redaction process pool the engines live in the workers, so the sample is sent
+    there (one per worker; best-effort, the pool decides which worker takes each) and no
+    engine is built in this process.
+    """
+
+    processes = get_settings().redaction_processes
+    if processes > 0:
+        ex = get_redaction_executor()
+        for f in [ex.submit(redact_many, _WARMUP_SAMPLE) for _ in range(processes)]:
+            f.result()
+    else:
+        redact_many(_WARMUP_SAMPLE)
+
+
+def find_spans(text: str) -> list[RedactionSpan]:
+    """Span entry point; module-level so it can run in a redaction worker process."""
+
+    return get_redactor().find_spans(text)
+
+
+def streaming_redactor() -> StreamingRedactor:
+    return StreamingRedactor(find_spans, window=get_settings().stream_redaction_window)
+
+
+def get_redaction_batcher() -> RedactionBatcher:
+    global _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            settings = get_settings()
+            _batcher = RedactionBatcher(
+                redact_many,
+                stats=_stats,
+                max_batch=settings.redaction_batch_max,
+                max_wait_s=settings.redaction_batch_wait_ms / 1000.0,
+            )
+        return _batcher
 
 
 def redact_text(text: str) -> str:
-    return _redactor.redact(text)
+    result = get_redactor().redact_many([text])
+    _stats.record(texts=1, skipped=result.skipped, batches=1, timings=result.timings)
+    return result.texts[0]
+
+
+async def aredact_text(text: str) -> str:
+    """Async redaction, batched with concurrent callers on the redaction executor."""
+
+    return await get_redaction_batcher().redact(text)
+
+
+def redaction_stats() -> dict[str, Any]:
+    return _stats.snapshot()
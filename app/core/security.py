@@ -1,13 +1,19 @@
 from __future__ import annotations
 
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
 from dataclasses import dataclass
-from typing import Annotated
+from typing import Annotated, Any
 
 import jwt
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
-from app.core.config import get_settings
+from app.core.config import Settings
+from app.core.jwks import JwksKeySet
 
 
 @dataclass(frozen=True)
@@ -28,45 +34,190 @@ def _forbidden(detail: str = "Forbidden") -> HTTPException:
     return HTTPException(status_code=403, detail=detail)
 
 
-CredsDep = Annotated[HTTPAuthorizationCredentials | None, Depends(bearer)]
+class _InvalidToken(Exception):
+    def __init__(self, detail: str) -> None:
+        super().__init__(detail)
+        self.detail = detail
 
 
-def get_principal(creds: CredsDep) -> Principal:
-    """Validate JWT and return a Principal.
+class TokenCache:
+    """Bounded LRU of verified principals, keyed by a SHA-256 of the bearer token.
 
-    MVP note:
-      - uses a static shared secret from env (JWT_SECRET)
-      - no JWKS / OIDC / audience enforcement
+    An entry lives until the token's `exp`, and at most `ttl` seconds, so a key removed
+    from the JWKS (or a rotated shared secret) stops being honoured within `ttl`. Raw
+    tokens are never retained.
+    """
 
-    In production: prefer OIDC + JWKS rotation, issuer/audience checks, and tighter claim validation.
+    def __init__(self, max_entries: int = 4096, ttl: float = 300.0) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[bytes, tuple[Principal, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, key: bytes) -> Principal | None:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def put(self, key: bytes, principal: Principal, exp: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        expires = time.time() + self.ttl
+        if isinstance(exp, int | float):
+            expires = min(expires, float(exp))
+        with self._lock:
+            self._entries[key] = (principal, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"hits": self._hits, "misses": self._misses, "entries": len(self._entries)}
+
+
+class TokenVerifier:
+    """Verifies bearer tokens against a shared secret or an OIDC provider's JWKS.
+
+    Built once per app from settings (no per-request settings lookup); verified
+    principals are served from a `TokenCache` until the token expires. In JWKS mode a
+    token must be signed with its key's own algorithm, and that algorithm must be in
+    `jwks_algorithms`; symmetric (HS*) algorithms are refused there, since a published
+    key must never double as an HMAC secret.
     """
 
-    if creds is None or creds.scheme.lower() != "bearer":
-        raise _unauthorized()
+    def __init__(
+        self,
+        *,
+        secret: str,
+        algorithm: str,
+        issuer: str = "",
+        audience: str = "",
+        jwks: JwksKeySet | None = None,
+        jwks_algorithms: Sequence[str] = ("RS256", "ES256"),
+        cache: TokenCache | None = None,
+    ) -> None:
+        if jwks is not None and any(a.upper().startswith("HS") for a in jwks_algorithms):
+            raise ValueError("HS* algorithms cannot be used with a JWKS")
+        self.secret = secret
+        self.algorithms = [algorithm]
+        self.jwks_algorithms = frozenset(jwks_algorithms)
+        self.issuer = issuer or None
+        self.audience = audience or None
+        self.jwks = jwks
+        self.cache = cache or TokenCache(0)
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> TokenVerifier:
+        cache = TokenCache(settings.token_cache_size, settings.token_cache_ttl_seconds)
+        jwks = None
+        if settings.jwt_jwks_url:
+            jwks = JwksKeySet(
+                settings.jwt_jwks_url,
+                refresh_seconds=settings.jwks_refresh_seconds,
+                on_keys_removed=cache.clear,
+            )
+        return cls(
+            secret=settings.jwt_secret,
+            algorithm=settings.jwt_algorithm,
+            issuer=settings.jwt_issuer,
+            audience=settings.jwt_audience,
+            jwks=jwks,
+            jwks_algorithms=settings.jwt_jwks_algorithms_list,
+            cache=cache,
+        )
 
-    settings = get_settings()
+    def _signing_key(self, token: str) -> tuple[Any, list[str]]:
+        """(key, allowed algorithms) for `token`."""
+
+        if self.jwks is None:
+            return self.secret, self.algorithms
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+        except jwt.PyJWTError as e:
+            raise _InvalidToken("Invalid token") from e
+        key = self.jwks.get(str(kid)) if kid else None
+        if key is None:
+            raise _InvalidToken("Unknown signing key")
+        # The JWK's `alg` (or its key type's default), never the token's own claim.
+        if key.algorithm_name not in self.jwks_algorithms:
+            raise _InvalidToken("Signing algorithm not allowed")
+        return key, [key.algorithm_name]
+
+    def verify(self, token: str) -> Principal:
+        key = TokenCache.key(token)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        signing_key, algorithms = self._signing_key(token)
+        try:
+            payload = jwt.decode(
+                token,
+                signing_key,
+                algorithms=algorithms,
+                issuer=self.issuer,
+                audience=self.audience,
+                options={"verify_aud": self.audience is not None},
+            )
+        except jwt.PyJWTError as e:
+            raise _InvalidToken("Invalid token") from e
+
+        sub = str(payload.get("sub", ""))
+        tenant_id = str(payload.get("tenant_id", ""))
+        scopes = payload.get("scopes") or []
+
+        if not sub or not tenant_id:
+            raise _InvalidToken("Missing required claims")
+
+        if not isinstance(scopes, list):
+            scopes = []
+
+        principal = Principal(sub=sub, tenant_id=tenant_id, scopes=[str(s) for s in scopes])
+        self.cache.put(key, principal, payload.get("exp"))
+        return principal
+
+    def close(self) -> None:
+        if self.jwks is not None:
+            self.jwks.close()
 
-    try:
-        payload = jwt.decode(
-            creds.credentials,
-            settings.jwt_secret,
-            algorithms=[settings.jwt_algorithm],
-            options={"verify_aud": False},
-        )
-    except jwt.PyJWTError as e:
-        raise _unauthorized("Invalid token") from e
 
-    sub = str(payload.get("sub", ""))
-    tenant_id = str(payload.get("tenant_id", ""))
-    scopes = payload.get("scopes") or []
+CredsDep = Annotated[HTTPAuthorizationCredentials | None, Depends(bearer)]
+
 
-    if not sub or not tenant_id:
-        raise _unauthorized("Missing required claims")
+def get_principal(request: Request, creds: CredsDep) -> Principal:
+    """Validate the bearer JWT and return a Principal.
 
-    if not isinstance(scopes, list):
-        scopes = []
+    Shared-secret mode (JWT_SECRET) by default; with JWT_JWKS_URL set, tokens are verified
+    against the provider's cached key set, plus issuer/audience when configured.
+    """
 
-    return Principal(sub=sub, tenant_id=tenant_id, scopes=[str(s) for s in scopes])
+    if creds is None or creds.scheme.lower() != "bearer":
+        raise _unauthorized()
+
+    verifier: TokenVerifier = request.app.state.token_verifier
+    try:
+        return verifier.verify(creds.credentials)
+    except _InvalidToken as e:
+        raise _unauthorized(e.detail) from e
 
 
 PrincipalDep = Annotated[Principal, Depends(get_principal)]
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor
+from typing import Any
+
+from app.core.executors import run_in
+
+logger = logging.getLogger(__name__)
+
+
+class Warmup:
+    """Heavy components to build after startup, in order, off the event loop.
+
+    The app starts serving (/health) immediately; /ready reports not-ready until every
+    step has finished, so load balancers only route traffic to warm workers.
+    """
+
+    def __init__(self) -> None:
+        self._steps: list[tuple[str, Callable[[], Any]]] = []
+        self.timings: dict[str, float] = {}
+        self.done = False
+        self.failed: str | None = None
+
+    def add(self, name: str, fn: Callable[[], Any]) -> None:
+        self._steps.append((name, fn))
+
+    @property
+    def ready(self) -> bool:
+        return self.done and self.failed is None
+
+    async def run(self, executor: Executor) -> None:
+        for name, fn in self._steps:
+            t0 = time.perf_counter()
+            try:
+                await run_in(executor, fn)
+            except Exception as e:
+                self.failed = name
+                logger.error(f"Warm-up step '{name}' failed: {type(e).__name__}")
+                return
+            self.timings[name] = time.perf_counter() - t0
+        self.done = True
+        logger.info(f"Warm-up finished: {', '.join(self.timings) or 'nothing to warm'}.")
+
+    def status(self) -> dict[str, Any]:
+        if self.failed is not None:
+            state = "failed"
+        else:
+            state = "ready" if self.done else "warming"
+        out: dict[str, Any] = {"status": state}
+        if self.failed is not None:
+            out["failed_step"] = self.failed
+        out["steps_ms"] = {k: round(v * 1000.0, 1) for k, v in self.timings.items()}
+        return out
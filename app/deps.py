@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import asyncio
+
 from fastapi import Request
 
 from app.rag.pipeline import RagPipeline
@@ -12,3 +14,7 @@ def get_store(request: Request) -> VectorStoreAdapter:
 
 def get_pipeline(request: Request) -> RagPipeline:
     return request.app.state.pipeline
+
+
+def get_chat_limiter(request: Request) -> asyncio.Semaphore:
+    return request.app.state.chat_limiter
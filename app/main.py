@@ -1,27 +1,157 @@
 from __future__ import annotations
 
+import asyncio
+import time
 import uuid
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.routes_chat import router as chat_router
+from app.api.routes_documents import router as documents_router
 from app.api.routes_health import router as health_router
 from app.api.routes_ingest import router as ingest_router
+from app.api.routes_metrics import router as metrics_router
+from app.core import redaction
 from app.core.config import get_settings
-from app.core.logging import configure_logging, get_logger
+from app.core.executors import get_cpu_executor, shutdown_executors
+from app.core.logging import configure_logging, dropped_log_records, get_logger
+from app.core.metrics import MetricsRegistry
+from app.core.security import TokenVerifier
+from app.core.warmup import Warmup
+from app.rag import filters
+from app.rag.answer_cache import AnswerCache
 from app.rag.pipeline import RagPipeline
-from app.store.vector import InMemoryVectorStore, VectorStoreAdapter
+from app.store.embeddings import CachedEmbeddingProvider, EmbeddingProvider
+from app.store.factory import build_settings_embedder, build_store
+from app.store.instrumented import InstrumentedVectorStore
+from app.store.vector import VectorStoreAdapter
+
+
+def _build_store(
+    settings, embedder: EmbeddingProvider, metrics: MetricsRegistry | None
+) -> VectorStoreAdapter:
+    # MVP: in-memory store by default; see app.store.factory for the backends.
+    store = build_store(settings, embedder=embedder)
+    return InstrumentedVectorStore(store, metrics) if metrics is not None else store
+
+
+def _build_answer_cache(settings, embedder: EmbeddingProvider) -> AnswerCache | None:
+    if settings.answer_cache_max_entries <= 0:
+        return None
+    return AnswerCache(
+        max_entries=settings.answer_cache_max_entries,
+        max_bytes=int(settings.answer_cache_max_mb * 1024 * 1024),
+        ttl_s=settings.answer_cache_ttl_s,
+        similarity=settings.answer_cache_similarity,
+        embed=embedder.embed_query,
+    )
 
 
-def _build_store(settings) -> VectorStoreAdapter:
-    # MVP: use in-memory store by default.
-    # Future: switch by settings.vector_backend.
-    return InMemoryVectorStore()
+def _build_pipeline(
+    store: VectorStoreAdapter,
+    settings,
+    embedder: EmbeddingProvider,
+    metrics: MetricsRegistry | None,
+) -> RagPipeline:
+    return RagPipeline(store=store, cache=_build_answer_cache(settings, embedder), metrics=metrics)
+
+
+def _register_stats(
+    metrics: MetricsRegistry,
+    pipeline: RagPipeline,
+    embedder: EmbeddingProvider,
+    verifier: TokenVerifier,
+) -> None:
+    """Expose stats the components already keep, read at scrape time."""
+
+    metrics.register_func(
+        "counter",
+        "rag_token_cache_lookups_total",
+        "Verified-token cache lookups by result.",
+        lambda: {(k,): verifier.cache.stats()[k] for k in ("hits", "misses")},
+        ["result"],
+    )
 
+    metrics.register_func(
+        "counter",
+        "rag_log_records_dropped_total",
+        "Log records dropped because the log queue was full.",
+        lambda: {(): dropped_log_records()},
+    )
 
-def _build_pipeline(store: VectorStoreAdapter) -> RagPipeline:
-    return RagPipeline(store=store)
+    for key, help in (
+        ("texts", "Texts passed through redaction."),
+        ("skipped", "Texts that skipped NLP redaction (no PII candidates)."),
+        ("batches", "Batched NLP redaction passes."),
+    ):
+        metrics.register_func(
+            "counter",
+            f"rag_redaction_{key}_total",
+            help,
+            lambda key=key: {(): redaction.redaction_stats()[key]},
+        )
+    metrics.register_func(
+        "counter",
+        "rag_redaction_stage_seconds_total",
+        "Cumulative seconds per redaction stage.",
+        lambda: {(k,): v for k, v in redaction.redaction_stats()["stage_seconds"].items()},
+        ["stage"],
+    )
+
+    cache = pipeline.cache
+    if cache is not None:
+        metrics.register_func(
+            "counter",
+            "rag_answer_cache_lookups_total",
+            "Answer cache lookups by result.",
+            lambda: {(k,): cache.stats()[k] for k in ("hits", "similar_hits", "misses")},
+            ["result"],
+        )
+        metrics.register_func(
+            "counter",
+            "rag_answer_cache_evictions_total",
+            "Answer cache entries evicted (size limits or corpus changes).",
+            lambda: {(): cache.stats()["evictions"]},
+        )
+        metrics.register_func(
+            "gauge",
+            "rag_answer_cache_entries",
+            "Entries held by the answer cache.",
+            lambda: {(): cache.stats()["entries"]},
+        )
+        metrics.register_func(
+            "gauge",
+            "rag_answer_cache_bytes",
+            "Approximate bytes held by the answer cache.",
+            lambda: {(): cache.stats()["bytes"]},
+        )
+
+    if isinstance(embedder, CachedEmbeddingProvider):
+        metrics.register_func(
+            "counter",
+            "rag_query_embedding_cache_lookups_total",
+            "Query embedding LRU lookups by result.",
+            lambda: {(k,): embedder.stats()[k] for k in ("hits", "misses")},
+            ["result"],
+        )
+        metrics.register_func(
+            "gauge",
+            "rag_query_embedding_cache_entries",
+            "Vectors held by the query embedding LRU.",
+            lambda: {(): embedder.stats()["entries"]},
+        )
+
+
+def _build_warmup(verifier: TokenVerifier) -> Warmup:
+    # Heavy engines are built lazily; warm them in the background after startup.
+    warmup = Warmup()
+    if verifier.jwks is not None:
+        warmup.add("jwks", verifier.jwks.start)
+    warmup.add("prompt_guard", filters.warm_up)
+    warmup.add("redaction", redaction.warm_up)
+    return warmup
 
 
 def create_app() -> FastAPI:
@@ -34,9 +164,17 @@ def create_app() -> FastAPI:
     """
 
     settings = get_settings()
-    configure_logging(settings.log_level)
+    configure_logging(settings.log_level, queue_size=settings.log_queue_size)
 
-    app = FastAPI(title=settings.app_name)
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        warming = asyncio.create_task(app.state.warmup.run(get_cpu_executor()))
+        yield
+        warming.cancel()
+        app.state.token_verifier.close()
+        shutdown_executors()
+
+    app = FastAPI(title=settings.app_name, lifespan=lifespan)
 
     # CORS for demos; tighten for production.
     app.add_middleware(
@@ -47,9 +185,23 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
-    # State (single-process). For multi-worker, use a real store backend.
-    app.state.store = _build_store(settings)
-    app.state.pipeline = _build_pipeline(app.state.store)
+    # State is per-process. For `uvicorn --workers N`, run `python -m app.store.server`
+    # and set VECTOR_BACKEND=remote so every worker shares one store.
+    app.state.token_verifier = TokenVerifier.from_settings(settings)
+    metrics = MetricsRegistry() if settings.metrics_enabled else None
+    app.state.metrics = metrics
+    app.state.embedder = build_settings_embedder(settings)
+    app.state.store = _build_store(settings, app.state.embedder, metrics)
+    app.state.pipeline = _build_pipeline(app.state.store, settings, app.state.embedder, metrics)
+    if metrics is not None:
+        _register_stats(metrics, app.state.pipeline, app.state.embedder, app.state.token_verifier)
+        http_seconds = metrics.histogram(
+            "http_request_duration_seconds",
+            "HTTP request latency by route template.",
+            ["method", "route", "status"],
+        )
+    app.state.chat_limiter = asyncio.Semaphore(settings.chat_max_concurrency)
+    app.state.warmup = _build_warmup(app.state.token_verifier)
 
     logger = get_logger(__name__)
 
@@ -58,7 +210,16 @@ def create_app() -> FastAPI:
         request_id = request.headers.get("X-Request-Id") or uuid.uuid4().hex
         request.state.request_id = request_id
 
+        started = time.perf_counter()
         response = await call_next(request)
+        if metrics is not None:
+            # Route templates, not raw paths, keep label cardinality bounded.
+            route = request.scope.get("route")
+            http_seconds.labels(
+                request.method,
+                getattr(route, "path", "unmatched"),
+                str(response.status_code),
+            ).observe(time.perf_counter() - started)
 
         # Minimal access log without prompts/body
         logger.info(
@@ -77,5 +238,7 @@ def create_app() -> FastAPI:
     app.include_router(health_router)
     app.include_router(chat_router)
     app.include_router(ingest_router)
+    app.include_router(documents_router)
+    app.include_router(metrics_router)
 
     return app
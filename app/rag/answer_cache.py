@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from app.store.metadata import ChatResponse
+
+# Rough per-entry overhead (key, entry object, dict slots) added to the response size.
+_ENTRY_OVERHEAD_BYTES = 256
+
+
+def normalize_question(question: str) -> str:
+    """Cache key form of a question: case-, whitespace- and end-punctuation-insensitive."""
+
+    return " ".join(question.casefold().split()).rstrip(" ?!.")
+
+
+@dataclass
+class _Entry:
+    response: ChatResponse
+    generation: str
+    expires_at: float
+    size: int
+    vector: np.ndarray | None
+
+
+class AnswerCache:
+    """Per-tenant cache of final (guarded, redacted) chat responses.
+
+    Entries are keyed by (tenant_id, normalized question) and tagged with a generation
+    (the tenant's corpus version plus the retrieval-guard version), so any ingest for the
+    tenant, or a ruleset/allowlist change, makes its older answers unreachable. Eviction
+    is LRU under an entry and a byte budget, plus a TTL.
+
+    With `similarity` > 0 and an `embed` function, an exact miss falls back to the most
+    similar cached question of the same tenant (cosine >= `similarity`). Lookups never
+    look at another tenant's entries.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_s: float = 300.0,
+        similarity: float = 0.0,
+        embed: Callable[[str], np.ndarray] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self.similarity = similarity
+        self._embed = embed if similarity > 0 else None
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple[str, str], _Entry] = OrderedDict()
+        self._by_tenant: dict[str, set[str]] = {}
+        self._generation: dict[str, str] = {}
+        self._bytes = 0
+        self._hits = 0
+        self._similar_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, tenant_id: str, question: str, *, generation: str) -> ChatResponse | None:
+        key = (tenant_id, normalize_question(question))
+        now = self._clock()
+        with self._lock:
+            self._observe_generation(tenant_id, generation)
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return entry.response
+                self._remove(key)
+            if self._embed is None or not self._by_tenant.get(tenant_id):
+                self._misses += 1
+                return None
+
+        vec = self._embed(key[1])
+        with self._lock:
+            found = self._nearest(tenant_id, vec, now)
+            if found is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(found)
+            self._similar_hits += 1
+            return self._entries[found].response
+
+    def put(
+        self, tenant_id: str, question: str, response: ChatResponse, *, generation: str
+    ) -> None:
+        key = (tenant_id, normalize_question(question))
+        size = len(response.model_dump_json()) + _ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+        vec = self._embed(key[1]) if self._embed is not None else None
+        entry = _Entry(response, generation, self._clock() + self.ttl_s, size, vec)
+        with self._lock:
+            # Only lookups advance a tenant's generation. An answer computed against an
+            # older corpus (a slow request racing an ingest) is dropped here, and must not
+            # roll the tenant back to that generation.
+            if self._generation.get(tenant_id) != generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._by_tenant.setdefault(tenant_id, set()).add(key[1])
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "similar_hits": self._similar_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    def _observe_generation(self, tenant_id: str, generation: str) -> None:
+        # A new generation for a tenant (ingest, guard change) drops all its entries now,
+        # instead of leaving them to age out of the LRU.
+        known = self._generation.get(tenant_id)
+        if known == generation:
+            return
+        if known is not None:
+            for norm in list(self._by_tenant.get(tenant_id, ())):
+                self._remove((tenant_id, norm))
+        self._generation[tenant_id] = generation
+
+    def _nearest(self, tenant_id: str, vec: np.ndarray, now: float) -> tuple[str, str] | None:
+        best, best_score = None, self.similarity
+        for norm in self._by_tenant.get(tenant_id, ()):
+            entry = self._entries[(tenant_id, norm)]
+            if entry.vector is None or entry.expires_at <= now:
+                continue
+            score = float(entry.vector @ vec)
+            if score >= best_score:
+                best, best_score = (tenant_id, norm), score
+        return best
+
+    def _remove(self, key: tuple[str, str]) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        norms = self._by_tenant.get(key[0])
+        if norms is not None:
+            norms.discard(key[1])
+            if not norms:
+                del self._by_tenant[key[0]]
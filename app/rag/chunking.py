@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import codecs
+import re
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator
+
+# Sentence end: terminal punctuation, optional closing quotes/brackets, then whitespace.
+_SENTENCE_END = re.compile(r"[.!?…][\"')\]]*\s")
+_NEWLINE = re.compile(r"\n")
+_SPACE = re.compile(r"\s")
+
+
+def _last_end(pattern: re.Pattern[str], text: str, start: int, end: int) -> int:
+    """End offset of the last match of `pattern` in text[start:end], or -1."""
+
+    last = -1
+    for m in pattern.finditer(text, start, end):
+        last = m.end()
+    return last
+
+
+class Chunker:
+    """Incremental text chunker, one instance per document.
+
+    Text is fed in pieces of any size (a decoded request body, a file read in blocks) and
+    only the current window is kept, so memory does not grow with the document. Each
+    chunk is at most `max_chars` characters and ends at the best boundary in its second
+    half: a paragraph break, then a sentence end, then a line break, then any whitespace.
+    A run without whitespace (a very long token or line) is cut hard at `max_chars`.
+    Consecutive chunks share about `overlap` characters, starting at a word boundary.
+    """
+
+    def __init__(self, *, max_chars: int = 900, overlap: int = 0) -> None:
+        if max_chars < 2:
+            raise ValueError("max_chars must be at least 2")
+        if not 0 <= overlap < max_chars // 2:
+            raise ValueError("overlap must be in [0, max_chars / 2)")
+        self.max_chars = max_chars
+        self.overlap = overlap
+        self._min_cut = max_chars // 2
+        self._buf = ""
+
+    def feed(self, text: str) -> list[str]:
+        """Add text; returns the chunks that are now complete."""
+
+        self._buf += text
+        out: list[str] = []
+        pos = 0
+        # A boundary is only final once the window after `pos` is full.
+        while len(self._buf) - pos > self.max_chars:
+            cut = self._cut(pos)
+            chunk = self._buf[pos:cut].strip()
+            if chunk:
+                out.append(chunk)
+            pos = self._next_start(cut)
+        self._buf = self._buf[pos:]
+        return out
+
+    def flush(self) -> list[str]:
+        """End of document: the remaining text as final chunk(s)."""
+
+        out = self.feed("")
+        tail, self._buf = self._buf.strip(), ""
+        if tail:
+            out.append(tail)
+        return out
+
+    def _cut(self, pos: int) -> int:
+        buf, lo, hi = self._buf, pos + self._min_cut, pos + self.max_chars
+        para = buf.rfind("\n\n", lo, hi)
+        if para >= 0:
+            return para + 2
+        for pattern in (_SENTENCE_END, _NEWLINE, _SPACE):
+            end = _last_end(pattern, buf, lo, hi)
+            if end >= 0:
+                return end
+        return hi
+
+    def _next_start(self, cut: int) -> int:
+        if not self.overlap:
+            return cut
+        start = cut - self.overlap
+        # Start the overlap at a word, not inside one.
+        m = _SPACE.search(self._buf, start, cut)
+        return m.end() if m else cut
+
+
+def iter_chunks(pieces: Iterable[str], *, max_chars: int = 900, overlap: int = 0) -> Iterator[str]:
+    """Chunks of a document given as text pieces, e.g. `iter(lambda: fh.read(65536), "")`."""
+
+    chunker = Chunker(max_chars=max_chars, overlap=overlap)
+    for piece in pieces:
+        yield from chunker.feed(piece)
+    yield from chunker.flush()
+
+
+async def aiter_chunks(
+    pieces: AsyncIterable[str], *, max_chars: int = 900, overlap: int = 0
+) -> AsyncIterator[str]:
+    chunker = Chunker(max_chars=max_chars, overlap=overlap)
+    async for piece in pieces:
+        for chunk in chunker.feed(piece):
+            yield chunk
+    for chunk in chunker.flush():
+        yield chunk
+
+
+async def adecode_utf8(body: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream incrementally (multi-byte characters may span pieces).
+
+    Raises UnicodeDecodeError on invalid UTF-8.
+    """
+
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    async for part in body:
+        text = decoder.decode(part)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import hashlib
 import logging
+import operator
 import re
+from collections.abc import Sequence
 from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
@@ -14,6 +17,70 @@ class FilterResult:
     confidence: float = 1.0
 
 
+@dataclass(frozen=True)
+class GuardRule:
+    """A heuristic rule: a case-insensitive regex plus the literals it cannot match without.
+
+    `anchors` are lowercase substrings, at least one of which occurs in any text the
+    pattern matches. They let the engine skip the regex entirely for most inputs.
+    """
+
+    name: str
+    pattern: str
+    anchors: tuple[str, ...]
+
+
+# Non-ASCII characters that `re.IGNORECASE` equates with ASCII letters but that
+# str.lower() does not map to them. Folding them keeps the anchor prefilter a superset
+# of what the regexes match (no case-folding bypass).
+_IGNORECASE_FOLD = str.maketrans({"\u0130": "i", "\u0131": "i", "\u017f": "s", "\u212a": "k"})
+
+
+class GuardEngine:
+    """Compiled heuristic rule set with bounded, single-pass cost per rule.
+
+    The input is case-folded once; each rule's anchors are checked with C-speed substring
+    search and its regex only runs when an anchor is present. (CPython's `re` evaluates a
+    large alternation branch by branch at every position, which measured slower than
+    this.) Repetition is a linear token scan instead of a backreference regex. Rules are
+    reported in declaration order, which is also their priority.
+    """
+
+    _WORD = re.compile(r"\w+")
+    _RUN_BYTE = b"\x01"
+
+    def __init__(self, rules: Sequence[GuardRule], *, max_repeats: int) -> None:
+        for rule in rules:
+            if not rule.anchors or any(a != a.lower() for a in rule.anchors):
+                raise ValueError(f"rule {rule.name} needs lowercase anchors")
+        self.rules = tuple(rules)
+        self.max_repeats = max_repeats
+        self._compiled = tuple(
+            (rule.name, rule.anchors, re.compile(rule.pattern, re.IGNORECASE))
+            for rule in self.rules
+        )
+
+    def match(self, text: str) -> str | None:
+        """Name of the first rule (in priority order) that fires, or None."""
+
+        folded = text.translate(_IGNORECASE_FOLD).lower()
+        for name, anchors, regex in self._compiled:
+            if any(a in folded for a in anchors) and regex.search(text):
+                return name
+        if self._has_repetition(text):
+            return "token_repetition"
+        return None
+
+    def _has_repetition(self, text: str) -> bool:
+        # Same semantics as (\b\w+\b)(?:\W+\1\b){N,}: a word followed by N identical
+        # words. Adjacent-equality flags become a byte string so the run search is in C.
+        words = self._WORD.findall(text)
+        if len(words) <= self.max_repeats:
+            return False
+        same = bytes(map(operator.eq, words, words[1:]))
+        return self._RUN_BYTE * self.max_repeats in same
+
+
 class PromptGuard:
     """
     Enterprise-grade Prompt Injection Defender.
@@ -23,19 +90,37 @@ class PromptGuard:
     3. Semantic/Model Layer (Placeholder for llm-guard or Azure AI Content Safety)
     """
 
-    # Layer 1: Enhanced heuristic blocks (Fast fail)
-    SUSPICIOUS_PATTERNS = (
-        re.compile(r"(?i)(ignore|disregard|forget)\s+(all|any|previous)\s+(instructions|prompts)"),
-        re.compile(
-            r"(?i)(reveal|print|show)\s+(the\s+)?(system\s+prompt|developer\s+message|hidden\s+instructions)"
+    # Layer 1: Enhanced heuristic blocks (Fast fail), matched case-insensitively.
+    HEURISTIC_RULES = (
+        GuardRule(
+            "instruction_override",
+            r"(ignore|disregard|forget)\s+(all|any|previous)\s+(instructions|prompts)",
+            ("ignore", "disregard", "forget"),
+        ),
+        GuardRule(
+            "prompt_disclosure",
+            r"(reveal|print|show)\s+(the\s+)?"
+            r"(system\s+prompt|developer\s+message|hidden\s+instructions)",
+            ("reveal", "print", "show"),
+        ),
+        GuardRule(
+            "exfiltration_intent",
+            r"exfiltrate|leak|steal|bypass|jailbreak|dan\s+mode",
+            ("exfiltrate", "leak", "steal", "bypass", "jailbreak", "dan"),
+        ),
+        # Blocks role-playing injection
+        GuardRule(
+            "role_injection", r"system:|user:|assistant:", ("system:", "user:", "assistant:")
         ),
-        re.compile(r"(?i)(exfiltrate|leak|steal|bypass|jailbreak|dan\s+mode)"),
-        re.compile(r"(?i)system:\s*|user:\s*|assistant:\s*"),  # Blocks role-playing injection
-        re.compile(r"(\b\w+\b)(?:\W+\1\b){10,}"),  # Blocks token-smuggling via extreme repetition
     )
+    MAX_REPEATS = 10  # Blocks token-smuggling via extreme repetition
+
+    ENGINE = GuardEngine(HEURISTIC_RULES, max_repeats=MAX_REPEATS)
 
     MAX_PROMPT_LENGTH = 2000  # Enforce boundary to prevent context window attacks
 
+    SEMANTIC_TRICKS = ("base64", "hex", "translate to")
+
     @classmethod
     def check_prompt_injection(cls, text: str) -> FilterResult:
         if not text or not text.strip():
@@ -47,13 +132,11 @@ class PromptGuard:
             logger.warning(f"PromptGuard: Blocked oversized prompt ({len(text)} chars).")
             return FilterResult(ok=False, reason="prompt_too_long", confidence=1.0)
 
-        # 2. Fast Heuristic Check
-        for pat in cls.SUSPICIOUS_PATTERNS:
-            if pat.search(text):
-                logger.warning(f"PromptGuard: Heuristic match blocked -> {pat.pattern}")
-                return FilterResult(
-                    ok=False, reason=f"heuristic_match:{pat.pattern}", confidence=0.95
-                )
+        # 2. Fast Heuristic Check (anchor prefilter, then the matching rules only)
+        rule = cls.ENGINE.match(text)
+        if rule is not None:
+            logger.warning(f"PromptGuard: Heuristic match blocked -> {rule}")
+            return FilterResult(ok=False, reason=f"heuristic_match:{rule}", confidence=0.95)
 
         # 3. Semantic / External API Check (Architecture Ready)
         # In a real prod env, we would call: ProtectAI/llm-guard or Azure Prompt Shields here.
@@ -70,9 +153,8 @@ class PromptGuard:
         Shows architectural maturity for plugging in tools like 'llm-guard'.
         """
         # Example of a semantic block that regex might miss:
-        encoded_or_tricky = ["base64", "hex", "translate to"]
         if (
-            any(trick in text.lower() for trick in encoded_or_tricky)
+            any(trick in text.lower() for trick in cls.SEMANTIC_TRICKS)
             and "system prompt" in text.lower()
         ):
             logger.warning("PromptGuard: Semantic anomaly detected (Evade attempt).")
@@ -81,6 +163,33 @@ class PromptGuard:
         return FilterResult(ok=True)
 
 
+# Bump when the check logic changes in a way the rule data below does not capture.
+_LOGIC_REVISION = 1
+
+
+def _ruleset_version() -> str:
+    spec = repr(
+        (
+            _LOGIC_REVISION,
+            PromptGuard.HEURISTIC_RULES,
+            PromptGuard.MAX_REPEATS,
+            PromptGuard.MAX_PROMPT_LENGTH,
+            PromptGuard.SEMANTIC_TRICKS,
+        )
+    )
+    return hashlib.blake2s(spec.encode("utf-8"), digest_size=8).hexdigest()
+
+
+# Verdicts stored with a different version were computed by other rules and are stale.
+RULESET_VERSION = _ruleset_version()
+
+
 # Interface for the rest of the application
 def check_prompt_injection(text: str) -> FilterResult:
     return PromptGuard.check_prompt_injection(text)
+
+
+def warm_up() -> None:
+    """Exercise every guard layer once; the hook for loading model-based scanners."""
+
+    check_prompt_injection("Warm-up: what is our key rotation policy?")
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
+import hashlib
 from collections.abc import Iterable
 
 from app.core.config import get_settings
-from app.rag.filters import check_prompt_injection
+from app.rag.filters import RULESET_VERSION, check_prompt_injection
+from app.store.metadata import DocumentChunk, MetadataFilter
 
 
 def deny_by_default_user_prompt(question: str, *, max_chars: int) -> None:
@@ -23,21 +25,64 @@ def allowlisted_source(source: str) -> bool:
     return source.strip() in allow
 
 
-def filter_retrieved_chunks(chunks: Iterable[tuple[str, str]]) -> list[tuple[str, str]]:
-    """Remove obviously malicious retrieved content.
+def allowlist_filter() -> MetadataFilter | None:
+    """The source allowlist as a store pre-filter (None when every source is allowed).
 
-    chunks: iterable of (source, text)
+    Pushed into retrieval so non-allowlisted chunks never take top_k slots; the
+    retrieved-chunk guard still checks every hit afterwards.
     """
 
-    safe: list[tuple[str, str]] = []
+    allow = get_settings().allowlist_sources_list
+    return MetadataFilter(sources=frozenset(allow)) if allow else None
 
-    for source, text in chunks:
-        if not allowlisted_source(source):
-            continue
 
-        # If the retrieved chunk looks like an instruction to override behavior, drop it.
-        res = check_prompt_injection(text)
-        if res.ok:
-            safe.append((source, text))
+def guard_version() -> str:
+    """Version of the retrieved-chunk guard: the injection ruleset plus the allowlist."""
 
-    return safe
+    allow = ",".join(sorted(get_settings().allowlist_sources_list))
+    spec = f"{RULESET_VERSION}|{allow}".encode()
+    return hashlib.blake2s(spec, digest_size=8).hexdigest()
+
+
+def stamp_guard_verdict(chunk: DocumentChunk, *, version: str | None = None) -> bool:
+    """Run the guard on a chunk and record the verdict in its metadata."""
+
+    meta = chunk.metadata
+    meta.guard_ok = allowlisted_source(meta.source) and check_prompt_injection(chunk.text).ok
+    meta.guard_version = version or guard_version()
+    return meta.guard_ok
+
+
+def cached_guard_verdict(chunk: DocumentChunk, *, version: str) -> bool:
+    """Stored verdict when it was computed by this guard version, else a fresh one."""
+
+    meta = chunk.metadata
+    if meta.guard_ok is not None and meta.guard_version == version:
+        return meta.guard_ok
+    return stamp_guard_verdict(chunk, version=version)
+
+
+def retrieved_chunk_verdicts(
+    chunks: Iterable[DocumentChunk], *, restamped: list[DocumentChunk] | None = None
+) -> dict[str, bool]:
+    """Guard verdict per retrieved chunk, keyed by chunk_id.
+
+    Verdicts are computed once at ingest; a chunk is only rescanned when the ruleset or
+    allowlist changed since (its guard_version no longer matches). Rescanned chunks are
+    appended to `restamped`, for the store to keep their new verdicts.
+    """
+
+    version = guard_version()
+    out: dict[str, bool] = {}
+    for c in chunks:
+        if restamped is not None and c.metadata.guard_version != version:
+            restamped.append(c)
+        out[c.metadata.chunk_id] = cached_guard_verdict(c, version=version)
+    return out
+
+
+def filter_retrieved_chunks(chunks: Iterable[DocumentChunk]) -> list[DocumentChunk]:
+    """Remove obviously malicious or non-allowlisted retrieved content."""
+
+    version = guard_version()
+    return [c for c in chunks if cached_guard_verdict(c, version=version)]
@@ -1,37 +1,198 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import re
+from collections.abc import AsyncIterator, Iterator
+from contextlib import AbstractContextManager, nullcontext
+from dataclasses import dataclass, field
 
 from app.core.config import get_settings
-from app.core.redaction import redact_text
+from app.core.executors import get_cpu_executor, run_in
+from app.core.metrics import MetricsRegistry
+from app.core.redaction import aredact_text, redact_text, streaming_redactor
+from app.rag.answer_cache import AnswerCache
 from app.rag.citations import build_evidence
-from app.rag.guardrails import deny_by_default_user_prompt, filter_retrieved_chunks
-from app.rag.retrieval import retrieve
-from app.store.metadata import ChatResponse, Evidence
+from app.rag.guardrails import (
+    allowlist_filter,
+    deny_by_default_user_prompt,
+    guard_version,
+    retrieved_chunk_verdicts,
+)
+from app.rag.retrieval import aretrieve, retrieve
+from app.store.metadata import ChatResponse, DocumentChunk, Evidence
 from app.store.vector import VectorStoreAdapter
 
+# Mock LLM "tokens": each word with its leading whitespace.
+_MOCK_TOKEN = re.compile(r"\s*\S+|\s+")
+
+STAGES = ("prompt_guard", "answer_cache", "retrieval", "chunk_filter", "llm", "redaction")
+
 
 @dataclass
 class RagPipeline:
     store: VectorStoreAdapter
+    cache: AnswerCache | None = field(default=None)
+    metrics: MetricsRegistry | None = field(default=None)
+
+    def __post_init__(self) -> None:
+        self._timers = {}
+        if self.metrics is not None:
+            seconds = self.metrics.histogram(
+                "rag_stage_seconds", "Latency of each /chat pipeline stage.", ["stage"]
+            )
+            self._timers = {stage: seconds.labels(stage) for stage in STAGES}
+
+    def _stage(self, name: str) -> AbstractContextManager[None]:
+        timer = self._timers.get(name)
+        return timer.time() if timer is not None else nullcontext()
 
     def answer(self, *, tenant_id: str, question: str) -> ChatResponse:
         settings = get_settings()
 
-        # 1) User prompt gate
-        deny_by_default_user_prompt(question, max_chars=settings.max_prompt_chars)
+        # 1) User prompt gate (also in front of the answer cache)
+        with self._stage("prompt_guard"):
+            deny_by_default_user_prompt(question, max_chars=settings.max_prompt_chars)
+
+        with self._stage("answer_cache"):
+            generation, cached = self._cache_lookup(tenant_id, question)
+        if cached is not None:
+            return cached
 
         # 2) Retrieval (tenant-bound)
-        hits = retrieve(self.store, tenant_id=tenant_id, query=question, top_k=settings.top_k)
+        with self._stage("retrieval"):
+            hits = retrieve(
+                self.store,
+                tenant_id=tenant_id,
+                query=question,
+                top_k=settings.top_k,
+                mode=settings.retrieval_mode,
+                where=allowlist_filter(),
+            )
+
+        # 3) Drop malicious retrieved chunks (the allowlist was already pushed into retrieval,
+        #    and is re-checked here against chunks stamped by an older guard)
+        with self._stage("chunk_filter"):
+            safe_evidence, safe_context = self._select_safe(tenant_id, hits)
+
+        # 4) Assemble answer (mock LLM for MVP)
+        # IMPORTANT: redact before any output or logging.
+        with self._stage("llm"):
+            answer = self._mock_llm_answer(question=question, context=safe_context)
+        with self._stage("redaction"):
+            answer = redact_text(answer)
+
+        response = ChatResponse(tenant_id=tenant_id, answer=answer, evidence=safe_evidence)
+        self._cache_store(tenant_id, question, response, generation)
+        return response
+
+    async def aanswer(self, *, tenant_id: str, question: str) -> ChatResponse:
+        """Async twin of `answer`: same stages, CPU-heavy ones run on executors."""
+
+        settings = get_settings()
+        cpu = get_cpu_executor()
+
+        # Async stages are timed end to end, including the wait for an executor slot.
+        with self._stage("prompt_guard"):
+            await run_in(
+                cpu, deny_by_default_user_prompt, question, max_chars=settings.max_prompt_chars
+            )
+
+        with self._stage("answer_cache"):
+            generation, cached = await run_in(cpu, self._cache_lookup, tenant_id, question)
+        if cached is not None:
+            return cached
+
+        safe_evidence, safe_context = await self._aretrieve_safe(tenant_id, question)
+
+        with self._stage("llm"):
+            answer = self._mock_llm_answer(question=question, context=safe_context)
+        # Batched with concurrent answers into one pass on the redaction pool.
+        with self._stage("redaction"):
+            answer = await aredact_text(answer)
+
+        response = ChatResponse(tenant_id=tenant_id, answer=answer, evidence=safe_evidence)
+        self._cache_store(tenant_id, question, response, generation)
+        return response
 
-        # 3) Drop malicious retrieved chunks + enforce allowlist boundaries
-        safe_pairs = filter_retrieved_chunks([(h.metadata.source, h.text) for h, _ in hits])
+    async def aprepare(self, *, tenant_id: str, question: str) -> tuple[list[Evidence], list[str]]:
+        """Prompt gate, retrieval and retrieved-chunk guard: (evidence, context).
 
-        # Align safe_pairs back to original hits for evidence building
+        Raises ValueError for blocked prompts, before anything is generated.
+        """
+
+        settings = get_settings()
+
+        with self._stage("prompt_guard"):
+            await run_in(
+                get_cpu_executor(),
+                deny_by_default_user_prompt,
+                question,
+                max_chars=settings.max_prompt_chars,
+            )
+
+        return await self._aretrieve_safe(tenant_id, question)
+
+    async def _aretrieve_safe(
+        self, tenant_id: str, question: str
+    ) -> tuple[list[Evidence], list[str]]:
+        settings = get_settings()
+        with self._stage("retrieval"):
+            hits = await aretrieve(
+                self.store,
+                tenant_id=tenant_id,
+                query=question,
+                top_k=settings.top_k,
+                mode=settings.retrieval_mode,
+                where=allowlist_filter(),
+            )
+        with self._stage("chunk_filter"):
+            return await run_in(get_cpu_executor(), self._select_safe, tenant_id, hits)
+
+    async def astream_answer(self, *, question: str, context: list[str]) -> AsyncIterator[str]:
+        """Redacted answer text as the model generates it.
+
+        Tokens go through a StreamingRedactor, which holds back the tail of the stream so
+        PII split across tokens is still caught before anything is yielded.
+        """
+
+        redactor = streaming_redactor()
+        for token in self._mock_llm_tokens(question=question, context=context):
+            delta = await redactor.feed(token)
+            if delta:
+                yield delta
+        tail = await redactor.flush()
+        if tail:
+            yield tail
+
+    def _cache_lookup(self, tenant_id: str, question: str) -> tuple[str, ChatResponse | None]:
+        """(generation, cached response). The generation is read before retrieval, so an
+        ingest that lands mid-request makes the fresh answer uncacheable, never stale."""
+
+        if self.cache is None:
+            return "", None
+        generation = f"{self.store.corpus_version(tenant_id)}/{guard_version()}"
+        return generation, self.cache.get(tenant_id, question, generation=generation)
+
+    def _cache_store(
+        self, tenant_id: str, question: str, response: ChatResponse, generation: str
+    ) -> None:
+        if self.cache is not None:
+            self.cache.put(tenant_id, question, response, generation=generation)
+
+    def _select_safe(
+        self, tenant_id: str, hits: list[tuple[DocumentChunk, float]]
+    ) -> tuple[list[Evidence], list[str]]:
+        restamped: list[DocumentChunk] = []
+        verdicts = retrieved_chunk_verdicts((h for h, _ in hits), restamped=restamped)
+        if restamped:
+            # Hits may be copies: write the fresh verdicts back so each chunk is rescanned
+            # once per guard version, not on every query.
+            self.store.set_guard_verdicts(tenant_id, restamped)
+
+        # One pass over the hits, in rank order; verdicts are looked up by chunk_id.
         safe_evidence: list[Evidence] = []
         safe_context: list[str] = []
         for chunk, score in hits:
-            if (chunk.metadata.source, chunk.text) not in safe_pairs:
+            if not verdicts[chunk.metadata.chunk_id]:
                 continue
             safe_evidence.append(
                 build_evidence(
@@ -44,14 +205,15 @@ class RagPipeline:
             )
             safe_context.append(chunk.text)
 
-        # 4) Assemble answer (mock LLM for MVP)
-        # IMPORTANT: redact before any output or logging.
-        answer = self._mock_llm_answer(question=question, context=safe_context)
-        answer = redact_text(answer)
-
-        return ChatResponse(tenant_id=tenant_id, answer=answer, evidence=safe_evidence)
+        return safe_evidence, safe_context
 
     def _mock_llm_answer(self, *, question: str, context: list[str]) -> str:
+        return "".join(self._mock_llm_tokens(question=question, context=context))
+
+    def _mock_llm_tokens(self, *, question: str, context: list[str]) -> Iterator[str]:
+        yield from _MOCK_TOKEN.findall(self._mock_llm_text(question=question, context=context))
+
+    def _mock_llm_text(self, *, question: str, context: list[str]) -> str:
         if not context:
             return (
                 "I don't have enough tenant-scoped evidence to answer safely. "
@@ -1,8 +1,38 @@
 from __future__ import annotations
 
-from app.store.metadata import DocumentChunk
+import asyncio
+from collections.abc import Sequence
+
+from app.store.metadata import DocumentChunk, MetadataFilter
 from app.store.vector import VectorStoreAdapter
 
+RETRIEVAL_MODES = ("vector", "lexical", "hybrid")
+
+# Reciprocal-rank fusion constant (Cormack et al.): damps the head of each ranking.
+RRF_K = 60
+
+# Hybrid mode: candidates taken from each ranking before fusion, per requested hit.
+HYBRID_CANDIDATES = 4
+
+
+def fuse_rrf(
+    rankings: Sequence[Sequence[tuple[DocumentChunk, float]]], *, top_k: int, k: int = RRF_K
+) -> list[tuple[DocumentChunk, float]]:
+    """Reciprocal-rank fusion: score = sum over rankings of 1 / (k + rank).
+
+    Only ranks matter, so BM25 and cosine scores never need to be calibrated against each
+    other. Chunks are matched across rankings by (doc_id, chunk_id).
+    """
+
+    fused: dict[tuple[str, str], list] = {}
+    for ranking in rankings:
+        for rank, (chunk, _) in enumerate(ranking, start=1):
+            key = (chunk.metadata.doc_id, chunk.metadata.chunk_id)
+            entry = fused.setdefault(key, [chunk, 0.0])
+            entry[1] += 1.0 / (k + rank)
+    out = sorted(((c, s) for c, s in fused.values()), key=lambda x: x[1], reverse=True)
+    return out[: max(1, top_k)]
+
 
 def retrieve(
     store: VectorStoreAdapter,
@@ -10,5 +40,45 @@ def retrieve(
     tenant_id: str,
     query: str,
     top_k: int,
+    mode: str = "vector",
+    where: MetadataFilter | None = None,
+) -> list[tuple[DocumentChunk, float]]:
+    """Top-k chunks in `mode`; `where` is pushed down into the store as a pre-filter."""
+
+    if mode == "vector":
+        return store.query(tenant_id=tenant_id, text=query, top_k=top_k, where=where)
+    if mode == "lexical":
+        return store.lexical_query(tenant_id=tenant_id, text=query, top_k=top_k, where=where)
+    if mode == "hybrid":
+        n = max(1, top_k) * HYBRID_CANDIDATES
+        return fuse_rrf(
+            [
+                store.query(tenant_id=tenant_id, text=query, top_k=n, where=where),
+                store.lexical_query(tenant_id=tenant_id, text=query, top_k=n, where=where),
+            ],
+            top_k=top_k,
+        )
+    raise RuntimeError(f"unsupported retrieval mode: {mode}")
+
+
+async def aretrieve(
+    store: VectorStoreAdapter,
+    *,
+    tenant_id: str,
+    query: str,
+    top_k: int,
+    mode: str = "vector",
+    where: MetadataFilter | None = None,
 ) -> list[tuple[DocumentChunk, float]]:
-    return store.query(tenant_id=tenant_id, text=query, top_k=top_k)
+    if mode == "vector":
+        return await store.aquery(tenant_id=tenant_id, text=query, top_k=top_k, where=where)
+    if mode == "lexical":
+        return await store.alexical_query(tenant_id=tenant_id, text=query, top_k=top_k, where=where)
+    if mode == "hybrid":
+        n = max(1, top_k) * HYBRID_CANDIDATES
+        rankings = await asyncio.gather(
+            store.aquery(tenant_id=tenant_id, text=query, top_k=n, where=where),
+            store.alexical_query(tenant_id=tenant_id, text=query, top_k=n, where=where),
+        )
+        return fuse_rrf(rankings, top_k=top_k)
+    raise RuntimeError(f"unsupported retrieval mode: {mode}")
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from datetime import UTC, datetime, timedelta
+
+import numpy as np
+
+from app.store.metadata import DocumentChunk
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+_NAIVE_EPOCH = datetime(1970, 1, 1)
+_US = timedelta(microseconds=1)
+
+
+def _grown(arr: np.ndarray, need: int) -> np.ndarray:
+    if need <= arr.shape[0]:
+        return arr
+    out = np.zeros(max(need, 2 * arr.shape[0]), dtype=arr.dtype)
+    out[: arr.shape[0]] = arr
+    return out
+
+
+def _epoch_us(dt: datetime) -> int:
+    # Naive datetimes (the utcnow default) are UTC, as in utc_timestamp.
+    return (dt - (_EPOCH if dt.tzinfo else _NAIVE_EPOCH)) // _US
+
+
+class _Interned:
+    """Distinct strings of a column, stored once; rows hold their int32 code (-1 = None)."""
+
+    __slots__ = ("values", "_codes")
+
+    def __init__(self) -> None:
+        self.values: list[str] = []
+        self._codes: dict[str, int] = {}
+
+    def code(self, value: str | None) -> int:
+        if value is None:
+            return -1
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def value(self, code: int) -> str | None:
+        return self.values[code] if code >= 0 else None
+
+
+class _Arena:
+    """Variable-length strings in one UTF-8 buffer; row i is buf[offsets[i]:offsets[i+1]]."""
+
+    __slots__ = ("buf", "offsets")
+
+    def __init__(self, capacity: int) -> None:
+        self.buf = bytearray()
+        self.offsets = np.zeros(capacity + 1, dtype=np.int64)
+
+    def extend(self, start: int, values: Sequence[str]) -> None:
+        encoded = [v.encode("utf-8") for v in values]
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+        end = start + 1 + len(values)
+        self.offsets = _grown(self.offsets, end)
+        self.offsets[start + 1 : end] = self.offsets[start] + np.cumsum(lengths)
+        self.buf += b"".join(encoded)
+
+    def get(self, row: int) -> str:
+        return self.buf[self.offsets[row] : self.offsets[row + 1]].decode("utf-8")
+
+    def take(self, rows: np.ndarray) -> _Arena:
+        out = _Arena(rows.shape[0])
+        starts = self.offsets[rows]
+        lengths = self.offsets[rows + 1] - starts
+        out.offsets[1:] = np.cumsum(lengths)
+        # Byte gather: each kept row's byte range in the old buffer, back to back.
+        shift = np.repeat(starts - out.offsets[:-1], lengths)
+        src = np.frombuffer(self.buf, dtype=np.uint8)
+        out.buf = bytearray(src[shift + np.arange(int(out.offsets[-1]))].tobytes())
+        # Release the buffer export, or the next append to self.buf would fail.
+        del src
+        return out
+
+
+class ChunkColumns:
+    """One tenant's chunks in columnar form, in store row order.
+
+    Instead of a Pydantic model (plus a nested metadata model, its strings and a
+    `datetime`) per chunk, a row is a few array slots: interned source / doc id /
+    guard-version codes, `created_at` as int64 epoch microseconds, the guard verdict as
+    int8, and text plus chunk id in two UTF-8 arenas. `DocumentChunk`s are only built for
+    the rows a query returns (`take`); guard verdicts restamped on those copies are written
+    back with `set_verdicts`.
+
+    Rows are append-only (readers may index rows below a snapshot of `size` without the
+    store lock); compaction builds a new instance with `compacted`.
+    """
+
+    _COLUMNS = ("_source", "_doc", "_guard_version", "_guard_ok", "_created_us", "_aware")
+
+    def __init__(self, tenant_id: str, capacity: int = 1024) -> None:
+        self.tenant_id = tenant_id
+        self.size = 0
+        self.sources = _Interned()
+        self.docs = _Interned()
+        self.guard_versions = _Interned()
+        self._source = np.zeros(capacity, dtype=np.int32)
+        self._doc = np.zeros(capacity, dtype=np.int32)
+        self._guard_version = np.zeros(capacity, dtype=np.int32)
+        # -1 unknown, 0 blocked, 1 ok
+        self._guard_ok = np.zeros(capacity, dtype=np.int8)
+        self._created_us = np.zeros(capacity, dtype=np.int64)
+        # Naive created_at values (the utcnow default) come back naive.
+        self._aware = np.zeros(capacity, dtype=bool)
+        self._text = _Arena(capacity)
+        self._chunk_id = _Arena(capacity)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def extend(self, chunks: Sequence[DocumentChunk]) -> None:
+        start, need = self.size, self.size + len(chunks)
+        for name in self._COLUMNS:
+            setattr(self, name, _grown(getattr(self, name), need))
+        metas = [c.metadata for c in chunks]
+        # One bulk assignment per column instead of a NumPy write per cell.
+        self._source[start:need] = [self.sources.code(m.source) for m in metas]
+        self._doc[start:need] = [self.docs.code(m.doc_id) for m in metas]
+        self._guard_version[start:need] = [self.guard_versions.code(m.guard_version) for m in metas]
+        self._guard_ok[start:need] = [-1 if m.guard_ok is None else int(m.guard_ok) for m in metas]
+        self._aware[start:need] = [m.created_at.tzinfo is not None for m in metas]
+        self._created_us[start:need] = [_epoch_us(m.created_at) for m in metas]
+        self._text.extend(start, [c.text for c in chunks])
+        self._chunk_id.extend(start, [m.chunk_id for m in metas])
+        # Publish the rows last: a concurrent reader never sees a half-written one.
+        self.size = need
+
+    def doc_id(self, row: int) -> str:
+        return self.docs.values[self._doc[row]]
+
+    def chunk_id(self, row: int) -> str:
+        return self._chunk_id.get(row)
+
+    def set_verdicts(self, rows: Sequence[int], ok: Sequence[bool], version: str) -> None:
+        """Record guard verdicts computed by guard `version` for `rows`."""
+
+        rows = np.asarray(rows, dtype=np.intp)
+        # Verdict before version: `take` reads the version first, so a concurrent reader
+        # sees a new version only together with its verdict.
+        self._guard_ok[rows] = np.asarray(ok, dtype=np.int8)
+        self._guard_version[rows] = self.guard_versions.code(version)
+
+    def get(self, row: int) -> DocumentChunk:
+        return self.take([row])[0]
+
+    def take(self, rows: Sequence[int] | np.ndarray) -> list[DocumentChunk]:
+        """Materialize `rows` (e.g. a query's top k), one NumPy gather per column."""
+
+        rows = np.asarray(rows, dtype=np.intp)
+        sources, docs, versions = self.sources.values, self.docs.values, self.guard_versions.values
+        text, chunk_id = self._text, self._chunk_id
+        out = []
+        for source, doc, version, ok, us, aware, t0, t1, c0, c1 in zip(
+            self._source[rows].tolist(),
+            self._doc[rows].tolist(),
+            self._guard_version[rows].tolist(),
+            self._guard_ok[rows].tolist(),
+            self._created_us[rows].tolist(),
+            self._aware[rows].tolist(),
+            text.offsets[rows].tolist(),
+            text.offsets[rows + 1].tolist(),
+            chunk_id.offsets[rows].tolist(),
+            chunk_id.offsets[rows + 1].tolist(),
+            strict=True,
+        ):
+            meta = {
+                "tenant_id": self.tenant_id,
+                "source": sources[source],
+                "doc_id": docs[doc],
+                "chunk_id": chunk_id.buf[c0:c1].decode("utf-8"),
+                "created_at": (_EPOCH if aware else _NAIVE_EPOCH) + timedelta(microseconds=us),
+                "guard_ok": None if ok < 0 else bool(ok),
+                "guard_version": versions[version] if version >= 0 else None,
+            }
+            # One validation call for the nested model (cheaper than building both).
+            out.append(
+                DocumentChunk.model_validate(
+                    {"metadata": meta, "text": text.buf[t0:t1].decode("utf-8")}
+                )
+            )
+        return out
+
+    def compacted(self, keep: np.ndarray) -> ChunkColumns:
+        """Columns of the rows in `keep` (ascending), renumbered from 0."""
+
+        n = keep.shape[0]
+        out = ChunkColumns(self.tenant_id, capacity=max(1024, n))
+        for name in ("_guard_ok", "_created_us", "_aware"):
+            getattr(out, name)[:n] = getattr(self, name)[keep]
+        # Re-intern, so values only dropped rows used (deleted doc ids) are freed.
+        for table, name in (
+            ("sources", "_source"),
+            ("docs", "_doc"),
+            ("guard_versions", "_guard_version"),
+        ):
+            old: _Interned = getattr(self, table)
+            used, inverse = np.unique(getattr(self, name)[keep], return_inverse=True)
+            fresh = _Interned()
+            remap = np.array([fresh.code(old.value(int(c))) for c in used], dtype=np.int32)
+            setattr(out, table, fresh)
+            getattr(out, name)[:n] = remap[inverse]
+        out._text = self._text.take(keep)
+        out._chunk_id = self._chunk_id.take(keep)
+        out.size = n
+        return out
+
+    def nbytes(self) -> int:
+        """Approximate bytes held: arrays, arenas and interned strings."""
+
+        arrays = [getattr(self, name) for name in self._COLUMNS]
+        arrays += [self._text.offsets, self._chunk_id.offsets]
+        interned = sum(
+            len(v) + 49 for t in (self.sources, self.docs, self.guard_versions) for v in t.values
+        )
+        return (
+            sum(a.nbytes for a in arrays) + len(self._text.buf) + len(self._chunk_id.buf) + interned
+        )
@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+
+import numpy as np
+
+from app.store.columns import ChunkColumns
+from app.store.embeddings import EmbeddingProvider, HashEmbedding
+from app.store.metadata import DocumentChunk, MetadataFilter
+from app.store.metadata_index import MetadataIndex
+from app.store.tombstones import RowLedger
+from app.store.vector import VectorStoreAdapter
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first, without a full sort."""
+
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < scores.shape[0]:
+        idx = np.argpartition(-scores, k - 1)[:k]
+    else:
+        idx = np.arange(scores.shape[0])
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+def live_top_k(scores: np.ndarray, k: int, dead: np.ndarray | None) -> np.ndarray:
+    """`top_k_indices` that never returns rows flagged in `dead` (tombstones)."""
+
+    if dead is None:
+        return top_k_indices(scores, k)
+    idx = top_k_indices(np.where(dead, -np.inf, scores), k)
+    return idx[~dead[idx]]
+
+
+def filtered_top_k(
+    matrix: np.ndarray,
+    qv: np.ndarray,
+    k: int,
+    *,
+    dead: np.ndarray | None,
+    allow: np.ndarray | None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """(rows, scores) of the k best rows of `matrix` that are live and allowed.
+
+    A selective `allow` mask (metadata pre-filter) gathers and scores only its rows; a
+    broad one scores the whole matrix and masks, which is cheaper than the gather.
+    """
+
+    if allow is None:
+        scores = matrix @ qv
+        idx = live_top_k(scores, k, dead)
+        return idx, scores[idx]
+    ok = allow if dead is None else allow & ~dead
+    rows = np.flatnonzero(ok)
+    if 2 * rows.shape[0] > ok.shape[0]:
+        scores = matrix @ qv
+        idx = live_top_k(scores, k, ~ok)
+        return idx, scores[idx]
+    scores = matrix[rows] @ qv
+    idx = top_k_indices(scores, k)
+    return rows[idx], scores[idx]
+
+
+def _rows_by_tenant(chunks: Sequence[DocumentChunk]) -> dict[str, list[int]]:
+    out: dict[str, list[int]] = {}
+    for i, c in enumerate(chunks):
+        out.setdefault(c.metadata.tenant_id, []).append(i)
+    return out
+
+
+class _TenantMatrix:
+    """Contiguous, growable float32 matrix of one tenant's embeddings.
+
+    Rows are append-only; deletes only tombstone them in `ledger` until `compacted`.
+    `meta` indexes the rows' metadata for query-time pre-filtering; the chunks themselves
+    are kept columnar and only materialized for the rows a query returns.
+    """
+
+    def __init__(self, tenant_id: str, dims: int, capacity: int = 1024) -> None:
+        self.vectors = np.zeros((capacity, dims), dtype=np.float32)
+        self.chunks = ChunkColumns(tenant_id, capacity)
+        self.size = 0
+        self.ledger = RowLedger()
+        self.meta = MetadataIndex()
+
+    def _reserve(self, n: int) -> None:
+        cap = self.vectors.shape[0]
+        if self.size + n <= cap:
+            return
+        while cap < self.size + n:
+            cap *= 2
+        grown = np.zeros((cap, self.vectors.shape[1]), dtype=np.float32)
+        grown[: self.size] = self.vectors[: self.size]
+        self.vectors = grown
+
+    def append(self, chunk: DocumentChunk, vec: np.ndarray) -> None:
+        self.extend([chunk], vec[np.newaxis, :])
+
+    def extend(self, chunks: Sequence[DocumentChunk], vecs: np.ndarray) -> None:
+        self._reserve(len(chunks))
+        self.vectors[self.size : self.size + len(chunks)] = vecs
+        self.chunks.extend(chunks)
+        self.size += len(chunks)
+        self.ledger.append([c.metadata.doc_id for c in chunks])
+        self.meta.append(chunks)
+
+    def set_guard_verdicts(self, chunks: Iterable[DocumentChunk]) -> None:
+        """Write verdicts restamped on query results back to their rows."""
+
+        by_version: dict[str, tuple[list[int], list[bool]]] = {}
+        for c in chunks:
+            meta = c.metadata
+            if meta.guard_ok is None or meta.guard_version is None:
+                continue
+            # The chunk's row is among its document's live rows (a query never returns
+            # dead ones); matching on chunk_id also skips rows renumbered since.
+            for row in self.ledger.doc_rows.get(meta.doc_id, ()):
+                if self.chunks.chunk_id(row) == meta.chunk_id:
+                    rows, ok = by_version.setdefault(meta.guard_version, ([], []))
+                    rows.append(row)
+                    ok.append(meta.guard_ok)
+                    break
+        for version, (rows, ok) in by_version.items():
+            self.chunks.set_verdicts(rows, ok, version)
+
+    def compacted(self) -> tuple[_TenantMatrix, np.ndarray]:
+        """(copy holding only the live rows, old row numbers of those rows)."""
+
+        ledger, keep = self.ledger.compacted()
+        out = _TenantMatrix(
+            self.chunks.tenant_id, self.vectors.shape[1], capacity=max(1024, keep.shape[0])
+        )
+        out.vectors[: keep.shape[0]] = self.vectors[keep]
+        out.chunks = self.chunks.compacted(keep)
+        out.size = keep.shape[0]
+        out.ledger = ledger
+        out.meta = self.meta.compacted(keep)
+        return out, keep
+
+
+class NumpyVectorStore(VectorStoreAdapter):
+    """Tenant-scoped store backed by one pre-normalized float32 matrix per tenant.
+
+    A query is a single matrix-vector product plus an argpartition for top-k.
+    """
+
+    def __init__(self, embedder: EmbeddingProvider | None = None, *, lexical: bool = False) -> None:
+        super().__init__(lexical=lexical)
+        self.embedder = embedder or HashEmbedding()
+        self._dims = self.embedder.dims
+        self._by_tenant: dict[str, _TenantMatrix] = {}
+
+    def upsert(self, chunk: DocumentChunk) -> None:
+        vec = self.embedder.embed_many([chunk.text])[0]
+        with self._lock:
+            tm = self._by_tenant.get(chunk.metadata.tenant_id)
+            if tm is None:
+                tm = self._by_tenant[chunk.metadata.tenant_id] = _TenantMatrix(
+                    chunk.metadata.tenant_id, self._dims
+                )
+            tm.append(chunk, vec)
+            self._index_lexical(chunk.metadata.tenant_id, [chunk])
+        self._bump_corpus_versions([chunk.metadata.tenant_id])
+
+    def upsert_many(self, chunks: Sequence[DocumentChunk]) -> None:
+        if not chunks:
+            return
+        vecs = self.embedder.embed_many([c.text for c in chunks])
+        by_tenant = _rows_by_tenant(chunks)
+        with self._lock:
+            for tenant_id, rows in by_tenant.items():
+                tm = self._by_tenant.get(tenant_id)
+                if tm is None:
+                    tm = self._by_tenant[tenant_id] = _TenantMatrix(tenant_id, self._dims)
+                batch = [chunks[i] for i in rows]
+                tm.extend(batch, vecs[rows])
+                self._index_lexical(tenant_id, batch)
+        self._bump_corpus_versions(by_tenant)
+
+    def replace_documents(
+        self, tenant_id: str, doc_ids: Iterable[str], chunks: Sequence[DocumentChunk]
+    ) -> int:
+        vecs = self.embedder.embed_many([c.text for c in chunks]) if chunks else None
+        with self._lock:
+            tm = self._by_tenant.get(tenant_id)
+            if tm is None:
+                tm = self._by_tenant[tenant_id] = _TenantMatrix(tenant_id, self._dims)
+            killed = tm.ledger.kill(doc_ids)
+            self._kill_lexical(tenant_id, killed)
+            if chunks:
+                tm.extend(chunks, vecs)
+                self._index_lexical(tenant_id, chunks)
+        self._bump_corpus_versions([tenant_id])
+        self._maybe_compact(tenant_id, tm.ledger)
+        return len(killed)
+
+    def chunk_stats(self, tenant_id: str) -> dict[str, int]:
+        with self._lock:
+            tm = self._by_tenant.get(tenant_id)
+            return tm.ledger.stats() if tm is not None else {"live": 0, "dead": 0}
+
+    def compact_tenant(self, tenant_id: str) -> None:
+        with self._lock:
+            tm = self._by_tenant.get(tenant_id)
+            if tm is None or not tm.ledger.dead_count:
+                return
+            # Queries holding a snapshot of the old matrix keep using it undisturbed.
+            self._by_tenant[tenant_id], keep = tm.compacted()
+            self._compact_lexical(tenant_id, keep)
+
+    def set_guard_verdicts(self, tenant_id: str, chunks: Sequence[DocumentChunk]) -> None:
+        with self._lock:
+            tm = self._by_tenant.get(tenant_id)
+            if tm is not None:
+                tm.set_guard_verdicts(chunks)
+
+    def query(
+        self, *, tenant_id: str, text: str, top_k: int, where: MetadataFilter | None = None
+    ) -> list[tuple[DocumentChunk, float]]:
+        with self._lock:
+            tm = self._by_tenant.get(tenant_id)
+            if tm is None:
+                return []
+            # Snapshot: rows below `size` are immutable once written.
+            matrix, chunks, dead = tm.vectors[: tm.size], tm.chunks, tm.ledger.dead_mask()
+            allow = tm.meta.select(where)
+
+        qv = self.embedder.embed_query(text)
+        rows, scores = filtered_top_k(matrix, qv, max(1, top_k), dead=dead, allow=allow)
+        return list(zip(chunks.take(rows), scores.tolist(), strict=True))
+
+    def _chunks_at(self, tenant_id: str, rows: Sequence[int]) -> list[DocumentChunk]:
+        return self._by_tenant[tenant_id].chunks.take(rows)
+
+    def _eligible(self, tenant_id: str, where: MetadataFilter) -> np.ndarray | None:
+        tm = self._by_tenant.get(tenant_id)
+        return tm.meta.select(where) if tm is not None else None
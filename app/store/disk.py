@@ -0,0 +1,598 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+from typing import BinaryIO
+
+import numpy as np
+
+from app.store.dense import _rows_by_tenant, filtered_top_k
+from app.store.embeddings import EmbeddingProvider, HashEmbedding
+from app.store.metadata import ChunkMetadata, DocumentChunk, MetadataFilter
+from app.store.metadata_index import MetadataIndex
+from app.store.tombstones import RowLedger
+from app.store.vector import VectorStoreAdapter
+
+FORMAT_VERSION = 1
+
+# One fixed-width record per chunk; row i of the index describes row i of the embeddings.
+INDEX_DTYPE = np.dtype([("segment", "<u4"), ("length", "<u4"), ("offset", "<u8")])
+
+
+def _tenant_dir(root: Path, tenant_id: str) -> Path:
+    # Hash the tenant id so arbitrary ids never become filesystem paths (no traversal).
+    return root / hashlib.blake2s(tenant_id.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _segment_name(no: int) -> str:
+    return f"seg-{no:06d}.log"
+
+
+def _doc_key(doc_id: str) -> int:
+    """64-bit key of a doc_id, as stored per row in docs.u64."""
+
+    return int.from_bytes(hashlib.blake2b(doc_id.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _fsync_write(path: Path, data: bytes) -> None:
+    with open(path, "wb") as fh:
+        fh.write(data)
+        fh.flush()
+        os.fsync(fh.fileno())
+
+
+def _recover_swap(path: Path) -> None:
+    """Finish or roll back a tenant directory swap interrupted by a crash (see compact)."""
+
+    staged, retired = path.with_name(path.name + ".compact"), path.with_name(path.name + ".old")
+    if not path.exists():
+        if (staged / ".complete").exists():
+            os.replace(staged, path)
+        elif retired.exists():
+            os.replace(retired, path)
+    (path / ".complete").unlink(missing_ok=True)
+    for leftover in (staged, retired):
+        if leftover.exists():
+            shutil.rmtree(leftover)
+
+
+class _TenantFiles:
+    """On-disk layout of one tenant.
+
+      meta.json        format version, dims, embedding model, tenant id
+      embeddings.f32   row-major float32 matrix, memory-mapped for queries
+      index.bin        INDEX_DTYPE records (segment, length, offset), memory-mapped
+      docs.u64         per-row doc_id key (_doc_key), for document-level deletes
+      tombstones.u64   append-only list of deleted rows
+      seg-NNNNNN.log   append-only JSON records with chunk metadata + text
+
+    Writes go segment -> embeddings -> docs -> index; the index is the commit point, so a
+    torn write is rolled back on open by dropping a partial index record and trimming the
+    embeddings and docs to the indexed row count.
+    """
+
+    def __init__(
+        self, path: Path, *, tenant_id: str, dims: int, embedder: str, segment_bytes: int
+    ) -> None:
+        self.path = path
+        self.dims = dims
+        self._segment_bytes = segment_bytes
+        self._emb_path = path / "embeddings.f32"
+        self._idx_path = path / "index.bin"
+        self._docs_path = path / "docs.u64"
+        self._dead_path = path / "tombstones.u64"
+
+        meta_path = path / "meta.json"
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            # Files written before the embedder was recorded all used the 64-d hash model.
+            if (
+                meta.get("format") != FORMAT_VERSION
+                or meta.get("dims") != dims
+                or meta.get("embedder", "hash-64") != embedder
+            ):
+                raise ValueError(f"incompatible vector store files in {path}")
+            if meta.get("tenant_id") != tenant_id:
+                raise ValueError(f"tenant mismatch in {path}")
+        else:
+            path.mkdir(parents=True, exist_ok=True)
+            meta_path.write_text(
+                json.dumps(
+                    {
+                        "format": FORMAT_VERSION,
+                        "dims": dims,
+                        "embedder": embedder,
+                        "tenant_id": tenant_id,
+                    }
+                ),
+                encoding="utf-8",
+            )
+
+        self.size = 0
+        if self._idx_path.exists():
+            idx_bytes = self._idx_path.stat().st_size
+            self.size = idx_bytes // INDEX_DTYPE.itemsize
+            # Drop a partial trailing record, or the next append would land misaligned.
+            if idx_bytes != self.size * INDEX_DTYPE.itemsize:
+                os.truncate(self._idx_path, self.size * INDEX_DTYPE.itemsize)
+        row_bytes = dims * 4
+        if self._emb_path.exists() and self._emb_path.stat().st_size != self.size * row_bytes:
+            os.truncate(self._emb_path, self.size * row_bytes)
+
+        segments = sorted(int(p.name[4:10]) for p in path.glob("seg-*.log"))
+        self.segments = segments or [1]
+        self._readers: dict[int, int] = {}
+        self._writers: dict[str, BinaryIO] = {}
+        self._vectors: np.ndarray | None = None
+        self._index: np.ndarray | None = None
+        self.ledger = self._load_ledger()
+        # Built from the records on first filtered query, then kept up to date.
+        self.meta: MetadataIndex | None = None
+
+    def _load_ledger(self) -> RowLedger:
+        if not self._docs_path.exists():
+            # Files from before document deletes: derive the keys from the records once.
+            chunks = self.read(range(self.size)) if self.size else []
+            keys = [_doc_key(c.metadata.doc_id) for c in chunks]
+            _fsync_write(self._docs_path, np.asarray(keys, dtype="<u8").tobytes())
+        elif self._docs_path.stat().st_size != self.size * 8:
+            os.truncate(self._docs_path, self.size * 8)
+        ledger = RowLedger()
+        ledger.append(np.fromfile(self._docs_path, dtype="<u8").tolist())
+        if self._dead_path.exists():
+            dead = np.fromfile(self._dead_path, dtype="<u8")
+            ledger.kill_rows(dead[dead < self.size].tolist())
+        return ledger
+
+    # --- writes -------------------------------------------------------------------------
+
+    def _writer(self, name: str) -> BinaryIO:
+        fh = self._writers.get(name)
+        if fh is None:
+            fh = self._writers[name] = open(self.path / name, "ab")
+        return fh
+
+    def append(self, chunks: Sequence[DocumentChunk], vecs: np.ndarray) -> None:
+        active = self.segments[-1]
+        seg = self._writer(_segment_name(active))
+        if seg.tell() >= self._segment_bytes:
+            self._close_writer(_segment_name(active))
+            active += 1
+            self.segments.append(active)
+            seg = self._writer(_segment_name(active))
+
+        records = np.empty(len(chunks), dtype=INDEX_DTYPE)
+        payload: list[bytes] = []
+        offset = seg.tell()
+        for i, c in enumerate(chunks):
+            data = json.dumps(
+                {"m": c.metadata.model_dump(mode="json"), "t": c.text}, ensure_ascii=False
+            ).encode("utf-8")
+            records[i] = (active, len(data), offset)
+            payload.append(data)
+            offset += len(data)
+
+        seg.write(b"".join(payload))
+        seg.flush()
+        emb = self._writer(self._emb_path.name)
+        emb.write(np.ascontiguousarray(vecs, dtype=np.float32).tobytes())
+        emb.flush()
+        keys = [_doc_key(c.metadata.doc_id) for c in chunks]
+        docs = self._writer(self._docs_path.name)
+        docs.write(np.asarray(keys, dtype="<u8").tobytes())
+        docs.flush()
+        idx = self._writer(self._idx_path.name)
+        idx.write(records.tobytes())
+        idx.flush()
+        self.size += len(chunks)
+        self.ledger.append(keys)
+        if self.meta is not None:
+            self.meta.append(chunks)
+
+    def persist_kills(self, rows: Sequence[int]) -> None:
+        if rows:
+            fh = self._writer(self._dead_path.name)
+            fh.write(np.asarray(rows, dtype="<u8").tobytes())
+            fh.flush()
+
+    def _close_writer(self, name: str) -> None:
+        fh = self._writers.pop(name, None)
+        if fh is not None:
+            fh.close()
+
+    # --- reads --------------------------------------------------------------------------
+
+    def vectors(self) -> np.ndarray | None:
+        """Zero-copy view of the embeddings; remapped only after the file has grown."""
+
+        if self.size == 0:
+            return None
+        if self._vectors is None or self._vectors.shape[0] != self.size:
+            self._vectors = np.memmap(
+                self._emb_path, dtype=np.float32, mode="r", shape=(self.size, self.dims)
+            )
+        return self._vectors
+
+    def metadata(self) -> MetadataIndex:
+        if self.meta is None:
+            self.meta = MetadataIndex()
+            self.meta.append(self.read(range(self.size)))
+        return self.meta
+
+    def _index_view(self) -> np.ndarray:
+        if self._index is None or self._index.shape[0] != self.size:
+            self._index = np.memmap(self._idx_path, dtype=INDEX_DTYPE, mode="r", shape=(self.size,))
+        return self._index
+
+    def _pread(self, segment: int, offset: int, length: int) -> bytes:
+        fd = self._readers.get(segment)
+        if fd is None:
+            fd = self._readers[segment] = os.open(self.path / _segment_name(segment), os.O_RDONLY)
+        return os.pread(fd, length, offset)
+
+    def read(self, rows: Sequence[int]) -> list[DocumentChunk]:
+        index = self._index_view()
+        out: list[DocumentChunk] = []
+        for row in rows:
+            rec = index[row]
+            raw = json.loads(
+                self._pread(int(rec["segment"]), int(rec["offset"]), int(rec["length"]))
+            )
+            out.append(
+                DocumentChunk(metadata=ChunkMetadata.model_validate(raw["m"]), text=raw["t"])
+            )
+        return out
+
+    # --- maintenance --------------------------------------------------------------------
+
+    def start_live_copy(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Begin a compaction; call under the store lock.
+
+        Returns (old row numbers of the live rows, their index records, the embeddings
+        covering every row so far) for write_live_copy.
+        """
+
+        keep = self.ledger.live_rows()
+        return keep, np.array(self._index_view()[keep]), self.vectors()
+
+    def write_live_copy(
+        self, dest: Path, keep: np.ndarray, records: np.ndarray, vectors: np.ndarray
+    ) -> None:
+        """Write a fresh tenant directory at `dest` holding the rows `keep`, in order.
+
+        Runs without the store lock: the rows it copies are never rewritten in place, and
+        appends only add bytes after them.
+        """
+
+        if dest.exists():
+            shutil.rmtree(dest)
+        dest.mkdir(parents=True)
+        shutil.copyfile(self.path / "meta.json", dest / "meta.json")
+
+        new_index = np.empty(keep.shape[0], dtype=INDEX_DTYPE)
+        fds: dict[int, int] = {}
+        offset = 0
+        try:
+            with open(dest / _segment_name(1), "wb") as out:
+                for i, rec in enumerate(records):
+                    segment = int(rec["segment"])
+                    fd = fds.get(segment)
+                    if fd is None:
+                        fd = fds[segment] = os.open(self.path / _segment_name(segment), os.O_RDONLY)
+                    data = os.pread(fd, int(rec["length"]), int(rec["offset"]))
+                    out.write(data)
+                    new_index[i] = (1, len(data), offset)
+                    offset += len(data)
+                out.flush()
+                os.fsync(out.fileno())
+        finally:
+            for fd in fds.values():
+                os.close(fd)
+
+        _fsync_write(dest / self._emb_path.name, np.ascontiguousarray(vectors[keep]).tobytes())
+        docs = np.fromfile(self._docs_path, dtype="<u8")[keep]
+        _fsync_write(dest / self._docs_path.name, docs.tobytes())
+        _fsync_write(dest / self._idx_path.name, new_index.tobytes())
+
+    def start_merge(self) -> tuple[np.ndarray, list[int], int]:
+        """Begin merging the current segments into one; call under the store lock.
+
+        Rolls appends over to a fresh segment so the segments being merged no longer
+        change, and returns (index of the rows covered, those segments, merged segment no).
+        """
+
+        index = np.array(self._index_view()) if self.size else np.empty(0, dtype=INDEX_DTYPE)
+        old = list(self.segments)
+        merged_no = old[-1] + 1
+        self._close_writer(_segment_name(old[-1]))
+        # merged_no sorts before the new active segment, keeping segments in row order.
+        self.segments.append(merged_no + 1)
+        return index, old, merged_no
+
+    def write_merge(self, index: np.ndarray, merged_no: int) -> None:
+        """Copy the records of `index` into the merged segment and stage the new index.
+
+        Runs without the store lock: those records live in segments that are no longer
+        appended to. Every record is copied, tombstoned ones included; dropping them
+        renumbers rows, which is compact_tenant's job.
+        """
+
+        new_index = index.copy()
+        new_index["segment"] = merged_no
+        fds: dict[int, int] = {}
+        offset = 0
+        try:
+            with open(self.path / _segment_name(merged_no), "wb") as out:
+                for i, rec in enumerate(index):
+                    segment = int(rec["segment"])
+                    fd = fds.get(segment)
+                    if fd is None:
+                        fd = fds[segment] = os.open(self.path / _segment_name(segment), os.O_RDONLY)
+                    data = os.pread(fd, int(rec["length"]), int(rec["offset"]))
+                    out.write(data)
+                    new_index[i]["offset"] = offset
+                    offset += len(data)
+                out.flush()
+                os.fsync(out.fileno())
+        finally:
+            for fd in fds.values():
+                os.close(fd)
+        _fsync_write(self._idx_path.with_suffix(".tmp"), new_index.tobytes())
+
+    def finish_merge(self, rows: int, old: list[int], merged_no: int) -> None:
+        """Swap the merged segment in; call under the store lock."""
+
+        tmp = self._idx_path.with_suffix(".tmp")
+        # Rows appended since start_merge keep their records (in segments after merged_no).
+        appended = np.array(self._index_view()[rows:])
+        with open(tmp, "ab") as fh:
+            fh.write(appended.tobytes())
+            fh.flush()
+            os.fsync(fh.fileno())
+        self.close()
+        os.replace(tmp, self._idx_path)
+        for no in old:
+            (self.path / _segment_name(no)).unlink(missing_ok=True)
+        self.segments = [merged_no] + [no for no in self.segments if no not in old]
+
+    def close(self) -> None:
+        for name in list(self._writers):
+            self._close_writer(name)
+        for fd in self._readers.values():
+            os.close(fd)
+        self._readers.clear()
+        self._vectors = None
+        self._index = None
+
+
+class MmapVectorStore(VectorStoreAdapter):
+    """Persistent tenant-scoped store: memory-mapped embeddings + append-only segments.
+
+    Nothing is loaded at startup; a tenant's files are mapped on first access and queries
+    scan the mapped matrix in place. Segments roll at `segment_bytes` and are merged once a
+    tenant has more than `max_segments`.
+    """
+
+    def __init__(
+        self,
+        root: str | os.PathLike[str],
+        *,
+        embedder: EmbeddingProvider | None = None,
+        lexical: bool = False,
+        segment_bytes: int = 64 * 1024 * 1024,
+        max_segments: int = 8,
+    ) -> None:
+        super().__init__(lexical=lexical)
+        self._root = Path(root)
+        self._root.mkdir(parents=True, exist_ok=True)
+        self.embedder = embedder or HashEmbedding()
+        self._dims = self.embedder.dims
+        self._segment_bytes = segment_bytes
+        self._max_segments = max_segments
+        self._by_tenant: dict[str, _TenantFiles] = {}
+        # Serializes file rewrites (segment merges, compactions); queries never take it.
+        self._rewrite_lock = threading.Lock()
+
+    def _tenant(
+        self, tenant_id: str, *, create: bool, index_lexical: bool = True
+    ) -> _TenantFiles | None:
+        tf = self._by_tenant.get(tenant_id)
+        if tf is None:
+            path = _tenant_dir(self._root, tenant_id)
+            _recover_swap(path)
+            if not create and not path.exists():
+                return None
+            tf = self._by_tenant[tenant_id] = _TenantFiles(
+                path,
+                tenant_id=tenant_id,
+                dims=self._dims,
+                embedder=self.embedder.name,
+                segment_bytes=self._segment_bytes,
+            )
+            if tf.size and index_lexical and self._lexical is not None:
+                # The lexical index is in memory only: rebuild it from the segments, and
+                # the metadata index with it since the records are read anyway.
+                chunks = tf.read(range(tf.size))
+                self._index_lexical(tenant_id, chunks)
+                tf.meta = MetadataIndex()
+                tf.meta.append(chunks)
+                dead = tf.ledger.dead_mask()
+                if dead is not None:
+                    self._kill_lexical(tenant_id, np.flatnonzero(dead).tolist())
+        return tf
+
+    def upsert(self, chunk: DocumentChunk) -> None:
+        self.upsert_many([chunk])
+
+    def upsert_many(self, chunks: Sequence[DocumentChunk]) -> None:
+        if not chunks:
+            return
+        vecs = self.embedder.embed_many([c.text for c in chunks])
+        by_tenant = _rows_by_tenant(chunks)
+        with self._lock:
+            for tenant_id, rows in by_tenant.items():
+                tf = self._tenant(tenant_id, create=True)
+                batch = [chunks[i] for i in rows]
+                tf.append(batch, vecs[rows])
+                self._index_lexical(tenant_id, batch)
+        self._bump_corpus_versions(by_tenant)
+        for tenant_id in by_tenant:
+            self._merge_segments(tenant_id, force=False)
+
+    def replace_documents(
+        self, tenant_id: str, doc_ids: Iterable[str], chunks: Sequence[DocumentChunk]
+    ) -> int:
+        vecs = self.embedder.embed_many([c.text for c in chunks]) if chunks else None
+        with self._lock:
+            tf = self._tenant(tenant_id, create=True)
+            killed = tf.ledger.kill(_doc_key(d) for d in doc_ids)
+            self._kill_lexical(tenant_id, killed)
+            if chunks:
+                tf.append(chunks, vecs)
+                self._index_lexical(tenant_id, chunks)
+            # Tombstones are persisted after the new rows: a crash in between leaves both
+            # versions of the document, never neither.
+            tf.persist_kills(killed)
+        self._bump_corpus_versions([tenant_id])
+        self._merge_segments(tenant_id, force=False)
+        self._maybe_compact(tenant_id, tf.ledger)
+        return len(killed)
+
+    def chunk_stats(self, tenant_id: str) -> dict[str, int]:
+        with self._lock:
+            tf = self._tenant(tenant_id, create=False)
+            return tf.ledger.stats() if tf is not None else {"live": 0, "dead": 0}
+
+    def compact_tenant(self, tenant_id: str) -> None:
+        """Rewrite the tenant without its tombstoned rows and swap the directory in.
+
+        The live rows are copied outside the store lock; rows appended meanwhile are added
+        to the copy at the swap, and a delete meanwhile discards it. The copy is staged
+        next to the live directory and marked complete before the two renames, so a crash
+        at any point reopens either the old or the new files.
+        """
+
+        with self._rewrite_lock:
+            with self._lock:
+                tf = self._tenant(tenant_id, create=False)
+                if tf is None or not tf.ledger.dead_count:
+                    return
+                keep, records, vectors = tf.start_live_copy()
+                dead = tf.ledger.dead_count
+            staged = tf.path.with_name(tf.path.name + ".compact")
+            tf.write_live_copy(staged, keep, records, vectors)
+
+            with self._lock:
+                if self._by_tenant.get(tenant_id) is not tf or tf.ledger.dead_count != dead:
+                    # Closed or deleted from meanwhile; the next compaction starts over.
+                    shutil.rmtree(staged)
+                    return
+                copied = vectors.shape[0]
+                if tf.size > copied:
+                    tail = _TenantFiles(
+                        staged,
+                        tenant_id=tenant_id,
+                        dims=self._dims,
+                        embedder=self.embedder.name,
+                        segment_bytes=self._segment_bytes,
+                    )
+                    tail.append(tf.read(range(copied, tf.size)), tf.vectors()[copied:])
+                    tail.close()
+                    keep = np.concatenate([keep, np.arange(copied, tf.size)])
+                _fsync_write(staged / ".complete", b"")
+                tf.close()
+                del self._by_tenant[tenant_id]
+                os.replace(tf.path, tf.path.with_name(tf.path.name + ".old"))
+                os.replace(staged, tf.path)
+                _recover_swap(tf.path)  # drops the marker and the retired directory
+                self._compact_lexical(tenant_id, keep)
+                # Postings were just renumbered in place; don't index the rows a second time.
+                fresh = self._tenant(tenant_id, create=False, index_lexical=False)
+                if tf.meta is not None:
+                    fresh.meta = tf.meta.compacted(keep)
+
+    def query(
+        self, *, tenant_id: str, text: str, top_k: int, where: MetadataFilter | None = None
+    ) -> list[tuple[DocumentChunk, float]]:
+        qv = self.embedder.embed_query(text)
+        while True:
+            with self._lock:
+                tf = self._tenant(tenant_id, create=False)
+                matrix = tf.vectors() if tf is not None else None
+                if matrix is None:
+                    return []
+                dead = tf.ledger.dead_mask()
+                allow = self._eligible(tenant_id, where) if where is not None else None
+
+            rows, scores = filtered_top_k(matrix, qv, max(1, top_k), dead=dead, allow=allow)
+            with self._lock:
+                # A compaction in between renumbers rows: score the new files instead.
+                if self._by_tenant.get(tenant_id) is tf:
+                    chunks = tf.read(rows)
+                    break
+        return [(c, float(s)) for c, s in zip(chunks, scores, strict=True)]
+
+    def lexical_query(
+        self, *, tenant_id: str, text: str, top_k: int, where: MetadataFilter | None = None
+    ) -> list[tuple[DocumentChunk, float]]:
+        with self._lock:
+            if self._tenant(tenant_id, create=False) is None:
+                return []  # opening the tenant (re)builds its postings
+        return super().lexical_query(tenant_id=tenant_id, text=text, top_k=top_k, where=where)
+
+    def _chunks_at(self, tenant_id: str, rows: Sequence[int]) -> list[DocumentChunk]:
+        return self._by_tenant[tenant_id].read(rows)
+
+    def _eligible(self, tenant_id: str, where: MetadataFilter) -> np.ndarray | None:
+        tf = self._by_tenant.get(tenant_id)
+        return tf.metadata().select(where) if tf is not None else None
+
+    def _merge_segments(self, tenant_id: str, *, force: bool) -> None:
+        """Merge the tenant's segments into one (when over max_segments, unless `force`).
+
+        The copy runs outside the store lock, so other tenants' (and this tenant's)
+        queries and writes proceed meanwhile; only the start and the swap take it.
+        """
+
+        limit = 1 if force else self._max_segments
+
+        def due() -> _TenantFiles | None:
+            tf = self._by_tenant.get(tenant_id)
+            return tf if tf is not None and len(tf.segments) > limit else None
+
+        with self._lock:
+            if due() is None:
+                return
+        with self._rewrite_lock:
+            with self._lock:
+                tf = due()
+                if tf is None:
+                    return  # merged by another writer meanwhile
+                index, old, merged_no = tf.start_merge()
+            tf.write_merge(index, merged_no)
+            with self._lock:
+                if self._by_tenant.get(tenant_id) is not tf:
+                    # Closed meanwhile: the next merge picks up the orphaned segment.
+                    return
+                tf.finish_merge(index.shape[0], old, merged_no)
+
+    def compact(self) -> None:
+        """Merge every open tenant's segments into one."""
+
+        with self._lock:
+            tenant_ids = list(self._by_tenant)
+        for tenant_id in tenant_ids:
+            self._merge_segments(tenant_id, force=True)
+
+    def close(self) -> None:
+        with self._lock:
+            for tf in self._by_tenant.values():
+                tf.close()
+            self._by_tenant.clear()
+            if self._lexical is not None:
+                self._lexical.clear()  # rebuilt as tenants are reopened
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Any
+
+import numpy as np
+
+_WORD = re.compile(r"\w+")
+
+
+def _unit_rows(vecs: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+    norms[norms == 0.0] = 1.0
+    return vecs / norms
+
+
+class EmbeddingProvider(ABC):
+    """Text -> unit-normalized float32 vectors, so cosine similarity is a dot product.
+
+    Implementations must be thread-safe; stores call them from executor threads.
+    `name` identifies the vector space: vectors from providers with different names must
+    never be mixed in one index.
+    """
+
+    name: str
+    dims: int
+
+    @abstractmethod
+    def embed_many(self, texts: Sequence[str]) -> np.ndarray:
+        """(len(texts), dims) float32 matrix, one unit row per text."""
+
+    def embed_query(self, text: str) -> np.ndarray:
+        return self.embed_many([text])[0]
+
+
+class HashEmbedding(EmbeddingProvider):
+    """Deterministic toy embedding (sha256 bytes) for the MVP and tests.
+
+    This avoids external model downloads while enabling repeatable retrieval behavior.
+    Only identical texts are similar. DO NOT use in production.
+    """
+
+    def __init__(self, dims: int = 64) -> None:
+        self.dims = dims
+        self.name = f"hash-{dims}"
+
+    def embed_many(self, texts: Sequence[str]) -> np.ndarray:
+        digests = b"".join(hashlib.sha256(t.encode("utf-8")).digest() for t in texts)
+        raw = np.frombuffer(digests, dtype=np.uint8).reshape(len(texts), 32)
+        vecs = raw[:, np.arange(self.dims) % 32].astype(np.float32) / np.float32(255.0)
+        return _unit_rows(vecs)
+
+
+class NgramHashEmbedding(EmbeddingProvider):
+    """Local CPU model: signed feature hashing of words and character trigrams.
+
+    No weights, no downloads, no network. Texts that share vocabulary (including
+    inflections and typos, via the trigrams) land close together, which is enough for
+    lexical retrieval and near-duplicate questions.
+    """
+
+    def __init__(self, dims: int = 256) -> None:
+        self.dims = dims
+        self.name = f"ngram-hash-{dims}"
+
+    def _features(self, text: str) -> list[str]:
+        out: list[str] = []
+        for word in _WORD.findall(text.casefold()):
+            out.append(word)
+            padded = f"<{word}>"
+            out.extend(padded[i : i + 3] for i in range(len(padded) - 2))
+        return out
+
+    def embed_many(self, texts: Sequence[str]) -> np.ndarray:
+        vecs = np.zeros((len(texts), self.dims), dtype=np.float32)
+        for row, text in enumerate(texts):
+            hashes = np.fromiter(
+                (zlib.crc32(f.encode("utf-8")) for f in self._features(text)), dtype=np.uint32
+            )
+            if hashes.size == 0:
+                continue
+            signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+            np.add.at(vecs[row], hashes % self.dims, signs)
+        # Sublinear term frequency: repeated words shouldn't dominate the direction.
+        np.copyto(vecs, np.sign(vecs) * np.log1p(np.abs(vecs)))
+        return _unit_rows(vecs)
+
+
+class CachedEmbeddingProvider(EmbeddingProvider):
+    """LRU cache for query embeddings in front of another provider.
+
+    Keyed by a digest of the text, so memory is bounded by `max_entries` vectors rather
+    than by query length. Bulk `embed_many` (ingest) bypasses the cache: chunks are
+    embedded once at write time anyway.
+    """
+
+    def __init__(self, inner: EmbeddingProvider, *, max_entries: int = 4096) -> None:
+        self.inner = inner
+        self.name = inner.name
+        self.dims = inner.dims
+        self.max_entries = max_entries
+        self._cache: OrderedDict[bytes, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def embed_many(self, texts: Sequence[str]) -> np.ndarray:
+        return self.inner.embed_many(texts)
+
+    def embed_query(self, text: str) -> np.ndarray:
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        with self._lock:
+            vec = self._cache.get(key)
+            if vec is not None:
+                self._cache.move_to_end(key)
+                self._hits += 1
+                return vec
+            self._misses += 1
+
+        vec = self.inner.embed_query(text)
+        vec.setflags(write=False)  # shared between callers
+        with self._lock:
+            self._cache[key] = vec
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return vec
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {"hits": self._hits, "misses": self._misses, "entries": len(self._cache)}
+
+
+def build_embedder(model: str = "hash", *, dims: int = 0, cache_size: int = 0) -> EmbeddingProvider:
+    """Embedding provider by name ("hash", "ngram"), optionally behind a query LRU."""
+
+    name = model.strip().lower()
+    if name == "hash":
+        provider: EmbeddingProvider = HashEmbedding(dims or 64)
+    elif name == "ngram":
+        provider = NgramHashEmbedding(dims or 256)
+    else:
+        raise ValueError(f"unsupported embedding_model: {model}")
+    if cache_size > 0:
+        provider = CachedEmbeddingProvider(provider, max_entries=cache_size)
+    return provider
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from app.core.config import Settings
+from app.store.dense import NumpyVectorStore
+from app.store.disk import MmapVectorStore
+from app.store.embeddings import EmbeddingProvider, build_embedder
+from app.store.ivf import IVFVectorStore
+from app.store.remote import RemoteVectorStore
+from app.store.vector import InMemoryVectorStore, VectorStoreAdapter
+
+
+def build_settings_embedder(settings: Settings) -> EmbeddingProvider:
+    """The configured embedding model, behind the query-embedding LRU."""
+
+    return build_embedder(
+        settings.embedding_model,
+        dims=settings.embedding_dims,
+        cache_size=settings.query_embedding_cache,
+    )
+
+
+def build_store(
+    settings: Settings,
+    backend: str | None = None,
+    *,
+    embedder: EmbeddingProvider | None = None,
+) -> VectorStoreAdapter:
+    """Instantiate a vector store by name (defaults to settings.vector_backend).
+
+    All local backends share `embedder` (built from settings when omitted); the remote
+    backend embeds on the store server instead.
+    """
+
+    name = (backend or settings.vector_backend).strip().lower()
+    if name == "remote":
+        return RemoteVectorStore(settings.store_socket_path, pool_size=settings.store_pool_size)
+
+    store = _local_store(name, settings, embedder or build_settings_embedder(settings))
+    store.compact_min_dead = settings.compact_min_dead
+    store.compact_dead_ratio = settings.compact_dead_ratio
+    return store
+
+
+def _local_store(name: str, settings: Settings, embedder: EmbeddingProvider) -> VectorStoreAdapter:
+    # BM25 postings are only built when retrieval uses them.
+    lexical = settings.retrieval_mode != "vector"
+    if name == "inmemory":
+        return InMemoryVectorStore(embedder, lexical=lexical)
+    if name == "numpy":
+        return NumpyVectorStore(embedder, lexical=lexical)
+    if name == "ivf":
+        return IVFVectorStore(
+            embedder=embedder,
+            lexical=lexical,
+            nlist=settings.ivf_nlist,
+            nprobe=settings.ivf_nprobe,
+        )
+    if name == "mmap":
+        return MmapVectorStore(settings.vector_store_path, embedder=embedder, lexical=lexical)
+    raise ValueError(f"unsupported vector_backend: {name}")
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+from typing import Any
+
+from app.core.metrics import MetricsRegistry
+from app.store.metadata import DocumentChunk, MetadataFilter
+from app.store.vector import VectorStoreAdapter
+
+_OPS = ("upsert", "replace_documents", "query", "lexical_query", "compact_tenant")
+
+
+class InstrumentedVectorStore(VectorStoreAdapter):
+    """Wraps any store with per-operation latency histograms and corpus size gauges.
+
+    Recording only touches pre-bound histogram children (lock-free). Per-tenant corpus
+    sizes are read from the store at scrape time, for the tenants this process has
+    seen, so background compaction is reflected without any write-path cost.
+    """
+
+    def __init__(self, inner: VectorStoreAdapter, metrics: MetricsRegistry) -> None:
+        super().__init__()
+        self.inner = inner
+        seconds = metrics.histogram(
+            "rag_store_operation_seconds", "Vector store operation latency.", ["op"]
+        )
+        self._timers = {op: seconds.labels(op) for op in _OPS}
+        self._written = metrics.counter(
+            "rag_store_chunks_written_total", "Chunks written to the vector store."
+        ).labels()
+        self._tenants: set[str] = set()
+        metrics.register_func(
+            "gauge",
+            "rag_corpus_chunks",
+            "Chunks per tenant; dead = deleted/replaced, awaiting compaction.",
+            self._corpus_sizes,
+            ["tenant_id", "state"],
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        # Backend-specific extras (embedder, close, compact, ping) pass through.
+        if name == "inner":
+            raise AttributeError(name)
+        return getattr(self.inner, name)
+
+    def _corpus_sizes(self) -> dict[tuple[str, ...], float]:
+        out: dict[tuple[str, ...], float] = {}
+        for tenant_id in list(self._tenants):
+            for state, n in self.inner.chunk_stats(tenant_id).items():
+                out[(tenant_id, state)] = n
+        return out
+
+    def corpus_version(self, tenant_id: str) -> str:
+        return self.inner.corpus_version(tenant_id)
+
+    def upsert(self, chunk: DocumentChunk) -> None:
+        self.upsert_many([chunk])
+
+    def upsert_many(self, chunks: Sequence[DocumentChunk]) -> None:
+        with self._timers["upsert"].time():
+            self.inner.upsert_many(chunks)
+        self._written.inc(len(chunks))
+        self._tenants.update(c.metadata.tenant_id for c in chunks)
+
+    def replace_documents(
+        self, tenant_id: str, doc_ids: Iterable[str], chunks: Sequence[DocumentChunk]
+    ) -> int:
+        with self._timers["replace_documents"].time():
+            replaced = self.inner.replace_documents(tenant_id, doc_ids, chunks)
+        self._written.inc(len(chunks))
+        self._tenants.add(tenant_id)
+        return replaced
+
+    def chunk_stats(self, tenant_id: str) -> dict[str, int]:
+        return self.inner.chunk_stats(tenant_id)
+
+    def set_guard_verdicts(self, tenant_id: str, chunks: Sequence[DocumentChunk]) -> None:
+        self.inner.set_guard_verdicts(tenant_id, chunks)
+
+    def compact_tenant(self, tenant_id: str) -> None:
+        with self._timers["compact_tenant"].time():
+            self.inner.compact_tenant(tenant_id)
+
+    def query(
+        self, *, tenant_id: str, text: str, top_k: int, where: MetadataFilter | None = None
+    ) -> list[tuple[DocumentChunk, float]]:
+        self._tenants.add(tenant_id)
+        with self._timers["query"].time():
+            return self.inner.query(tenant_id=tenant_id, text=text, top_k=top_k, where=where)
+
+    def lexical_query(
+        self, *, tenant_id: str, text: str, top_k: int, where: MetadataFilter | None = None
+    ) -> list[tuple[DocumentChunk, float]]:
+        self._tenants.add(tenant_id)
+        with self._timers["lexical_query"].time():
+            return self.inner.lexical_query(
+                tenant_id=tenant_id, text=text, top_k=top_k, where=where
+            )
@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import math
+from collections.abc import Iterable, Sequence
+
+import numpy as np
+
+from app.store.dense import (
+    _rows_by_tenant,
+    _TenantMatrix,
+    filtered_top_k,
+    live_top_k,
+    top_k_indices,
+)
+from app.store.embeddings import EmbeddingProvider, HashEmbedding
+from app.store.metadata import DocumentChunk, MetadataFilter
+from app.store.vector import VectorStoreAdapter
+
+_ASSIGN_BLOCK = 65_536
+
+
+def _assign(x: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Nearest centroid (max inner product) for each row, in bounded-memory blocks."""
+
+    out = np.empty(x.shape[0], dtype=np.intp)
+    for i in range(0, x.shape[0], _ASSIGN_BLOCK):
+        out[i : i + _ASSIGN_BLOCK] = np.argmax(x[i : i + _ASSIGN_BLOCK] @ centroids.T, axis=1)
+    return out
+
+
+def _kmeans(x: np.ndarray, k: int, *, iters: int, rng: np.random.Generator) -> np.ndarray:
+    """Spherical k-means over unit vectors; returns unit-normalized centroids."""
+
+    centroids = x[rng.choice(x.shape[0], size=k, replace=False)].copy()
+    for _ in range(iters):
+        assign = _assign(x, centroids)
+        counts = np.bincount(assign, minlength=k)
+        nonempty = np.flatnonzero(counts)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[nonempty]
+        sums = np.add.reduceat(x[np.argsort(assign, kind="stable")], starts, axis=0)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0.0] = 1.0
+        # Empty clusters keep their previous centroid.
+        centroids[nonempty] = sums / norms
+    return centroids
+
+
+class _InvertedList:
+    """Contiguous vectors for one IVF cell plus their row ids in the tenant matrix."""
+
+    def __init__(self, vectors: np.ndarray, rows: np.ndarray) -> None:
+        self.vectors = vectors
+        self.rows = rows
+        self.size = rows.shape[0]
+
+    def extend(self, rows: np.ndarray, vecs: np.ndarray) -> None:
+        n = rows.shape[0]
+        if self.size + n > self.rows.shape[0]:
+            cap = max(16, self.rows.shape[0])
+            while cap < self.size + n:
+                cap *= 2
+            vectors = np.zeros((cap, self.vectors.shape[1]), dtype=np.float32)
+            grown_rows = np.zeros(cap, dtype=np.int64)
+            vectors[: self.size] = self.vectors[: self.size]
+            grown_rows[: self.size] = self.rows[: self.size]
+            self.vectors, self.rows = vectors, grown_rows
+        self.vectors[self.size : self.size + n] = vecs
+        self.rows[self.size : self.size + n] = rows
+        self.size += n
+
+
+class _IVFPartition:
+    """One tenant's IVF index. Centroids are trained on that tenant's data only."""
+
+    def __init__(self, tenant_id: str, dims: int) -> None:
+        self.data = _TenantMatrix(tenant_id, dims)
+        self.centroids: np.ndarray | None = None
+        self.lists: list[_InvertedList] = []
+        self.trained_size = 0
+        # Set (under the store lock) while a training run is in flight.
+        self.training = False
+
+    @staticmethod
+    def fit(
+        x: np.ndarray, *, nlist: int, iters: int, sample: int, rng: np.random.Generator
+    ) -> tuple[np.ndarray, list[_InvertedList]]:
+        """Centroids and inverted lists for the rows of `x`; touches no shared state."""
+
+        k = nlist or int(math.sqrt(x.shape[0]))
+        k = max(1, min(k, x.shape[0]))
+        if x.shape[0] > sample * k:
+            train_x = x[rng.choice(x.shape[0], size=sample * k, replace=False)]
+        else:
+            train_x = x
+        centroids = _kmeans(train_x, k, iters=iters, rng=rng)
+
+        assign = _assign(x, centroids)
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(k + 1))
+        lists = [
+            _InvertedList(x[order[lo:hi]].copy(), order[lo:hi].astype(np.int64))
+            for lo, hi in zip(bounds[:-1], bounds[1:], strict=True)
+        ]
+        return centroids, lists
+
+    def route(self, start: int, stop: int) -> None:
+        """Append rows [start, stop) to their nearest cells."""
+
+        if start >= stop:
+            return
+        vecs = self.data.vectors[start:stop]
+        assign = _assign(vecs, self.centroids)
+        order = np.argsort(assign, kind="stable")
+        cells, bounds = np.unique(assign[order], return_index=True)
+        for cell, lo, hi in zip(cells, bounds, [*bounds[1:], order.shape[0]], strict=True):
+            sel = order[lo:hi]
+            self.lists[cell].extend(sel.astype(np.int64) + start, vecs[sel])
+
+
+class IVFVectorStore(VectorStoreAdapter):
+    """Approximate nearest-neighbour store: per-tenant IVF over spherical k-means cells.
+
+    Tenants below `train_min` chunks are scanned exactly. Once trained, new chunks are
+    appended to their nearest cell and the tenant is re-clustered after it grows by
+    `retrain_factor`, so cells track the corpus without a rebuild on every upsert.
+    k-means runs on a snapshot of the tenant's rows outside the store lock (queries keep
+    using the previous cells, or an exact scan) and the result is swapped in under it.
+
+    A metadata filter that leaves fewer rows than the probed cells would hold is answered
+    by an exact scan of just those rows; broader filters mask the probed cells.
+
+    Tuning:
+      - nlist: cells per tenant (0 = sqrt(chunks) at training time)
+      - nprobe: cells scanned per query; higher = better recall, more latency
+    """
+
+    def __init__(
+        self,
+        *,
+        embedder: EmbeddingProvider | None = None,
+        lexical: bool = False,
+        nlist: int = 0,
+        nprobe: int = 8,
+        train_min: int = 4096,
+        retrain_factor: float = 4.0,
+        kmeans_iters: int = 10,
+        train_sample: int = 256,
+        seed: int = 0,
+    ) -> None:
+        super().__init__(lexical=lexical)
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.embedder = embedder or HashEmbedding()
+        self._dims = self.embedder.dims
+        self._train_min = train_min
+        self._retrain_factor = retrain_factor
+        self._kmeans_iters = kmeans_iters
+        self._train_sample = train_sample
+        self._rng = np.random.default_rng(seed)
+        self._by_tenant: dict[str, _IVFPartition] = {}
+
+    def upsert(self, chunk: DocumentChunk) -> None:
+        self.upsert_many([chunk])
+
+    def upsert_many(self, chunks: Sequence[DocumentChunk]) -> None:
+        if not chunks:
+            return
+        vecs = self.embedder.embed_many([c.text for c in chunks])
+        by_tenant = _rows_by_tenant(chunks)
+        due: list[tuple[str, _IVFPartition]] = []
+        with self._lock:
+            for tenant_id, rows in by_tenant.items():
+                part = self._partition(tenant_id)
+                if self._append(part, [chunks[i] for i in rows], vecs[rows]):
+                    due.append((tenant_id, part))
+        self._bump_corpus_versions(by_tenant)
+        for tenant_id, part in due:
+            self._train(tenant_id, part)
+
+    def replace_documents(
+        self, tenant_id: str, doc_ids: Iterable[str], chunks: Sequence[DocumentChunk]
+    ) -> int:
+        vecs = self.embedder.embed_many([c.text for c in chunks]) if chunks else None
+        with self._lock:
+            part = self._partition(tenant_id)
+            killed = part.data.ledger.kill(doc_ids)
+            self._kill_lexical(tenant_id, killed)
+            due = bool(chunks) and self._append(part, chunks, vecs)
+        self._bump_corpus_versions([tenant_id])
+        if due:
+            self._train(tenant_id, part)
+        self._maybe_compact(tenant_id, part.data.ledger)
+        return len(killed)
+
+    def chunk_stats(self, tenant_id: str) -> dict[str, int]:
+        with self._lock:
+            part = self._by_tenant.get(tenant_id)
+            return part.data.ledger.stats() if part is not None else {"live": 0, "dead": 0}
+
+    def compact_tenant(self, tenant_id: str) -> None:
+        with self._lock:
+            part = self._by_tenant.get(tenant_id)
+            if part is None or not part.data.ledger.dead_count:
+                return
+            fresh = _IVFPartition(tenant_id, self._dims)
+            fresh.data, keep = part.data.compacted()
+            # Cells are re-clustered on the surviving rows (row ids changed anyway); until
+            # then the tenant is scanned exactly.
+            fresh.training = fresh.data.size >= self._train_min
+            self._by_tenant[tenant_id] = fresh
+            self._compact_lexical(tenant_id, keep)
+        if fresh.training:
+            self._train(tenant_id, fresh)
+
+    def set_guard_verdicts(self, tenant_id: str, chunks: Sequence[DocumentChunk]) -> None:
+        with self._lock:
+            part = self._by_tenant.get(tenant_id)
+            if part is not None:
+                part.data.set_guard_verdicts(chunks)
+
+    def _partition(self, tenant_id: str) -> _IVFPartition:
+        part = self._by_tenant.get(tenant_id)
+        if part is None:
+            part = self._by_tenant[tenant_id] = _IVFPartition(tenant_id, self._dims)
+        return part
+
+    def _append(
+        self, part: _IVFPartition, chunks: Sequence[DocumentChunk], vecs: np.ndarray
+    ) -> bool:
+        """Append under the lock; True when the caller should now run `_train`."""
+
+        start = part.data.size
+        part.data.extend(chunks, vecs)
+        self._index_lexical(chunks[0].metadata.tenant_id, chunks)
+        return self._index(part, start)
+
+    def _index(self, part: _IVFPartition, start: int) -> bool:
+        """Route rows [start, size) to their cells; True when (re)training is now due."""
+
+        size = part.data.size
+        if part.centroids is None:
+            due = size >= self._train_min
+        else:
+            part.route(start, size)
+            due = size >= part.trained_size * self._retrain_factor
+        if due and not part.training:
+            part.training = True
+            return True
+        return False
+
+    def _train(self, tenant_id: str, part: _IVFPartition) -> None:
+        """Re-cluster `part` (marked `training` by the caller) without holding the lock."""
+
+        with self._lock:
+            # Rows below size are never rewritten in place, so the view stays valid.
+            x = part.data.vectors[: part.data.size]
+            rng = np.random.default_rng(self._rng.integers(2**63))
+        try:
+            centroids, lists = part.fit(
+                x, nlist=self.nlist, iters=self._kmeans_iters, sample=self._train_sample, rng=rng
+            )
+        except BaseException:
+            with self._lock:
+                part.training = False
+            raise
+        with self._lock:
+            part.training = False
+            if self._by_tenant.get(tenant_id) is not part:
+                return  # compacted meanwhile: its replacement trains itself
+            # Swap in as a unit so concurrent query snapshots stay consistent, then route
+            # the rows appended while k-means ran.
+            part.centroids, part.lists, part.trained_size = centroids, lists, x.shape[0]
+            part.route(x.shape[0], part.data.size)
+
+    def query(
+        self, *, tenant_id: str, text: str, top_k: int, where: MetadataFilter | None = None
+    ) -> list[tuple[DocumentChunk, float]]:
+        qv = self.embedder.embed_query(text)
+        k = max(1, top_k)
+
+        with self._lock:
+            part = self._by_tenant.get(tenant_id)
+            if part is None:
+                return []
+            chunks, dead = part.data.chunks, part.data.ledger.dead_mask()
+            allow = part.data.meta.select(where)
+            matrix = part.data.vectors[: part.data.size]
+            if part.centroids is None or (
+                allow is not None
+                and np.count_nonzero(allow) * len(part.lists) <= self.nprobe * part.data.size
+            ):
+                probed = None
+            else:
+                cells = top_k_indices(part.centroids @ qv, self.nprobe)
+                probed = [
+                    (
+                        part.lists[c].vectors[: part.lists[c].size],
+                        part.lists[c].rows[: part.lists[c].size],
+                    )
+                    for c in cells
+                ]
+
+        if probed is None:
+            rows, scores = filtered_top_k(matrix, qv, k, dead=dead, allow=allow)
+            return list(zip(chunks.take(rows), scores.tolist(), strict=True))
+
+        scores = np.concatenate([vecs @ qv for vecs, _ in probed])
+        rows = np.concatenate([r for _, r in probed])
+        excluded = dead[rows] if dead is not None else None
+        if allow is not None:
+            excluded = ~allow[rows] if excluded is None else excluded | ~allow[rows]
+        top = live_top_k(scores, k, excluded)
+        return list(zip(chunks.take(rows[top]), scores[top].tolist(), strict=True))
+
+    def _chunks_at(self, tenant_id: str, rows: Sequence[int]) -> list[DocumentChunk]:
+        return self._by_tenant[tenant_id].data.chunks.take(rows)
+
+    def _eligible(self, tenant_id: str, where: MetadataFilter) -> np.ndarray | None:
+        part = self._by_tenant.get(tenant_id)
+        return part.data.meta.select(where) if part is not None else None
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import heapq
+import math
+import re
+import sys
+import threading
+from bisect import bisect_left
+from collections import Counter
+from collections.abc import Sequence
+from itertools import accumulate
+
+import numpy as np
+
+_TERM = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    return _TERM.findall(text.casefold())
+
+
+class _Postings:
+    """Rows containing a term (ascending) with their term frequencies.
+
+    `max_tf` and `min_len` bound the term's BM25 contribution for MaxScore pruning.
+    """
+
+    __slots__ = ("rows", "tfs", "max_tf", "min_len")
+
+    def __init__(self) -> None:
+        self.rows: list[int] = []
+        self.tfs: list[int] = []
+        self.max_tf = 0
+        self.min_len = sys.maxsize
+
+
+class _TenantIndex:
+    def __init__(self) -> None:
+        self.postings: dict[str, _Postings] = {}
+        self.lengths: list[int] = []
+        self.total_len = 0  # live rows only
+        self.dead: set[int] = set()
+        self.lock = threading.Lock()
+
+
+class BM25Index:
+    """Per-tenant inverted index with BM25 top-k.
+
+    Rows are numbered per tenant in insertion order, matching the row order of the store
+    that owns the index, so hits resolve to chunks without storing them twice.
+
+    Top-k uses MaxScore: query terms are ordered by their score upper bound, and once the
+    k-th best score exceeds the summed bounds of the weakest terms, documents that only
+    contain those terms are never visited; their postings are only probed (by binary
+    search) for documents that are still competitive.
+    """
+
+    def __init__(self, *, k1: float = 1.2, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self._by_tenant: dict[str, _TenantIndex] = {}
+        self._lock = threading.Lock()
+
+    def _tenant(self, tenant_id: str, *, create: bool) -> _TenantIndex | None:
+        with self._lock:
+            ti = self._by_tenant.get(tenant_id)
+            if ti is None and create:
+                ti = self._by_tenant[tenant_id] = _TenantIndex()
+            return ti
+
+    def add(self, tenant_id: str, texts: Sequence[str]) -> None:
+        """Index `texts` as the tenant's next rows, in order."""
+
+        ti = self._tenant(tenant_id, create=True)
+        with ti.lock:
+            for text in texts:
+                row = len(ti.lengths)
+                counts = Counter(tokenize(text))
+                length = sum(counts.values())
+                ti.lengths.append(length)
+                ti.total_len += length
+                for term, tf in counts.items():
+                    p = ti.postings.get(term)
+                    if p is None:
+                        p = ti.postings[term] = _Postings()
+                    p.rows.append(row)
+                    p.tfs.append(tf)
+                    p.max_tf = max(p.max_tf, tf)
+                    p.min_len = min(p.min_len, length)
+
+    def kill(self, tenant_id: str, rows: Sequence[int]) -> None:
+        """Tombstone rows: search skips them and they leave the length statistics.
+
+        Document frequencies still count them until `compact`, which only makes IDF
+        slightly conservative in between.
+        """
+
+        ti = self._tenant(tenant_id, create=False)
+        if ti is None:
+            return
+        with ti.lock:
+            for row in rows:
+                if row not in ti.dead:
+                    ti.dead.add(row)
+                    ti.total_len -= ti.lengths[row]
+
+    def compact(self, tenant_id: str, keep: np.ndarray) -> None:
+        """Renumber the tenant to the rows in `keep` (ascending), dropping all others."""
+
+        ti = self._tenant(tenant_id, create=False)
+        if ti is None:
+            return
+        with ti.lock:
+            remap = np.full(len(ti.lengths), -1, dtype=np.int64)
+            remap[keep] = np.arange(keep.shape[0])
+            lengths = np.asarray(ti.lengths, dtype=np.int64)[keep]
+            postings: dict[str, _Postings] = {}
+            for term, old in ti.postings.items():
+                rows = remap[np.asarray(old.rows, dtype=np.int64)]
+                live = rows >= 0
+                if not live.any():
+                    continue
+                p = postings[term] = _Postings()
+                p.rows = rows[live].tolist()
+                p.tfs = np.asarray(old.tfs, dtype=np.int64)[live].tolist()
+                p.max_tf = max(p.tfs)
+                p.min_len = int(lengths[rows[live]].min())
+            ti.postings = postings
+            ti.lengths = lengths.tolist()
+            ti.total_len = int(lengths.sum())
+            ti.dead = set()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._by_tenant.clear()
+
+    def size(self, tenant_id: str) -> int:
+        ti = self._tenant(tenant_id, create=False)
+        return 0 if ti is None else len(ti.lengths) - len(ti.dead)
+
+    def search(
+        self, tenant_id: str, text: str, top_k: int, *, allow: np.ndarray | None = None
+    ) -> list[tuple[int, float]]:
+        """(row, score) of the top_k BM25 matches, best first (ties: lower row first).
+
+        `allow` is an optional row mask (metadata pre-filter): other rows are skipped
+        before scoring, like tombstoned ones.
+        """
+
+        ti = self._tenant(tenant_id, create=False)
+        if ti is None or top_k <= 0 or (allow is not None and not allow.any()):
+            return []
+        with ti.lock:
+            return self._search(ti, set(tokenize(text)), top_k, allow)
+
+    def _search(
+        self, ti: _TenantIndex, terms: set[str], k: int, allow: np.ndarray | None
+    ) -> list[tuple[int, float]]:
+        n = len(ti.lengths) - len(ti.dead)
+        if n <= 0:
+            return []
+        k1 = self.k1
+        # BM25 length normalization: tf + k1 * (1 - b + b * len / avg_len)
+        norm_a = k1 * (1.0 - self.b)
+        norm_b = k1 * self.b * n / ti.total_len if ti.total_len else 0.0
+
+        plan: list[tuple[float, float, _Postings]] = []
+        for term in terms:
+            p = ti.postings.get(term)
+            if p is None:
+                continue
+            df = len(p.rows)
+            idf = math.log1p((n - df + 0.5) / (df + 0.5))
+            # tf/(tf + norm) grows with tf and shrinks with length: bound with max_tf, min_len.
+            bound = idf * p.max_tf * (k1 + 1.0) / (p.max_tf + norm_a + norm_b * p.min_len)
+            plan.append((bound, idf * (k1 + 1.0), p))
+        if not plan:
+            return []
+        plan.sort(key=lambda t: t[0])
+
+        m = len(plan)
+        cum = list(accumulate(t[0] for t in plan))
+        rows = [t[2].rows for t in plan]
+        tfs = [t[2].tfs for t in plan]
+        weights = [t[1] for t in plan]
+        lengths = ti.lengths
+        dead = ti.dead
+        pos = [0] * m
+        heap: list[tuple[float, int]] = []  # (score, -row): min-heap of the current top-k
+        threshold = 0.0
+        first = 0  # plan[first:] are essential: a new top-k doc must contain one of them
+
+        while first < m:
+            doc = min(
+                (rows[i][pos[i]] for i in range(first, m) if pos[i] < len(rows[i])), default=-1
+            )
+            if doc < 0:
+                break
+            if (dead and doc in dead) or (allow is not None and not allow[doc]):
+                for i in range(first, m):
+                    if pos[i] < len(rows[i]) and rows[i][pos[i]] == doc:
+                        pos[i] += 1
+                continue
+            norm = norm_a + norm_b * lengths[doc]
+            score = 0.0
+            for i in range(first, m):
+                p = pos[i]
+                if p < len(rows[i]) and rows[i][p] == doc:
+                    tf = tfs[i][p]
+                    score += weights[i] * tf / (tf + norm)
+                    pos[i] = p + 1
+            for i in range(first - 1, -1, -1):
+                if score + cum[i] <= threshold:
+                    break
+                p = pos[i] = bisect_left(rows[i], doc, pos[i])
+                if p < len(rows[i]) and rows[i][p] == doc:
+                    tf = tfs[i][p]
+                    score += weights[i] * tf / (tf + norm)
+
+            if len(heap) < k:
+                heapq.heappush(heap, (score, -doc))
+            elif (score, -doc) > heap[0]:
+                heapq.heapreplace(heap, (score, -doc))
+            if len(heap) == k:
+                threshold = heap[0][0]
+                while first < m and cum[first] <= threshold:
+                    first += 1
+
+        return [(-neg, score) for score, neg in sorted(heap, reverse=True)]
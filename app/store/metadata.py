@@ -1,8 +1,14 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import UTC, datetime
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+
+
+def utc_timestamp(dt: datetime) -> float:
+    """POSIX seconds; naive datetimes (created_at defaults to utcnow) are taken as UTC."""
+
+    return (dt if dt.tzinfo else dt.replace(tzinfo=UTC)).timestamp()
 
 
 class ChunkMetadata(BaseModel):
@@ -11,12 +17,53 @@ class ChunkMetadata(BaseModel):
     doc_id: str
     chunk_id: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    # Retrieval-guard verdict (injection scan + source allowlist), computed at ingest.
+    # Only trusted while guard_version matches the running guard.
+    guard_ok: bool | None = None
+    guard_version: str | None = None
 
 
 class DocumentChunk(BaseModel):
     metadata: ChunkMetadata
     text: str
-    # Optional future fields: embedding vector, access labels, etc.
+    # Unit-normalized embedding, computed once by the store at upsert time.
+    embedding: list[float] | None = Field(default=None, repr=False)
+    # Optional future fields: access labels, etc.
+
+
+class MetadataFilter(BaseModel):
+    """Pre-filter over chunk metadata, applied by the store before any scoring.
+
+    Clauses are ANDed; None means "any". `created_after` is inclusive and
+    `created_before` exclusive.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    sources: frozenset[str] | None = None
+    doc_ids: frozenset[str] | None = None
+    created_after: datetime | None = None
+    created_before: datetime | None = None
+
+    def is_empty(self) -> bool:
+        return (
+            self.sources is None
+            and self.doc_ids is None
+            and self.created_after is None
+            and self.created_before is None
+        )
+
+    def matches(self, meta: ChunkMetadata) -> bool:
+        if self.sources is not None and meta.source not in self.sources:
+            return False
+        if self.doc_ids is not None and meta.doc_id not in self.doc_ids:
+            return False
+        if self.created_after is None and self.created_before is None:
+            return True
+        ts = utc_timestamp(meta.created_at)
+        if self.created_after is not None and ts < utc_timestamp(self.created_after):
+            return False
+        return self.created_before is None or ts < utc_timestamp(self.created_before)
 
 
 class IngestRequest(BaseModel):
@@ -26,6 +73,10 @@ class IngestRequest(BaseModel):
     doc_id: str | None = None
 
 
+class IngestBatchRequest(BaseModel):
+    documents: list[IngestRequest]
+
+
 class ChatRequest(BaseModel):
     tenant_id: str
     question: str
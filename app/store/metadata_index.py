@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import numpy as np
+
+from app.store.metadata import DocumentChunk, MetadataFilter, utc_timestamp
+
+
+class MetadataIndex:
+    """Per-tenant metadata columns in store row order, for filtering before scoring.
+
+    `source` and `doc_id` map each value to its rows (ascending, so a clause is a scatter
+    into a row bitmap); `created_at` is a float column with a lazily rebuilt argsort, so a
+    time range is two binary searches. `select` ANDs the clauses into one bitmap, and
+    stores only rank the rows it leaves set.
+    """
+
+    def __init__(self) -> None:
+        self.rows = 0
+        self._sources: dict[str, list[int]] = {}
+        self._docs: dict[str, list[int]] = {}
+        self._created = np.zeros(1024, dtype=np.float64)
+        self._order: np.ndarray | None = None
+
+    def append(self, chunks: Sequence[DocumentChunk]) -> None:
+        """Register `chunks` as the tenant's next rows, in order."""
+
+        need = self.rows + len(chunks)
+        if need > self._created.shape[0]:
+            grown = np.zeros(max(need, 2 * self._created.shape[0]), dtype=np.float64)
+            grown[: self.rows] = self._created[: self.rows]
+            self._created = grown
+        for row, c in enumerate(chunks, start=self.rows):
+            self._sources.setdefault(c.metadata.source, []).append(row)
+            self._docs.setdefault(c.metadata.doc_id, []).append(row)
+            self._created[row] = utc_timestamp(c.metadata.created_at)
+        self.rows = need
+        self._order = None
+
+    def select(self, where: MetadataFilter | None) -> np.ndarray | None:
+        """Bool mask over rows [0, rows) matching `where`; None when it has no clauses."""
+
+        if where is None or where.is_empty():
+            return None
+        mask = np.ones(self.rows, dtype=bool)
+        if where.sources is not None:
+            mask &= self._rows_mask(self._sources, where.sources)
+        if where.doc_ids is not None:
+            mask &= self._rows_mask(self._docs, where.doc_ids)
+        if where.created_after is not None or where.created_before is not None:
+            if self._order is None:
+                self._order = np.argsort(self._created[: self.rows], kind="stable")
+            ts = self._created[self._order]
+            lo, hi = 0, self.rows
+            if where.created_after is not None:
+                lo = int(np.searchsorted(ts, utc_timestamp(where.created_after), "left"))
+            if where.created_before is not None:
+                hi = int(np.searchsorted(ts, utc_timestamp(where.created_before), "left"))
+            in_range = np.zeros(self.rows, dtype=bool)
+            in_range[self._order[lo:hi]] = True
+            mask &= in_range
+        return mask
+
+    def _rows_mask(self, postings: dict[str, list[int]], values: frozenset[str]) -> np.ndarray:
+        out = np.zeros(self.rows, dtype=bool)
+        for value in values:
+            rows = postings.get(value)
+            if rows:
+                out[rows] = True
+        return out
+
+    def compacted(self, keep: np.ndarray) -> MetadataIndex:
+        """Index over the rows in `keep` (ascending), renumbered 0.."""
+
+        remap = np.full(self.rows, -1, dtype=np.int64)
+        remap[keep] = np.arange(keep.shape[0])
+        out = MetadataIndex()
+        out.rows = keep.shape[0]
+        out._created = np.zeros(max(1024, keep.shape[0]), dtype=np.float64)
+        out._created[: out.rows] = self._created[keep]
+        for src, dst in ((self._sources, out._sources), (self._docs, out._docs)):
+            for value, rows in src.items():
+                moved = remap[np.asarray(rows, dtype=np.int64)]
+                moved = moved[moved >= 0]
+                if moved.size:
+                    dst[value] = moved.tolist()
+        return out
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import json
+import queue
+import socket
+import struct
+import threading
+from collections.abc import Iterable, Iterator, Sequence
+from contextlib import contextmanager
+from typing import Any
+
+from app.store.metadata import DocumentChunk, MetadataFilter
+from app.store.vector import VectorStoreAdapter
+
+# Wire format: 4-byte big-endian length + UTF-8 JSON. JSON (not pickle) so a peer on the
+# socket can never make the other side execute code.
+_HEADER = struct.Struct(">I")
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+# Read-only ops, safe to resend when a pooled connection turns out to be dead.
+_IDEMPOTENT_OPS = frozenset({"ping", "query", "lexical_query", "chunk_stats", "corpus_version"})
+
+
+class StoreServerError(RuntimeError):
+    """The store server rejected or failed a request."""
+
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes | None:
+    buf = bytearray()
+    while len(buf) < n:
+        part = sock.recv(n - len(buf))
+        if not part:
+            if buf:
+                raise ConnectionError("truncated frame")
+            return None
+        buf += part
+    return bytes(buf)
+
+
+def recv_frame(sock: socket.socket) -> Any | None:
+    """Read one frame; None on clean EOF."""
+
+    header = _recv_exact(sock, _HEADER.size)
+    if header is None:
+        return None
+    (size,) = _HEADER.unpack(header)
+    if size > MAX_FRAME_BYTES:
+        raise ConnectionError("frame too large")
+    body = _recv_exact(sock, size)
+    if body is None:
+        raise ConnectionError("truncated frame")
+    return json.loads(body)
+
+
+def send_frame(sock: socket.socket, obj: Any) -> None:
+    body = json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if len(body) > MAX_FRAME_BYTES:
+        raise ValueError("frame too large")
+    sock.sendall(_HEADER.pack(len(body)) + body)
+
+
+def chunk_to_wire(chunk: DocumentChunk) -> dict[str, Any]:
+    return chunk.model_dump(mode="json", exclude={"embedding"})
+
+
+def chunk_from_wire(data: dict[str, Any]) -> DocumentChunk:
+    return DocumentChunk.model_validate(data)
+
+
+def filter_to_wire(where: MetadataFilter | None) -> dict[str, Any] | None:
+    return where.model_dump(mode="json", exclude_none=True) if where is not None else None
+
+
+def filter_from_wire(data: dict[str, Any] | None) -> MetadataFilter | None:
+    return MetadataFilter.model_validate(data) if data is not None else None
+
+
+class RemoteVectorStore(VectorStoreAdapter):
+    """Client for `app.store.server` over a Unix socket, with a bounded connection pool.
+
+    Every uvicorn worker talks to the same server process, so ingest on one worker is
+    immediately visible to chat on all others; the server serializes writes.
+    """
+
+    def __init__(self, socket_path: str, *, pool_size: int = 8, timeout: float = 10.0) -> None:
+        super().__init__()
+        self._socket_path = socket_path
+        self._timeout = timeout
+        self._idle: queue.LifoQueue[socket.socket] = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max(1, pool_size))
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self._timeout)
+        try:
+            sock.connect(self._socket_path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    @contextmanager
+    def _connection(self, *, fresh: bool = False) -> Iterator[socket.socket]:
+        with self._slots:
+            sock = None
+            if not fresh:
+                try:
+                    sock = self._idle.get_nowait()
+                except queue.Empty:
+                    pass
+            if sock is None:
+                sock = self._connect()
+            try:
+                yield sock
+            except BaseException:
+                # The stream may be mid-frame; never hand it to another caller.
+                sock.close()
+                raise
+            self._idle.put(sock)
+
+    def _call(self, op: str, **args: Any) -> Any:
+        # A pooled connection the server has since closed (restart, idle reaping) is
+        # dropped; read-only ops are retried once on a fresh connection.
+        attempts = 2 if op in _IDEMPOTENT_OPS else 1
+        for attempt in range(attempts):
+            try:
+                with self._connection(fresh=attempt > 0) as sock:
+                    send_frame(sock, {"op": op, "args": args})
+                    resp = recv_frame(sock)
+                    if resp is None:
+                        # Raised inside the block, so the socket is closed, not pooled.
+                        raise ConnectionError("store server closed the connection")
+                break
+            except ConnectionError:
+                if attempt + 1 == attempts:
+                    raise
+        if not resp.get("ok"):
+            raise StoreServerError(str(resp.get("error", "unknown_error")))
+        return resp.get("result")
+
+    def ping(self) -> bool:
+        return self._call("ping") == "pong"
+
+    def upsert(self, chunk: DocumentChunk) -> None:
+        self.upsert_many([chunk])
+
+    def upsert_many(self, chunks: Sequence[DocumentChunk]) -> None:
+        if chunks:
+            self._call("upsert_many", chunks=[chunk_to_wire(c) for c in chunks])
+
+    def query(
+        self, *, tenant_id: str, text: str, top_k: int, where: MetadataFilter | None = None
+    ) -> list[tuple[DocumentChunk, float]]:
+        rows = self._call(
+            "query", tenant_id=tenant_id, text=text, top_k=top_k, where=filter_to_wire(where)
+        )
+        return [(chunk_from_wire(c), float(score)) for c, score in rows]
+
+    def replace_documents(
+        self, tenant_id: str, doc_ids: Iterable[str], chunks: Sequence[DocumentChunk]
+    ) -> int:
+        return int(
+            self._call(
+                "replace_documents",
+                tenant_id=tenant_id,
+                doc_ids=list(doc_ids),
+                chunks=[chunk_to_wire(c) for c in chunks],
+            )
+        )
+
+    def chunk_stats(self, tenant_id: str) -> dict[str, int]:
+        return dict(self._call("chunk_stats", tenant_id=tenant_id))
+
+    def compact_tenant(self, tenant_id: str) -> None:
+        self._call("compact_tenant", tenant_id=tenant_id)
+
+    def lexical_query(
+        self, *, tenant_id: str, text: str, top_k: int, where: MetadataFilter | None = None
+    ) -> list[tuple[DocumentChunk, float]]:
+        rows = self._call(
+            "lexical_query",
+            tenant_id=tenant_id,
+            text=text,
+            top_k=top_k,
+            where=filter_to_wire(where),
+        )
+        return [(chunk_from_wire(c), float(score)) for c, score in rows]
+
+    def corpus_version(self, tenant_id: str) -> str:
+        # The server's store owns the version, so writes from any worker invalidate.
+        return str(self._call("corpus_version", tenant_id=tenant_id))
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
@@ -0,0 +1,140 @@
+"""Local store server: one process owns the vector store, uvicorn workers share it.
+
+Usage:
+  python -m app.store.server                      # STORE_SOCKET_PATH, STORE_SERVER_BACKEND
+  python -m app.store.server --socket ./data/store.sock --backend mmap
+  VECTOR_BACKEND=remote uvicorn app.main:create_app --factory --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import socketserver
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from app.core.config import get_settings
+from app.core.logging import configure_logging
+from app.store.factory import build_store
+from app.store.remote import (
+    chunk_from_wire,
+    chunk_to_wire,
+    filter_from_wire,
+    recv_frame,
+    send_frame,
+)
+from app.store.vector import VectorStoreAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    server: StoreServer
+
+    def handle(self) -> None:
+        while True:
+            try:
+                req = recv_frame(self.request)
+            except (ConnectionError, ValueError, OSError):
+                return
+            if req is None:
+                return
+            send_frame(self.request, self.server.dispatch(req))
+
+
+class StoreServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serves a fixed set of store operations over a Unix socket (mode 0600)."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, store: VectorStoreAdapter) -> None:
+        path = Path(socket_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.unlink(missing_ok=True)  # stale socket from a previous run
+        super().__init__(socket_path, _Handler)
+        os.chmod(socket_path, 0o600)
+        self.store = store
+        self._ops: dict[str, Callable[..., Any]] = {
+            "ping": lambda: "pong",
+            "upsert_many": self._upsert_many,
+            "replace_documents": self._replace_documents,
+            "chunk_stats": self._chunk_stats,
+            "compact_tenant": self._compact_tenant,
+            "query": self._query,
+            "lexical_query": self._lexical_query,
+            "corpus_version": self._corpus_version,
+        }
+
+    def _upsert_many(self, *, chunks: list[dict[str, Any]]) -> None:
+        self.store.upsert_many([chunk_from_wire(c) for c in chunks])
+
+    def _replace_documents(
+        self, *, tenant_id: str, doc_ids: list[str], chunks: list[dict[str, Any]]
+    ) -> int:
+        return self.store.replace_documents(
+            str(tenant_id), [str(d) for d in doc_ids], [chunk_from_wire(c) for c in chunks]
+        )
+
+    def _chunk_stats(self, *, tenant_id: str) -> dict[str, int]:
+        return self.store.chunk_stats(str(tenant_id))
+
+    def _compact_tenant(self, *, tenant_id: str) -> None:
+        self.store.compact_tenant(str(tenant_id))
+
+    def _query(
+        self, *, tenant_id: str, text: str, top_k: int, where: dict[str, Any] | None = None
+    ) -> list[list[Any]]:
+        hits = self.store.query(
+            tenant_id=tenant_id, text=text, top_k=int(top_k), where=filter_from_wire(where)
+        )
+        return [[chunk_to_wire(c), score] for c, score in hits]
+
+    def _lexical_query(
+        self, *, tenant_id: str, text: str, top_k: int, where: dict[str, Any] | None = None
+    ) -> list[list[Any]]:
+        hits = self.store.lexical_query(
+            tenant_id=tenant_id, text=text, top_k=int(top_k), where=filter_from_wire(where)
+        )
+        return [[chunk_to_wire(c), score] for c, score in hits]
+
+    def _corpus_version(self, *, tenant_id: str) -> str:
+        return self.store.corpus_version(str(tenant_id))
+
+    def dispatch(self, req: Any) -> dict[str, Any]:
+        if not isinstance(req, dict) or not isinstance(req.get("args", {}), dict):
+            return {"ok": False, "error": "bad_request"}
+        op = self._ops.get(str(req.get("op")))
+        if op is None:
+            return {"ok": False, "error": "unknown_op"}
+        try:
+            return {"ok": True, "result": op(**req.get("args", {}))}
+        except Exception as e:
+            logger.warning(f"Store server op '{req.get('op')}' failed: {type(e).__name__}")
+            return {"ok": False, "error": type(e).__name__}
+
+    def server_close(self) -> None:
+        super().server_close()
+        Path(self.server_address).unlink(missing_ok=True)
+
+
+def main() -> None:
+    settings = get_settings()
+    ap = argparse.ArgumentParser(description="Shared vector store server (Unix socket).")
+    ap.add_argument("--socket", default=settings.store_socket_path)
+    ap.add_argument("--backend", default=settings.store_server_backend)
+    args = ap.parse_args()
+
+    if args.backend.strip().lower() == "remote":
+        raise SystemExit("the store server cannot use the remote backend itself")
+
+    configure_logging(settings.log_level, queue_size=settings.log_queue_size)
+    with StoreServer(args.socket, build_store(settings, args.backend)) as server:
+        logger.info(f"Store server listening on {args.socket} (backend={args.backend}).")
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from collections.abc import Hashable, Iterable, Sequence
+
+import numpy as np
+
+
+class RowLedger:
+    """Per-tenant document key -> live rows, plus a dead-row mask (tombstones).
+
+    Deleting a document only flips its rows in the mask, O(1) per chunk; the rows stay in
+    the dense arrays until compaction rewrites them. Queries mask dead rows out.
+    """
+
+    def __init__(self) -> None:
+        self.doc_rows: dict[Hashable, list[int]] = {}
+        self._dead = np.zeros(1024, dtype=bool)
+        self.rows = 0
+        self.dead_count = 0
+
+    @property
+    def live_count(self) -> int:
+        return self.rows - self.dead_count
+
+    def append(self, doc_ids: Sequence[Hashable]) -> None:
+        """Register the tenant's next len(doc_ids) rows, in order."""
+
+        need = self.rows + len(doc_ids)
+        if need > self._dead.shape[0]:
+            grown = np.zeros(max(need, 2 * self._dead.shape[0]), dtype=bool)
+            grown[: self.rows] = self._dead[: self.rows]
+            self._dead = grown
+        for i, doc_id in enumerate(doc_ids):
+            self.doc_rows.setdefault(doc_id, []).append(self.rows + i)
+        self.rows = need
+
+    def kill(self, doc_ids: Iterable[Hashable]) -> list[int]:
+        """Tombstone every live row of `doc_ids`; returns the rows killed."""
+
+        killed: list[int] = []
+        for doc_id in doc_ids:
+            killed.extend(self.doc_rows.pop(doc_id, ()))
+        if killed:
+            self._dead[killed] = True
+            self.dead_count += len(killed)
+        return killed
+
+    def kill_rows(self, rows: Sequence[int]) -> None:
+        """Replay persisted tombstones (rows, not documents)."""
+
+        fresh = [r for r in set(rows) if not self._dead[r]]
+        if not fresh:
+            return
+        self._dead[fresh] = True
+        self.dead_count += len(fresh)
+        dead = set(fresh)
+        for doc_id in list(self.doc_rows):
+            live = [r for r in self.doc_rows[doc_id] if r not in dead]
+            if live:
+                self.doc_rows[doc_id] = live
+            else:
+                del self.doc_rows[doc_id]
+
+    def dead_mask(self) -> np.ndarray | None:
+        """Dead flags for rows [0, rows), or None when nothing is dead."""
+
+        return self._dead[: self.rows] if self.dead_count else None
+
+    def live_rows(self) -> np.ndarray:
+        return np.flatnonzero(~self._dead[: self.rows])
+
+    def compacted(self) -> tuple[RowLedger, np.ndarray]:
+        """(ledger over the live rows renumbered 0.., old row numbers of those rows)."""
+
+        keep = self.live_rows()
+        remap = np.full(self.rows, -1, dtype=np.int64)
+        remap[keep] = np.arange(keep.shape[0])
+        out = RowLedger()
+        out._dead = np.zeros(max(1024, keep.shape[0]), dtype=bool)
+        out.rows = keep.shape[0]
+        out.doc_rows = {d: remap[rows].tolist() for d, rows in self.doc_rows.items()}
+        return out, keep
+
+    def stats(self) -> dict[str, int]:
+        return {"live": self.live_count, "dead": self.dead_count}
+
+
+def needs_compaction(ledger: RowLedger, *, min_dead: int, dead_ratio: float) -> bool:
+    return ledger.dead_count >= min_dead and ledger.dead_count >= dead_ratio * ledger.rows
@@ -1,62 +1,316 @@
 from __future__ import annotations
 
-import hashlib
+import logging
 import math
+import operator
+import threading
+import uuid
 from abc import ABC, abstractmethod
 from collections import defaultdict
+from collections.abc import Iterable, Sequence
 
-from app.store.metadata import DocumentChunk
+import numpy as np
 
+from app.core.executors import get_cpu_executor, run_in
+from app.store.embeddings import EmbeddingProvider, HashEmbedding
+from app.store.lexical import BM25Index
+from app.store.metadata import DocumentChunk, MetadataFilter
+from app.store.metadata_index import MetadataIndex
+from app.store.tombstones import RowLedger, needs_compaction
 
-def _hash_embedding(text: str, dims: int = 64) -> list[float]:
-    """Deterministic toy embedding for MVP.
+logger = logging.getLogger(__name__)
 
-    This avoids external model downloads while enabling repeatable retrieval behavior.
-    DO NOT use in production.
-    """
 
-    h = hashlib.sha256(text.encode("utf-8")).digest()
-    vec = [0.0] * dims
-    for i in range(dims):
-        vec[i] = h[i % len(h)] / 255.0
-    return vec
+def _normalize(vec: list[float]) -> list[float]:
+    """Scale to unit length so cosine similarity reduces to a dot product."""
+
+    norm = math.sqrt(sum(x * x for x in vec))
+    if norm == 0.0:
+        return [0.0] * len(vec)
+    return [x / norm for x in vec]
 
 
-def _cosine(a: list[float], b: list[float]) -> float:
-    dot = sum(x * y for x, y in zip(a, b, strict=False))
-    na = math.sqrt(sum(x * x for x in a))
-    nb = math.sqrt(sum(y * y for y in b))
-    if na == 0.0 or nb == 0.0:
-        return 0.0
-    return dot / (na * nb)
+def _dot(a: list[float], b: list[float]) -> float:
+    return sum(map(operator.mul, a, b))
 
 
 class VectorStoreAdapter(ABC):
+    # A tenant is compacted in the background once it has at least this many dead rows
+    # and they make up at least this fraction of its rows.
+    compact_min_dead = 1024
+    compact_dead_ratio = 0.25
+
+    def __init__(self, *, lexical: bool = False) -> None:
+        # Per-tenant write counters. The epoch keeps versions from a previous process
+        # (e.g. a restarted store server) from ever comparing equal to current ones.
+        self._epoch = uuid.uuid4().hex[:8]
+        self._versions: dict[str, int] = {}
+        self._versions_lock = threading.Lock()
+        # Guards the store's rows; row numbers only change under it (compaction).
+        self._lock = threading.Lock()
+        # Optional BM25 index; its per-tenant rows follow the store's own row order.
+        self._lexical = BM25Index() if lexical else None
+        self._compacting: set[str] = set()
+
+    def corpus_version(self, tenant_id: str) -> str:
+        """Opaque token that changes whenever the tenant's corpus changes."""
+
+        with self._versions_lock:
+            return f"{self._epoch}.{self._versions.get(tenant_id, 0)}"
+
+    def _bump_corpus_versions(self, tenant_ids: Iterable[str]) -> None:
+        # Call after the write is visible to queries.
+        with self._versions_lock:
+            for tenant_id in set(tenant_ids):
+                self._versions[tenant_id] = self._versions.get(tenant_id, 0) + 1
+
     @abstractmethod
     def upsert(self, chunk: DocumentChunk) -> None:
         raise NotImplementedError
 
+    def upsert_many(self, chunks: Sequence[DocumentChunk]) -> None:
+        """Bulk upsert. Backends should override to amortize per-chunk overhead."""
+
+        for chunk in chunks:
+            self.upsert(chunk)
+
+    @abstractmethod
+    def replace_documents(
+        self, tenant_id: str, doc_ids: Iterable[str], chunks: Sequence[DocumentChunk]
+    ) -> int:
+        """Document-level upsert keyed by (tenant_id, doc_id).
+
+        Atomically tombstones every stored chunk of `doc_ids` and appends `chunks` (the
+        new versions of those documents, possibly none). Returns the chunks tombstoned.
+        """
+
+        raise NotImplementedError
+
+    def delete_document(self, tenant_id: str, doc_id: str) -> int:
+        """Tombstone a document's chunks; returns how many there were."""
+
+        return self.replace_documents(tenant_id, [doc_id], [])
+
+    @abstractmethod
+    def chunk_stats(self, tenant_id: str) -> dict[str, int]:
+        """Live and dead (tombstoned, not yet compacted) chunk counts of a tenant."""
+
+        raise NotImplementedError
+
+    @abstractmethod
+    def compact_tenant(self, tenant_id: str) -> None:
+        """Drop the tenant's tombstoned rows from the dense arrays and indexes."""
+
+        raise NotImplementedError
+
+    def set_guard_verdicts(self, tenant_id: str, chunks: Sequence[DocumentChunk]) -> None:
+        """Keep guard verdicts restamped on chunks a query returned (see guardrails).
+
+        A no-op for stores whose query results are the stored chunks themselves; stores
+        that hand out copies override it, or every hit is rescanned on every query.
+        """
+
+        return
+
+    def _maybe_compact(self, tenant_id: str, ledger: RowLedger) -> None:
+        """Start a background compaction of the tenant if its tombstones warrant one."""
+
+        if not needs_compaction(
+            ledger, min_dead=self.compact_min_dead, dead_ratio=self.compact_dead_ratio
+        ):
+            return
+        with self._versions_lock:
+            if tenant_id in self._compacting:
+                return
+            self._compacting.add(tenant_id)
+
+        def run() -> None:
+            try:
+                self.compact_tenant(tenant_id)
+            except Exception as e:
+                logger.warning(f"Compaction failed: {type(e).__name__}")
+            finally:
+                with self._versions_lock:
+                    self._compacting.discard(tenant_id)
+
+        threading.Thread(target=run, name="store-compact", daemon=True).start()
+
     @abstractmethod
-    def query(self, *, tenant_id: str, text: str, top_k: int) -> list[tuple[DocumentChunk, float]]:
+    def query(
+        self, *, tenant_id: str, text: str, top_k: int, where: MetadataFilter | None = None
+    ) -> list[tuple[DocumentChunk, float]]:
+        """Top-k chunks of the tenant by cosine similarity.
+
+        With `where`, only chunks whose metadata match are ranked at all, so excluded
+        chunks cost no scoring and never take top_k slots.
+        """
+
+        raise NotImplementedError
+
+    def lexical_query(
+        self, *, tenant_id: str, text: str, top_k: int, where: MetadataFilter | None = None
+    ) -> list[tuple[DocumentChunk, float]]:
+        """BM25 top-k over the tenant's inverted index (stores built with lexical=True)."""
+
+        if self._lexical is None:
+            raise RuntimeError("lexical index is not enabled for this store")
+        with self._lock:
+            allow = self._eligible(tenant_id, where) if where is not None else None
+            hits = self._lexical.search(tenant_id, text, max(1, top_k), allow=allow)
+            chunks = self._chunks_at(tenant_id, [row for row, _ in hits])
+        return [(c, score) for c, (_, score) in zip(chunks, hits, strict=True)]
+
+    def _chunks_at(self, tenant_id: str, rows: Sequence[int]) -> list[DocumentChunk]:
+        """Chunks by per-tenant row number, called under `_lock`; needed for lexical=True."""
+
         raise NotImplementedError
 
+    def _eligible(self, tenant_id: str, where: MetadataFilter) -> np.ndarray | None:
+        """Row mask of the tenant's chunks matching `where` (None: all), under `_lock`."""
+
+        raise NotImplementedError
+
+    def _index_lexical(self, tenant_id: str, chunks: Sequence[DocumentChunk]) -> None:
+        # Call under the store's write lock, right after appending `chunks` as rows.
+        if self._lexical is not None:
+            self._lexical.add(tenant_id, [c.text for c in chunks])
+
+    def _kill_lexical(self, tenant_id: str, rows: Sequence[int]) -> None:
+        if self._lexical is not None and rows:
+            self._lexical.kill(tenant_id, rows)
+
+    def _compact_lexical(self, tenant_id: str, keep: np.ndarray) -> None:
+        if self._lexical is not None:
+            self._lexical.compact(tenant_id, keep)
+
+    # Async variants keep embedding + scoring off the event loop. Backends with native
+    # async I/O can override these.
+    async def aupsert(self, chunk: DocumentChunk) -> None:
+        await run_in(get_cpu_executor(), self.upsert, chunk)
+
+    async def aquery(
+        self, *, tenant_id: str, text: str, top_k: int, where: MetadataFilter | None = None
+    ) -> list[tuple[DocumentChunk, float]]:
+        return await run_in(
+            get_cpu_executor(),
+            self.query,
+            tenant_id=tenant_id,
+            text=text,
+            top_k=top_k,
+            where=where,
+        )
+
+    async def areplace_documents(
+        self, tenant_id: str, doc_ids: Iterable[str], chunks: Sequence[DocumentChunk]
+    ) -> int:
+        return await run_in(get_cpu_executor(), self.replace_documents, tenant_id, doc_ids, chunks)
+
+    async def adelete_document(self, tenant_id: str, doc_id: str) -> int:
+        return await run_in(get_cpu_executor(), self.delete_document, tenant_id, doc_id)
+
+    async def achunk_stats(self, tenant_id: str) -> dict[str, int]:
+        return await run_in(get_cpu_executor(), self.chunk_stats, tenant_id)
+
+    async def alexical_query(
+        self, *, tenant_id: str, text: str, top_k: int, where: MetadataFilter | None = None
+    ) -> list[tuple[DocumentChunk, float]]:
+        return await run_in(
+            get_cpu_executor(),
+            self.lexical_query,
+            tenant_id=tenant_id,
+            text=text,
+            top_k=top_k,
+            where=where,
+        )
+
 
 class InMemoryVectorStore(VectorStoreAdapter):
-    """Tenant-scoped in-memory store for local dev + tests."""
+    """Tenant-scoped in-memory store for local dev + tests.
+
+    Deleted chunks leave a None hole in their tenant's list until compaction.
+    """
+
+    def __init__(self, embedder: EmbeddingProvider | None = None, *, lexical: bool = False) -> None:
+        super().__init__(lexical=lexical)
+        self.embedder = embedder or HashEmbedding()
+        self._by_tenant: dict[str, list[DocumentChunk | None]] = defaultdict(list)
+        self._ledgers: dict[str, RowLedger] = defaultdict(RowLedger)
+        self._meta: dict[str, MetadataIndex] = defaultdict(MetadataIndex)
 
-    def __init__(self) -> None:
-        self._by_tenant: dict[str, list[DocumentChunk]] = defaultdict(list)
+    def _embed(self, chunks: Sequence[DocumentChunk]) -> None:
+        # Embed once at write time; queries only pay for the dot products. Rows are
+        # re-normalized in float64 so list scores match the provider's float32 ones exactly.
+        todo = [c for c in chunks if c.embedding is None]
+        if todo:
+            for c, vec in zip(todo, self.embedder.embed_many([c.text for c in todo]), strict=True):
+                c.embedding = _normalize(vec.tolist())
+
+    def _append(self, tenant_id: str, chunks: Sequence[DocumentChunk]) -> None:
+        self._by_tenant[tenant_id].extend(chunks)
+        self._ledgers[tenant_id].append([c.metadata.doc_id for c in chunks])
+        self._meta[tenant_id].append(chunks)
+        self._index_lexical(tenant_id, chunks)
 
     def upsert(self, chunk: DocumentChunk) -> None:
-        self._by_tenant[chunk.metadata.tenant_id].append(chunk)
+        self._embed([chunk])
+        with self._lock:
+            self._append(chunk.metadata.tenant_id, [chunk])
+        self._bump_corpus_versions([chunk.metadata.tenant_id])
+
+    def replace_documents(
+        self, tenant_id: str, doc_ids: Iterable[str], chunks: Sequence[DocumentChunk]
+    ) -> int:
+        self._embed(chunks)
+        with self._lock:
+            ledger = self._ledgers[tenant_id]
+            killed = ledger.kill(doc_ids)
+            rows = self._by_tenant[tenant_id]
+            for row in killed:
+                rows[row] = None
+            self._kill_lexical(tenant_id, killed)
+            self._append(tenant_id, chunks)
+        self._bump_corpus_versions([tenant_id])
+        self._maybe_compact(tenant_id, ledger)
+        return len(killed)
+
+    def chunk_stats(self, tenant_id: str) -> dict[str, int]:
+        with self._lock:
+            ledger = self._ledgers.get(tenant_id)
+            return ledger.stats() if ledger is not None else {"live": 0, "dead": 0}
+
+    def compact_tenant(self, tenant_id: str) -> None:
+        with self._lock:
+            ledger = self._ledgers.get(tenant_id)
+            if ledger is None or not ledger.dead_count:
+                return
+            self._ledgers[tenant_id], keep = ledger.compacted()
+            self._meta[tenant_id] = self._meta[tenant_id].compacted(keep)
+            self._by_tenant[tenant_id] = [c for c in self._by_tenant[tenant_id] if c is not None]
+            self._compact_lexical(tenant_id, keep)
 
-    def query(self, *, tenant_id: str, text: str, top_k: int) -> list[tuple[DocumentChunk, float]]:
-        qv = _hash_embedding(text)
+    def query(
+        self, *, tenant_id: str, text: str, top_k: int, where: MetadataFilter | None = None
+    ) -> list[tuple[DocumentChunk, float]]:
+        qv = _normalize(self.embedder.embed_query(text).tolist())
         scored: list[tuple[DocumentChunk, float]] = []
 
-        for c in self._by_tenant.get(tenant_id, []):
-            cv = _hash_embedding(c.text)
-            scored.append((c, _cosine(qv, cv)))
+        with self._lock:
+            chunks = list(self._by_tenant.get(tenant_id, []))
+            allow = self._eligible(tenant_id, where) if where is not None else None
+        if allow is not None:
+            chunks = [chunks[i] for i in np.flatnonzero(allow)]
+
+        for c in chunks:
+            if c is not None:
+                scored.append((c, _dot(qv, c.embedding)))
 
         scored.sort(key=lambda x: x[1], reverse=True)
         return scored[: max(1, top_k)]
+
+    def _chunks_at(self, tenant_id: str, rows: Sequence[int]) -> list[DocumentChunk]:
+        chunks = self._by_tenant.get(tenant_id, [])
+        return [chunks[i] for i in rows]
+
+    def _eligible(self, tenant_id: str, where: MetadataFilter) -> np.ndarray | None:
+        meta = self._meta.get(tenant_id)
+        return meta.select(where) if meta is not None else None
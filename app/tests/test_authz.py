@@ -1,5 +1,21 @@
 from __future__ import annotations
 
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi.testclient import TestClient
+from jwt.algorithms import RSAAlgorithm
+
+from app.core.config import get_settings
+from app.core.jwks import JwksKeySet
+from app.core.security import TokenCache, TokenVerifier, _InvalidToken
+from app.main import create_app
 from app.tests.conftest import make_token
 
 
@@ -26,3 +42,127 @@ def test_ingest_requires_scope(client):
         json={"tenant_id": "t1", "source": "confluence", "text": "hello"},
     )
     assert r.status_code == 403
+
+
+def test_verified_tokens_are_cached_until_exp():
+    verifier = TokenVerifier(secret="s" * 32, algorithm="HS256", cache=TokenCache(8))
+    claims = {"sub": "u", "tenant_id": "t1", "scopes": ["chat"]}
+    token = jwt.encode({**claims, "exp": int(time.time()) + 60}, "s" * 32, algorithm="HS256")
+
+    assert verifier.verify(token) == verifier.verify(token)
+    assert verifier.cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+    expired = TokenCache.key("expired")
+    verifier.cache.put(expired, verifier.verify(token), time.time() - 1)
+    assert verifier.cache.get(expired) is None
+
+
+def _b64(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _rsa_jwk(private_key: rsa.RSAPrivateKey, kid: str) -> dict:
+    jwk = RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+    return {**jwk, "kid": kid, "alg": "RS256", "use": "sig"}
+
+
+@pytest.fixture()
+def rsa_keys() -> dict[str, rsa.RSAPrivateKey]:
+    return {kid: rsa.generate_private_key(public_exponent=65537, key_size=2048) for kid in "12"}
+
+
+@pytest.fixture()
+def jwks_server(rsa_keys):
+    keys = {"keys": [_rsa_jwk(rsa_keys["1"], "k1")]}
+    # Number of upcoming requests to answer with a 503 (provider outage).
+    outage = {"requests": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if outage["requests"] > 0:
+                outage["requests"] -= 1
+                self.send_response(503)
+                self.end_headers()
+                return
+            body = json.dumps(keys).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/jwks.json", keys, outage
+    server.shutdown()
+
+
+@pytest.fixture()
+def jwks_app(monkeypatch: pytest.MonkeyPatch, jwks_server):
+    # Default settings otherwise: JWT_ALGORITHM stays HS256 and must not matter here.
+    url, keys, _ = jwks_server
+    monkeypatch.setenv("JWT_JWKS_URL", url)
+    get_settings.cache_clear()
+    yield create_app(), keys
+    get_settings.cache_clear()
+
+
+def test_jwks_mode_verifies_rs256_and_follows_rotation(jwks_app, rsa_keys):
+    app, keys = jwks_app
+    verifier = app.state.token_verifier
+    verifier.jwks.start()
+    client = TestClient(app)
+
+    def chat(key: object, kid: str, algorithm: str = "RS256") -> int:
+        claims = {"sub": "u", "tenant_id": "t1", "scopes": ["chat"]}
+        token = jwt.encode(claims, key, algorithm=algorithm, headers={"kid": kid})
+        r = client.post(
+            "/chat",
+            headers={"Authorization": f"Bearer {token}"},
+            json={"tenant_id": "t1", "question": "hi"},
+        )
+        return r.status_code
+
+    assert chat(rsa_keys["1"], "k1") == 200
+    assert chat(rsa_keys["2"], "k1") == 401  # wrong key for the kid
+    assert chat(rsa_keys["2"], "k2") == 401  # not published yet: rejected, no fetch inline
+    # The JWT_SECRET shared secret is not accepted in JWKS mode.
+    assert chat(get_settings().jwt_secret, "k1", algorithm="HS256") == 401
+
+    keys["keys"] = [_rsa_jwk(rsa_keys["2"], "k2")]
+    verifier.jwks.refresh()
+    assert chat(rsa_keys["2"], "k2") == 200
+    assert chat(rsa_keys["1"], "k1") == 401  # removed key: cached principals were dropped
+    verifier.close()
+
+
+def test_jwks_mode_refuses_symmetric_keys(jwks_server):
+    url, keys, _ = jwks_server
+    # A symmetric key published in the set is never usable as an HMAC secret.
+    keys["keys"].append({"kty": "oct", "kid": "hs", "alg": "HS256", "k": _b64(b"1" * 32)})
+    verifier = TokenVerifier(secret="", algorithm="HS256", jwks=JwksKeySet(url))
+    verifier.jwks.refresh()
+    claims = {"sub": "u", "tenant_id": "t1", "scopes": ["chat"]}
+    token = jwt.encode(claims, b"1" * 32, algorithm="HS256", headers={"kid": "hs"})
+    with pytest.raises(_InvalidToken, match="algorithm not allowed"):
+        verifier.verify(token)
+
+    with pytest.raises(ValueError, match="HS"):
+        TokenVerifier(secret="", algorithm="HS256", jwks=JwksKeySet(url), jwks_algorithms=["HS256"])
+
+
+def test_jwks_first_fetch_failure_is_retried_in_the_background(jwks_server):
+    url, _, outage = jwks_server
+    outage["requests"] = 2
+    keyset = JwksKeySet(url, refresh_seconds=60.0, min_refresh_seconds=0.05)
+    keyset.start()  # does not raise: the provider is down
+    assert not keyset.loaded
+
+    deadline = time.monotonic() + 5.0
+    while not keyset.loaded and time.monotonic() < deadline:
+        time.sleep(0.02)
+    keyset.close()
+    assert keyset.get("k1") is not None
+    assert outage["requests"] == 0
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from app.rag.chunking import Chunker, iter_chunks
+
+
+def _document(seed: int = 0) -> str:
+    rng = random.Random(seed)
+    words = ["policy", "keys", "rotate", "vpn", "token", "audit", "backup"]
+    sentences = [
+        " ".join(rng.choice(words) for _ in range(rng.randint(3, 15))).capitalize() + "."
+        for _ in range(600)
+    ]
+    return " ".join(sentences)
+
+
+def test_chunks_end_at_sentences_and_over_long_lines_are_split():
+    chunks = list(iter_chunks([_document()], max_chars=300))
+
+    assert all(len(c) <= 300 for c in chunks)
+    assert all(c.endswith(".") for c in chunks)
+    assert " ".join(chunks) == _document()
+
+    run = list(iter_chunks(["x" * 1000], max_chars=300))
+    assert [len(c) for c in run] == [300, 300, 300, 100]
+
+
+def test_streamed_pieces_give_the_same_chunks_with_overlap():
+    text = _document(1)
+    rng = random.Random(2)
+    pieces, i = [], 0
+    while i < len(text):
+        n = rng.randint(1, 700)
+        pieces.append(text[i : i + n])
+        i += n
+
+    whole = list(iter_chunks([text], max_chars=300, overlap=60))
+    assert list(iter_chunks(pieces, max_chars=300, overlap=60)) == whole
+    # Consecutive chunks share up to `overlap` characters, starting at a word.
+    for a, b in zip(whole, whole[1:], strict=False):
+        head = b[: b.index(" ", 1)]
+        assert f" {head}" in a[-61:]
+
+
+def test_chunker_keeps_only_a_bounded_buffer():
+    chunker = Chunker(max_chars=200, overlap=20)
+    for _ in range(2000):
+        chunker.feed("The quick brown fox jumps over the lazy dog. ")
+        assert len(chunker._buf) <= 200 + 45
+
+    with pytest.raises(ValueError):
+        Chunker(max_chars=100, overlap=50)
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.tests.conftest import make_token
+
+
+def test_reingest_replaces_document_and_delete_removes_it(client):
+    token = make_token(tenant_id="t1", scopes=["chat", "ingest:write"])
+    headers = {"Authorization": f"Bearer {token}"}
+    doc = {"tenant_id": "t1", "source": "wiki", "doc_id": "policy", "text": "VPN needs a token."}
+
+    assert client.post("/ingest", headers=headers, json=doc).json()["replaced"] == 0
+    r = client.post("/ingest", headers=headers, json={**doc, "text": "VPN needs a hardware key."})
+    assert r.json()["replaced"] == 1
+
+    stats = client.get("/documents/stats", headers=headers, params={"tenant_id": "t1"}).json()
+    assert (stats["live"], stats["dead"]) == (1, 1)
+
+    r = client.delete("/documents/policy", headers=headers, params={"tenant_id": "t1"})
+    assert r.json() == {"status": "deleted", "doc_id": "policy", "chunks": 1}
+    r = client.delete("/documents/policy", headers=headers, params={"tenant_id": "t1"})
+    assert r.status_code == 404
+
+
+def test_delete_document_is_tenant_scoped(client):
+    token = make_token(tenant_id="t1", scopes=["ingest:write"])
+    r = client.delete(
+        "/documents/policy",
+        headers={"Authorization": f"Bearer {token}"},
+        params={"tenant_id": "t2"},
+    )
+    assert r.status_code == 403
+
+
+def test_document_stats_reads_the_store_off_the_event_loop(client, monkeypatch):
+    token = make_token(tenant_id="t1", scopes=["ingest:write"])
+    store = client.app.state.store
+    chunk_stats = store.chunk_stats
+
+    def off_loop(tenant_id):
+        with pytest.raises(RuntimeError):
+            asyncio.get_running_loop()  # may block on a socket or the store lock
+        return chunk_stats(tenant_id)
+
+    monkeypatch.setattr(store, "chunk_stats", off_loop)
+    r = client.get(
+        "/documents/stats", headers={"Authorization": f"Bearer {token}"}, params={"tenant_id": "t1"}
+    )
+    assert r.json() == {"tenant_id": "t1", "live": 0, "dead": 0}
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import time
+
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+
+
+def test_ready_reports_warming_until_warmup_finishes(client):
+    # The `client` fixture does not run the lifespan, so warm-up never starts.
+    assert client.get("/health").status_code == 200
+    r = client.get("/ready")
+    assert r.status_code == 503
+    assert r.json()["status"] == "warming"
+
+
+def test_ready_after_background_warmup():
+    with TestClient(create_app()) as client:
+        deadline = time.monotonic() + 10.0
+        while (r := client.get("/ready")).status_code != 200 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert r.status_code == 200
+        assert set(r.json()["steps_ms"]) == {"prompt_guard", "redaction"}
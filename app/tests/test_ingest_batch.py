@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import json
+
+from app.core.config import get_settings
+from app.tests.conftest import make_token
+
+
+def test_batch_ingest_json_and_ndjson(client):
+    token = make_token(tenant_id="t1", scopes=["chat", "ingest:write"])
+    headers = {"Authorization": f"Bearer {token}"}
+    docs = [{"tenant_id": "t1", "source": "wiki", "text": f"Policy {i}."} for i in range(3)]
+
+    r = client.post("/ingest/batch", headers=headers, json={"documents": docs})
+    assert r.status_code == 201
+    assert r.json()["documents"] == 3
+
+    body = "\n".join(json.dumps(d) for d in docs + [{"tenant_id": "t1", "text": "  "}])
+    r = client.post(
+        "/ingest/batch",
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+        content=body.encode(),
+    )
+    assert r.status_code == 201
+    assert r.json()["chunks"] == 3
+    assert r.json()["skipped"] == 1
+
+
+def test_batch_ingest_rejects_foreign_tenant(client):
+    token = make_token(tenant_id="t1", scopes=["ingest:write"])
+    docs = [
+        {"tenant_id": "t1", "text": "mine"},
+        {"tenant_id": "t2", "text": "not mine"},
+    ]
+    r = client.post(
+        "/ingest/batch", headers={"Authorization": f"Bearer {token}"}, json={"documents": docs}
+    )
+    assert r.status_code == 403
+
+
+def test_stream_ingest_chunks_large_body_in_batches(client, monkeypatch):
+    monkeypatch.setenv("INGEST_BATCH_CHUNKS", "4")
+    monkeypatch.setenv("CHUNK_MAX_CHARS", "200")
+    monkeypatch.setenv("CHUNK_OVERLAP_CHARS", "40")
+    get_settings.cache_clear()
+    token = make_token(tenant_id="t1", scopes=["ingest:write"])
+    body = "Rotate the VPN keys every quarter. " * 400 + "Ünïcode tail."
+
+    def parts():
+        raw = body.encode()
+        for i in range(0, len(raw), 1001):  # splits multi-byte characters too
+            yield raw[i : i + 1001]
+
+    try:
+        r = client.post(
+            "/ingest/stream",
+            headers={"Authorization": f"Bearer {token}"},
+            params={"tenant_id": "t1", "doc_id": "big", "source": "wiki"},
+            content=parts(),
+        )
+        assert r.status_code == 201
+        first = r.json()["chunks"]
+        assert first > 4
+
+        r = client.post(
+            "/ingest/stream",
+            headers={"Authorization": f"Bearer {token}"},
+            params={"tenant_id": "t1", "doc_id": "big", "source": "wiki"},
+            content=parts(),
+        )
+        assert r.json()["replaced"] == first
+    finally:
+        get_settings.cache_clear()
+
+
+def test_ndjson_batch_rejects_oversized_line(client, monkeypatch):
+    monkeypatch.setenv("INGEST_MAX_LINE_BYTES", "256")
+    get_settings.cache_clear()
+    token = make_token(tenant_id="t1", scopes=["ingest:write"])
+    small = json.dumps({"tenant_id": "t1", "text": "short"})
+    big = json.dumps({"tenant_id": "t1", "text": "x" * 1000})
+
+    def parts(body: bytes):
+        for i in range(0, len(body), 64):  # the long line spans many network chunks
+            yield body[i : i + 64]
+
+    try:
+        headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/x-ndjson"}
+        r = client.post(
+            "/ingest/batch", headers=headers, content=parts(f"{small}\n{small}\n".encode())
+        )
+        assert r.status_code == 201
+        assert r.json()["documents"] == 2
+
+        r = client.post("/ingest/batch", headers=headers, content=parts(f"{small}\n{big}".encode()))
+        assert r.status_code == 413
+        r = client.post("/ingest/batch", headers=headers, content=f"{big}\n{small}".encode())
+        assert r.status_code == 413
+    finally:
+        get_settings.cache_clear()
@@ -1,8 +1,18 @@
 from __future__ import annotations
 
+import json
 import logging
+import queue
+import sys
+import threading
 
-from app.core.logging import JsonFormatter
+from app.core import logging as app_logging
+from app.core.logging import (
+    JsonFormatter,
+    _DroppingQueueHandler,
+    configure_logging,
+    dropped_log_records,
+)
 
 
 def test_json_formatter_has_message():
@@ -18,3 +28,81 @@ def test_json_formatter_has_message():
     out = JsonFormatter().format(rec)
     assert "hello" in out
     assert '"level"' in out
+
+
+def test_json_formatter_keeps_only_whitelisted_extras():
+    rec = logging.LogRecord("x", logging.INFO, __file__, 1, "user %s", ("42",), None)
+    rec.tenant_id = "t1"
+    rec.prompt = "my card is 4111 1111 1111 1111"
+    out = json.loads(JsonFormatter().format(rec))
+    assert out["msg"] == "user 42"
+    assert out["tenant_id"] == "t1"
+    assert "prompt" not in out
+    assert out["ts"].endswith("+00:00")
+
+
+def test_queue_handler_drops_and_counts_when_full():
+    pending: queue.Queue[logging.LogRecord] = queue.Queue(maxsize=2)
+    handler = _DroppingQueueHandler(pending, JsonFormatter())
+    for i in range(5):
+        handler.handle(logging.LogRecord("x", logging.INFO, __file__, 1, f"m{i}", (), None))
+    assert pending.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_queued_logging_writes_batched_json_lines(capsys):
+    configure_logging("INFO", queue_size=100)
+    try:
+        log = logging.getLogger("queued")
+        for i in range(3):
+            log.info("event %d", i, extra={"request_id": f"r{i}"})
+    finally:
+        configure_logging("INFO")  # stops the writer after draining the queue
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(line["msg"], line["request_id"]) for line in lines[-3:]] == [
+        ("event 0", "r0"),
+        ("event 1", "r1"),
+        ("event 2", "r2"),
+    ]
+    assert dropped_log_records() == 0
+
+
+def test_stopping_with_a_full_queue_still_drains_the_writer(monkeypatch):
+    class SlowStdout:
+        """stdout that stalls until released, so the queue backs up behind it."""
+
+        def __init__(self) -> None:
+            self.writing = threading.Event()
+            self.release = threading.Event()
+            self.lines: list[str] = []
+
+        def write(self, data: str) -> None:
+            self.writing.set()
+            self.release.wait(5)
+            self.lines += data.splitlines()
+
+        def flush(self) -> None:
+            pass
+
+    stdout = SlowStdout()
+    monkeypatch.setattr(sys, "stdout", stdout)
+    monkeypatch.setattr(app_logging, "_STOP_TIMEOUT_S", 0.05)
+    configure_logging("INFO", queue_size=2)
+    handler = app_logging._queue_handler
+    log = logging.getLogger("backlog")
+    try:
+        log.info("m0")
+        assert stdout.writing.wait(5)  # the writer is stuck on m0
+        for i in range(1, 4):
+            log.info("m%d", i)  # m1, m2 fill the queue; m3 is dropped
+        threading.Timer(0.3, stdout.release.set).start()
+        app_logging._stop_listener()  # must not raise queue.Full
+    finally:
+        stdout.release.set()
+        monkeypatch.undo()
+        configure_logging("INFO")
+
+    # Room for the stop sentinel was made by dropping the oldest queued record (m1).
+    assert [json.loads(line)["msg"] for line in stdout.lines] == ["m0", "m2"]
+    assert handler.dropped == 2
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import gc
+import threading
+
+from app.core.metrics import MetricsRegistry
+from app.tests.conftest import make_token
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    h = registry.histogram("op_seconds", "Op latency.", ["op"], buckets=(0.1, 1.0))
+    child = h.labels("query")
+    for value in (0.05, 0.5, 0.5, 3.0):
+        child.observe(value)
+
+    text = registry.render()
+    assert "# TYPE op_seconds histogram" in text
+    assert 'op_seconds_bucket{op="query",le="0.1"} 1' in text
+    assert 'op_seconds_bucket{op="query",le="1"} 3' in text
+    assert 'op_seconds_bucket{op="query",le="+Inf"} 4' in text
+    assert 'op_seconds_count{op="query"} 4' in text
+    assert 'op_seconds_sum{op="query"} 4.05' in text
+
+
+def test_counter_is_exact_across_threads():
+    registry = MetricsRegistry()
+    child = registry.counter("hits_total", "Hits.").labels()
+
+    def work() -> None:
+        for _ in range(10_000):
+            child.inc()
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert child.value == 80_000
+
+
+def test_exited_threads_are_folded_into_the_totals():
+    registry = MetricsRegistry()
+    child = registry.counter("jobs_total", "Jobs.").labels()
+    hist = registry.histogram("job_seconds", "Job time.", buckets=(1.0,)).labels()
+
+    def work() -> None:
+        child.inc()
+        hist.observe(0.5)
+
+    for _ in range(50):
+        t = threading.Thread(target=work)
+        t.start()
+        t.join()
+    gc.collect()
+
+    assert child.value == 50
+    assert hist.snapshot() == ([50.0, 50.0], 25.0)
+    assert len(child._shards) == 0 and len(hist._shards) == 0  # no shard per dead thread
+
+
+def test_metrics_endpoint_exposes_stage_and_corpus_metrics(client):
+    token = make_token(tenant_id="t1", scopes=["chat", "ingest:write"])
+    headers = {"Authorization": f"Bearer {token}"}
+    doc = {"tenant_id": "t1", "source": "wiki", "doc_id": "vpn", "text": "VPN needs a token."}
+    assert client.post("/ingest", headers=headers, json=doc).status_code == 201
+    client.post("/chat", headers=headers, json={"tenant_id": "t1", "question": "VPN?"})
+
+    assert client.get("/metrics", headers=headers).status_code == 403
+
+    ops = make_token(tenant_id="ops", scopes=["metrics:read"])
+    r = client.get("/metrics", headers={"Authorization": f"Bearer {ops}"})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    assert 'rag_stage_seconds_bucket{stage="retrieval",le="+Inf"} 1' in r.text
+    assert 'rag_corpus_chunks{tenant_id="t1",state="live"} 1' in r.text
+    assert (
+        'http_request_duration_seconds_count{method="POST",route="/ingest",status="201"} 1'
+        in r.text
+    )
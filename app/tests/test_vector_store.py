@@ -0,0 +1,465 @@
+from __future__ import annotations
+
+import socket
+import threading
+from datetime import UTC, datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.rag.retrieval import retrieve
+from app.store.columns import ChunkColumns
+from app.store.dense import NumpyVectorStore
+from app.store.disk import MmapVectorStore
+from app.store.embeddings import CachedEmbeddingProvider, NgramHashEmbedding
+from app.store.ivf import IVFVectorStore
+from app.store.lexical import BM25Index
+from app.store.metadata import ChunkMetadata, DocumentChunk, MetadataFilter
+from app.store.remote import RemoteVectorStore, recv_frame, send_frame
+from app.store.server import StoreServer
+from app.store.vector import InMemoryVectorStore, VectorStoreAdapter
+
+
+def _chunk(tenant_id: str, chunk_id: str, text: str, doc_id: str = "d1") -> DocumentChunk:
+    meta = ChunkMetadata(tenant_id=tenant_id, source="wiki", doc_id=doc_id, chunk_id=chunk_id)
+    return DocumentChunk(metadata=meta, text=text)
+
+
+def test_upsert_caches_embedding_and_query_is_tenant_scoped():
+    store = InMemoryVectorStore()
+    a = _chunk("t1", "a", "alpha policy")
+    store.upsert(a)
+    store.upsert(_chunk("t2", "b", "alpha policy"))
+
+    assert a.embedding is not None
+
+    hits = store.query(tenant_id="t1", text="alpha policy", top_k=5)
+    assert [c.metadata.chunk_id for c, _ in hits] == ["a"]
+    assert abs(hits[0][1] - 1.0) < 1e-9
+
+
+def test_adapter_must_implement_document_level_writes():
+    class QueryOnly(VectorStoreAdapter):
+        def upsert(self, chunk):
+            pass
+
+        def query(self, *, tenant_id, text, top_k, where=None):
+            return []
+
+    # Ingest, delete and stats routes all rely on these; fail at construction, not per request.
+    with pytest.raises(TypeError, match="replace_documents"):
+        QueryOnly()
+
+
+def test_corpus_version_changes_only_for_written_tenant():
+    store = NumpyVectorStore()
+    v1, v2 = store.corpus_version("t1"), store.corpus_version("t2")
+    store.upsert_many([_chunk("t1", "a", "alpha")])
+
+    assert store.corpus_version("t1") != v1
+    assert store.corpus_version("t2") == v2
+
+
+def test_ngram_embedder_is_injected_and_query_embeddings_are_cached():
+    embedder = CachedEmbeddingProvider(NgramHashEmbedding(), max_entries=2)
+    store = NumpyVectorStore(embedder)
+    store.upsert_many(
+        [
+            _chunk("t1", "keys", "Rotate encryption keys every 90 days."),
+            _chunk("t1", "vpn", "The VPN requires a hardware token."),
+        ]
+    )
+
+    for _ in range(3):
+        hits = store.query(tenant_id="t1", text="how often are keys rotated?", top_k=1)
+        assert hits[0][0].metadata.chunk_id == "keys"
+    assert embedder.stats() == {"hits": 2, "misses": 1, "entries": 1}
+
+
+def test_numpy_store_matches_reference_ranking():
+    ref = InMemoryVectorStore()
+    fast = NumpyVectorStore()
+    for i in range(50):
+        ref.upsert(_chunk("t1", str(i), f"section {i}"))
+        fast.upsert(_chunk("t1", str(i), f"section {i}"))
+    fast.upsert(_chunk("t2", "other", "section 1"))
+
+    want = ref.query(tenant_id="t1", text="section 1", top_k=5)
+    got = fast.query(tenant_id="t1", text="section 1", top_k=5)
+
+    assert [c.metadata.chunk_id for c, _ in got] == [c.metadata.chunk_id for c, _ in want]
+    assert all(abs(a - b) < 1e-5 for (_, a), (_, b) in zip(got, want, strict=True))
+    assert fast.query(tenant_id="t3", text="section 1", top_k=5) == []
+
+
+def test_ivf_store_full_probe_is_exact_and_tenant_scoped():
+    exact = NumpyVectorStore()
+    ann = IVFVectorStore(nlist=8, nprobe=8, train_min=64)
+    for i in range(300):
+        exact.upsert(_chunk("t1", str(i), f"doc {i}"))
+        ann.upsert(_chunk("t1", str(i), f"doc {i}"))
+    ann.upsert(_chunk("t2", "other", "doc 7"))
+
+    want = exact.query(tenant_id="t1", text="doc 7", top_k=10)
+    got = ann.query(tenant_id="t1", text="doc 7", top_k=10)
+
+    assert [c.metadata.chunk_id for c, _ in got] == [c.metadata.chunk_id for c, _ in want]
+    assert ann.query(tenant_id="t2", text="doc 7", top_k=10)[0][0].metadata.chunk_id == "other"
+
+
+def test_ivf_training_runs_outside_the_store_lock():
+    store = IVFVectorStore(nlist=4, nprobe=4, train_min=16)
+    store.upsert_many([_chunk("t1", str(i), f"doc {i}") for i in range(15)])
+    part = store._by_tenant["t1"]
+    fit = part.fit
+
+    def during_training(x, **kwargs):
+        # Other tenants, and this one (scanned exactly until the cells land), keep going.
+        assert store._lock.acquire(blocking=False)
+        store._lock.release()
+        store.upsert(_chunk("t2", "other", "doc 3"))
+        store.upsert(_chunk("t1", "late", "doc late"))
+        assert (
+            store.query(tenant_id="t1", text="doc late", top_k=1)[0][0].metadata.chunk_id == "late"
+        )
+        return fit(x, **kwargs)
+
+    part.fit = during_training
+    store.upsert(_chunk("t1", "15", "doc 15"))
+
+    assert part.centroids is not None and not part.training
+    assert part.trained_size == 16
+    assert sum(lst.size for lst in part.lists) == 17  # "late" was routed after the swap
+    assert store.query(tenant_id="t1", text="doc late", top_k=1)[0][0].metadata.chunk_id == "late"
+
+
+def test_mmap_store_survives_reopen_and_compaction(tmp_path):
+    store = MmapVectorStore(tmp_path, segment_bytes=512, max_segments=2)
+    for i in range(40):
+        store.upsert(_chunk("t1", str(i), f"entry {i}"))
+    before = [c.metadata.chunk_id for c, _ in store.query(tenant_id="t1", text="entry 3", top_k=3)]
+    store.close()
+
+    reopened = MmapVectorStore(tmp_path)
+    hits = reopened.query(tenant_id="t1", text="entry 3", top_k=3)
+    assert [c.metadata.chunk_id for c, _ in hits] == before
+    assert hits[0][0].text == "entry 3"
+    assert reopened.query(tenant_id="t2", text="entry 3", top_k=3) == []
+
+    reopened.compact()
+    assert [
+        c.metadata.chunk_id for c, _ in reopened.query(tenant_id="t1", text="entry 3", top_k=3)
+    ] == before
+
+
+def test_mmap_replace_documents_keeps_segments_under_the_cap(tmp_path):
+    store = MmapVectorStore(tmp_path, segment_bytes=200, max_segments=2)
+    for i in range(30):
+        store.replace_documents("t1", [f"d{i}"], [_chunk("t1", str(i), f"entry {i}", f"d{i}")])
+    tenant_dir = store._by_tenant["t1"].path
+    assert len(list(tenant_dir.glob("seg-*.log"))) <= 3
+    assert store.chunk_stats("t1") == {"live": 30, "dead": 0}
+    assert store.query(tenant_id="t1", text="entry 7", top_k=1)[0][0].metadata.chunk_id == "7"
+
+
+def test_mmap_segment_merge_copies_outside_the_store_lock(tmp_path):
+    store = MmapVectorStore(tmp_path, segment_bytes=200, max_segments=100)
+    for i in range(20):
+        store.upsert(_chunk("t1", str(i), f"entry {i}"))
+    tf = store._by_tenant["t1"]
+    assert len(tf.segments) > 2
+    write_merge = tf.write_merge
+
+    def during_copy(index, merged_no):
+        # Other tenants (and this one) can still write and query while the copy runs.
+        assert store._lock.acquire(blocking=False)
+        store._lock.release()
+        store.upsert(_chunk("t2", "x", "other tenant"))
+        store.upsert(_chunk("t1", "late", "entry late"))
+        write_merge(index, merged_no)
+
+    tf.write_merge = during_copy
+    store.compact()
+    assert len(tf.segments) == 2  # the merged segment and the one "late" went to
+    assert store.chunk_stats("t1") == {"live": 21, "dead": 0}
+    store.close()
+
+    reopened = MmapVectorStore(tmp_path)
+    ids = {c.metadata.chunk_id for c, _ in reopened.query(tenant_id="t1", text="entry", top_k=50)}
+    assert ids == {*(str(i) for i in range(20)), "late"}
+    assert reopened.query(tenant_id="t2", text="other", top_k=1)[0][0].text == "other tenant"
+
+
+def test_mmap_compaction_copies_outside_the_store_lock(tmp_path):
+    store = MmapVectorStore(tmp_path, lexical=True)
+    store.upsert_many(
+        [_chunk("t1", f"{d}-{i}", f"doc {d} part {i}", d) for d in "ab" for i in range(5)]
+    )
+    store.delete_document("t1", "a")
+    tf = store._by_tenant["t1"]
+    write_live_copy = tf.write_live_copy
+
+    def during_copy(*args):
+        assert store._lock.acquire(blocking=False)
+        store._lock.release()
+        store.upsert(_chunk("t2", "x", "other tenant"))
+        store.upsert(_chunk("t1", "late", "doc late part", "late"))
+        write_live_copy(*args)
+
+    tf.write_live_copy = during_copy
+    store.compact_tenant("t1")
+    assert store.chunk_stats("t1") == {"live": 6, "dead": 0}
+    hits = store.lexical_query(tenant_id="t1", text="late", top_k=5)
+    assert [c.metadata.chunk_id for c, _ in hits] == ["late"]
+    store.close()
+
+    reopened = MmapVectorStore(tmp_path)
+    ids = {c.metadata.chunk_id for c, _ in reopened.query(tenant_id="t1", text="doc", top_k=50)}
+    assert ids == {*(f"b-{i}" for i in range(5)), "late"}
+
+
+def test_mmap_compaction_is_dropped_when_rows_die_during_the_copy(tmp_path):
+    store = MmapVectorStore(tmp_path)
+    store.upsert_many(
+        [_chunk("t1", f"{d}-{i}", f"doc {d} part {i}", d) for d in "ab" for i in range(5)]
+    )
+    store.delete_document("t1", "a")
+    tf = store._by_tenant["t1"]
+    write_live_copy = tf.write_live_copy
+
+    def during_copy(*args):
+        store.delete_document("t1", "b")
+        write_live_copy(*args)
+
+    tf.write_live_copy = during_copy
+    store.compact_tenant("t1")
+    assert store._by_tenant["t1"] is tf
+    assert store.chunk_stats("t1") == {"live": 0, "dead": 10}
+    assert not tf.path.with_name(tf.path.name + ".compact").exists()
+
+
+def test_mmap_store_recovers_from_a_torn_index_record(tmp_path):
+    store = MmapVectorStore(tmp_path)
+    store.upsert_many([_chunk("t1", str(i), f"entry {i}") for i in range(3)])
+    index = store._by_tenant["t1"].path / "index.bin"
+    store.close()
+    # A crash mid-append: part of the next record reached the index, the rest did not.
+    with open(index, "ab") as fh:
+        fh.write(b"\x01\x02\x03")
+
+    reopened = MmapVectorStore(tmp_path)
+    reopened.upsert(_chunk("t1", "3", "entry 3"))
+    reopened.close()
+
+    again = MmapVectorStore(tmp_path)
+    assert again.chunk_stats("t1") == {"live": 4, "dead": 0}
+    hits = again.query(tenant_id="t1", text="entry 3", top_k=1)
+    assert hits[0][0].metadata.chunk_id == "3"
+
+
+@pytest.mark.parametrize("backend", ["inmemory", "numpy", "ivf", "mmap"])
+def test_replace_and_delete_documents_then_compact(backend, tmp_path):
+    stores = {
+        "inmemory": lambda: InMemoryVectorStore(lexical=True),
+        "numpy": lambda: NumpyVectorStore(lexical=True),
+        "ivf": lambda: IVFVectorStore(nlist=4, nprobe=4, train_min=16, lexical=True),
+        "mmap": lambda: MmapVectorStore(tmp_path, lexical=True),
+    }
+    store = stores[backend]()
+    store.upsert_many(
+        [_chunk("t1", f"{d}-{i}", f"doc {d} part {i}", d) for d in "abc" for i in range(10)]
+    )
+
+    assert store.replace_documents("t1", ["a"], [_chunk("t1", "a-new", "doc a revised", "a")]) == 10
+    assert store.delete_document("t1", "b") == 10
+    assert store.delete_document("t1", "b") == 0
+    assert store.chunk_stats("t1") == {"live": 11, "dead": 20}
+
+    def ids(text: str) -> list[str]:
+        return sorted(
+            c.metadata.chunk_id for c, _ in store.query(tenant_id="t1", text=text, top_k=50)
+        )
+
+    want = ["a-new", *(f"c-{i}" for i in range(10))]
+    assert ids("doc a part 1") == sorted(want)
+    assert [
+        c.metadata.chunk_id for c, _ in store.lexical_query(tenant_id="t1", text="revised", top_k=5)
+    ] == ["a-new"]
+
+    store.compact_tenant("t1")
+    assert store.chunk_stats("t1") == {"live": 11, "dead": 0}
+    assert ids("doc a part 1") == sorted(want)
+    assert store.lexical_query(tenant_id="t1", text="part", top_k=50)[0][0].metadata.doc_id == "c"
+
+    if backend == "mmap":
+        store.delete_document("t1", "c")
+        store.close()
+        reopened = MmapVectorStore(tmp_path, lexical=True)
+        assert reopened.chunk_stats("t1") == {"live": 1, "dead": 10}
+        hits = reopened.query(tenant_id="t1", text="doc c part 1", top_k=5)
+        assert [c.metadata.chunk_id for c, _ in hits] == ["a-new"]
+
+
+@pytest.mark.parametrize("backend", ["inmemory", "numpy", "ivf", "mmap"])
+def test_metadata_filter_is_applied_before_ranking(backend, tmp_path):
+    stores = {
+        "inmemory": lambda: InMemoryVectorStore(lexical=True),
+        "numpy": lambda: NumpyVectorStore(lexical=True),
+        "ivf": lambda: IVFVectorStore(nlist=4, nprobe=2, train_min=16, lexical=True),
+        "mmap": lambda: MmapVectorStore(tmp_path, lexical=True),
+    }
+    store = stores[backend]()
+    t0 = datetime(2024, 1, 1)
+    chunks = []
+    for i in range(60):
+        c = _chunk("t1", str(i), f"policy note {i}", f"d{i % 6}")
+        c.metadata.source = "wiki" if i % 3 else "jira"
+        c.metadata.created_at = t0 + timedelta(days=i)
+        chunks.append(c)
+    store.upsert_many(chunks)
+    store.delete_document("t1", "d0")
+
+    filters = [
+        MetadataFilter(sources=frozenset({"jira"})),
+        MetadataFilter(doc_ids=frozenset({"d1", "d0"}), created_before=t0 + timedelta(days=30)),
+        MetadataFilter(sources=frozenset({"wiki"}), created_after=t0 + timedelta(days=50)),
+        MetadataFilter(sources=frozenset({"nope"})),
+        MetadataFilter(sources=frozenset({"wiki"})),
+    ]
+    for where in filters:
+        want = {c.metadata.chunk_id for c in chunks if where.matches(c.metadata)} - {
+            str(i) for i in range(0, 60, 6)
+        }
+        got = {
+            c.metadata.chunk_id
+            for c, _ in store.query(tenant_id="t1", text="policy note 7", top_k=60, where=where)
+        }
+        # IVF scans only the probed cells for broad filters, so it may miss some.
+        assert got <= want if backend == "ivf" and len(want) > 30 else got == want
+        # A selective filter still fills top_k from the eligible rows only.
+        top = store.query(tenant_id="t1", text="policy note 7", top_k=2, where=where)
+        assert len(top) == min(2, len(want))
+        lexical = store.lexical_query(tenant_id="t1", text="policy", top_k=60, where=where)
+        assert {c.metadata.chunk_id for c, _ in lexical} == want
+
+
+def test_chunk_columns_round_trip_and_compaction():
+    aware = datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=UTC)
+    chunks = [
+        _chunk("t1", "a", "Plain ASCII.", doc_id="d1"),
+        _chunk("t1", "b", "Ünïcode — and emoji 🔐", doc_id="d2"),
+        _chunk("t1", "c", "", doc_id="d1"),
+    ]
+    chunks[1].metadata.created_at = aware
+    chunks[1].metadata.guard_ok, chunks[1].metadata.guard_version = False, "v1"
+    cols = ChunkColumns("t1")
+    cols.extend(chunks[:1])
+    cols.extend(chunks[1:])
+
+    assert cols.take([0, 1, 2]) == chunks
+    assert cols.doc_id(2) == "d1"
+
+    compacted = cols.compacted(np.array([1, 2]))
+    assert compacted.take([0, 1]) == chunks[1:]
+    assert compacted.get(0).metadata.created_at == aware
+    # Values only the dropped rows used are not carried over.
+    assert cols.compacted(np.array([1])).docs.values == ["d2"]
+
+
+def test_mmap_store_refuses_files_from_another_embedding_model(tmp_path):
+    MmapVectorStore(tmp_path).upsert_many([_chunk("t1", "a", "alpha")])
+
+    with pytest.raises(ValueError, match="incompatible"):
+        MmapVectorStore(tmp_path, embedder=NgramHashEmbedding(64)).query(
+            tenant_id="t1", text="alpha", top_k=1
+        )
+
+
+def test_bm25_maxscore_top_k_matches_exhaustive_ranking():
+    index = BM25Index()
+    words = ["key", "rotation", "vpn", "token", "policy", "audit", "backup", "laptop"]
+    index.add("t1", [" ".join(words[(i * j) % 8] for j in range(1 + i % 7)) for i in range(400)])
+
+    for query in ["key rotation", "vpn token audit", "policy", "laptop backup key"]:
+        every = index.search("t1", query, 400)
+        top = index.search("t1", query, 5)
+        assert [r for r, _ in top] == [r for r, _ in every[:5]]
+    assert index.search("t2", "key", 5) == []
+
+
+def test_hybrid_retrieval_fuses_bm25_with_vector_hits(tmp_path):
+    store = MmapVectorStore(tmp_path, embedder=NgramHashEmbedding(), lexical=True)
+    store.upsert_many(
+        [_chunk("t1", str(i), f"filler paragraph {i}") for i in range(50)]
+        + [_chunk("t1", "vpn", "The VPN requires a hardware token.")]
+    )
+
+    hits = retrieve(store, tenant_id="t1", query="vpn token", top_k=3, mode="hybrid")
+    assert hits[0][0].metadata.chunk_id == "vpn"
+    store.close()
+
+    # The inverted index is rebuilt from the segments on reopen.
+    reopened = MmapVectorStore(tmp_path, embedder=NgramHashEmbedding(), lexical=True)
+    hits = reopened.lexical_query(tenant_id="t1", text="hardware", top_k=3)
+    assert [c.metadata.chunk_id for c, _ in hits] == ["vpn"]
+
+
+def test_remote_store_shares_one_backend_across_clients(tmp_path):
+    server = StoreServer(str(tmp_path / "store.sock"), NumpyVectorStore())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        writer = RemoteVectorStore(str(tmp_path / "store.sock"), pool_size=2)
+        reader = RemoteVectorStore(str(tmp_path / "store.sock"), pool_size=2)
+        writer.upsert_many([_chunk("t1", "a", "shared policy"), _chunk("t2", "b", "other")])
+
+        hits = reader.query(tenant_id="t1", text="shared policy", top_k=5)
+        assert [(c.metadata.chunk_id, c.text) for c, _ in hits] == [("a", "shared policy")]
+
+        assert writer.replace_documents("t1", ["d1"], [_chunk("t1", "a2", "new policy")]) == 1
+        hits = reader.query(tenant_id="t1", text="shared policy", top_k=5)
+        assert [c.metadata.chunk_id for c, _ in hits] == ["a2"]
+        assert reader.chunk_stats("t1") == {"live": 1, "dead": 1}
+        where = MetadataFilter(sources=frozenset({"jira"}))
+        assert reader.query(tenant_id="t1", text="new policy", top_k=5, where=where) == []
+        writer.close()
+        reader.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_remote_store_drops_connections_the_server_closed(tmp_path):
+    path = str(tmp_path / "store.sock")
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen()
+    accepted = []
+
+    def serve() -> None:
+        # Answers one request per connection, then closes it on the next one unanswered,
+        # like a server restarted (or an idle connection reaped) between two calls.
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except OSError:
+                return
+            accepted.append(conn)
+            with conn:
+                recv_frame(conn)
+                send_frame(conn, {"ok": True, "result": "pong"})
+                recv_frame(conn)
+
+    threading.Thread(target=serve, daemon=True).start()
+    try:
+        store = RemoteVectorStore(path, pool_size=1)
+        assert store.ping()
+        assert store.ping()  # the pooled connection is dead: retried on a fresh one
+        assert len(accepted) == 2
+
+        with pytest.raises(ConnectionError):
+            store.upsert_many([_chunk("t1", "a", "alpha")])  # not idempotent: no retry
+        assert store._idle.empty()  # the dead connection was not pooled
+        store.close()
+    finally:
+        listener.close()
@@ -0,0 +1,72 @@
+"""Recall@k vs. latency of the IVF store against the exact NumPy store.
+
+Usage:
+  python -m benchmarks.bench_ann_recall
+  python -m benchmarks.bench_ann_recall --chunks 200000 --nprobe 1 4 16 64
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+
+from app.store.dense import NumpyVectorStore
+from app.store.ivf import IVFVectorStore
+from app.store.metadata import ChunkMetadata, DocumentChunk
+
+TENANT = "bench-tenant"
+
+
+def _ms(fn) -> tuple[float, object]:
+    t0 = time.perf_counter()
+    out = fn()
+    return (time.perf_counter() - t0) * 1000.0, out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--chunks", type=int, default=100_000)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--top-k", type=int, default=10)
+    ap.add_argument("--nlist", type=int, default=0)
+    ap.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 16, 64, 128])
+    args = ap.parse_args()
+
+    exact = NumpyVectorStore()
+    ann = IVFVectorStore(nlist=args.nlist)
+    t0 = time.perf_counter()
+    for i in range(args.chunks):
+        meta = ChunkMetadata(tenant_id=TENANT, source="bench", doc_id=f"d{i}", chunk_id=str(i))
+        chunk = DocumentChunk(metadata=meta, text=f"chunk {i}: policy section {i % 97}")
+        exact.upsert(chunk)
+        ann.upsert(chunk)
+    print(f"built {args.chunks} chunks in {time.perf_counter() - t0:.1f}s")
+
+    questions = [f"question {q} about section {q % 97}" for q in range(args.queries)]
+    truth: list[set[str]] = []
+    exact_ms: list[float] = []
+    for q in questions:
+        ms, hits = _ms(lambda q=q: exact.query(tenant_id=TENANT, text=q, top_k=args.top_k))
+        exact_ms.append(ms)
+        truth.append({c.metadata.chunk_id for c, _ in hits})
+    print(f"exact: p50={statistics.median(exact_ms):.3f}ms")
+
+    print(f"{'nprobe':>6} {'recall@' + str(args.top_k):>10} {'p50_ms':>8} {'speedup':>8}")
+    for nprobe in args.nprobe:
+        ann.nprobe = nprobe
+        recalls: list[float] = []
+        ann_ms: list[float] = []
+        for q, want in zip(questions, truth, strict=True):
+            ms, hits = _ms(lambda q=q: ann.query(tenant_id=TENANT, text=q, top_k=args.top_k))
+            ann_ms.append(ms)
+            recalls.append(len(want & {c.metadata.chunk_id for c, _ in hits}) / len(want))
+        p50 = statistics.median(ann_ms)
+        print(
+            f"{nprobe:>6} {statistics.fmean(recalls):>10.3f} {p50:>8.3f} "
+            f"{statistics.median(exact_ms) / p50:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Bytes per stored chunk: Pydantic objects (previous layout) vs. ChunkColumns.
+
+Measures heap growth with tracemalloc while holding N synthetic chunks (~400 characters,
+a handful of sources, ten chunks per document) either as the list of DocumentChunk the
+NumPy/IVF stores used to keep, or as the columnar layout they keep now. Embedding
+vectors live in the float32 matrix either way and are not counted. Also times
+materializing a top-k result from the columns.
+
+Usage:
+  python -m benchmarks.bench_chunk_memory
+  python -m benchmarks.bench_chunk_memory --sizes 10000 100000 --text-chars 900
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+from app.store.columns import ChunkColumns
+from app.store.metadata import ChunkMetadata, DocumentChunk
+from benchmarks.harness import synthetic_corpus
+
+TENANT = "bench-tenant"
+
+
+def _chunks(n: int, text_chars: int, seed: int) -> list[DocumentChunk]:
+    rng = random.Random(seed)
+    docs = synthetic_corpus(rng, tenants=1, docs_per_tenant=max(1, n // 10), words=text_chars)
+    out = []
+    for i in range(n):
+        doc = docs[(i // 10) % len(docs)]
+        meta = ChunkMetadata(
+            tenant_id=TENANT, source=doc["source"], doc_id=doc["doc_id"], chunk_id=f"{i}"
+        )
+        # Fresh strings per chunk, as ingest produces them (not shared with the corpus).
+        text = (doc["text"][i % 7 :] + " ")[:text_chars] + str(i)
+        out.append(DocumentChunk(metadata=meta, text=text))
+    return out
+
+
+def _held_bytes(build: Callable[[], Any]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del held
+    return after - before
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    ap.add_argument("--text-chars", type=int, default=400)
+    ap.add_argument("--seed", type=int, default=1234)
+    args = ap.parse_args()
+
+    print(f"{'chunks':>8} {'objects_B':>10} {'columns_B':>10} {'ratio':>6} {'top5_us':>8}")
+    for n in args.sizes:
+        # Generate inside the traced region so the objects' own allocations are counted.
+        objects = _held_bytes(lambda n=n: _chunks(n, args.text_chars, args.seed))
+
+        chunks = _chunks(n, args.text_chars, args.seed)
+
+        def columnar(chunks: list[DocumentChunk] = chunks) -> ChunkColumns:
+            cols = ChunkColumns(TENANT)
+            cols.extend(chunks)
+            return cols
+
+        columns = _held_bytes(columnar)
+        cols = columnar()
+        del chunks
+
+        rows = list(range(0, n, max(1, n // 5)))[:5]
+        t0 = time.perf_counter()
+        for _ in range(200):
+            cols.take(rows)
+        top5_us = (time.perf_counter() - t0) / 200 * 1e6
+
+        print(
+            f"{n:>8} {objects / n:>10.0f} {columns / n:>10.0f} "
+            f"{objects / columns:>5.1f}x {top5_us:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
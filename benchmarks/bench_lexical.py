@@ -0,0 +1,91 @@
+"""BM25 top-k latency: MaxScore early termination vs. scoring every posting.
+
+"exhaustive" asks the same index for every match (top_k = corpus size), which visits
+every posting of every query term; "maxscore" is the normal top-k path. Both return the
+same top-k. The dense column is the NumPy store's full matrix scan for reference.
+
+Usage:
+  python -m benchmarks.bench_lexical
+  python -m benchmarks.bench_lexical --chunks 200000 --top-k 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+
+from app.store.dense import NumpyVectorStore
+from app.store.embeddings import NgramHashEmbedding
+from app.store.lexical import BM25Index
+from app.store.metadata import ChunkMetadata, DocumentChunk
+
+TENANT = "bench-tenant"
+
+
+def _corpus(n: int, vocab: int, seed: int) -> tuple[list[str], list[str]]:
+    rng = random.Random(seed)
+    words = [f"term{i}" for i in range(vocab)]
+    # Zipf-like term frequencies, like natural text: a few very common terms.
+    weights = [1.0 / (i + 1) for i in range(vocab)]
+    docs = [" ".join(rng.choices(words, weights, k=rng.randint(20, 80))) for _ in range(n)]
+    return docs, words
+
+
+def _p50_ms(fn, queries: list[str]) -> float:
+    samples = []
+    for q in queries:
+        t0 = time.perf_counter()
+        fn(q)
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--chunks", type=int, default=50_000)
+    ap.add_argument("--vocab", type=int, default=5_000)
+    ap.add_argument("--queries", type=int, default=50)
+    ap.add_argument("--top-k", type=int, default=10)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    docs, words = _corpus(args.chunks, args.vocab, args.seed)
+    index = BM25Index()
+    t0 = time.perf_counter()
+    index.add(TENANT, docs)
+    print(f"indexed {args.chunks} chunks in {time.perf_counter() - t0:.1f}s")
+
+    rng = random.Random(args.seed + 1)
+    # Questions mix one common term with rarer, more selective ones.
+    queries = [
+        " ".join([rng.choice(words[:20]), *rng.sample(words[20:], 3)]) for _ in range(args.queries)
+    ]
+
+    for q in queries[:5]:
+        top = index.search(TENANT, q, args.top_k)
+        assert top == index.search(TENANT, q, args.chunks)[: args.top_k]
+
+    dense = NumpyVectorStore(NgramHashEmbedding())
+    dense.upsert_many(
+        [
+            DocumentChunk(
+                metadata=ChunkMetadata(
+                    tenant_id=TENANT, source="bench", doc_id=f"d{i}", chunk_id=str(i)
+                ),
+                text=text,
+            )
+            for i, text in enumerate(docs)
+        ]
+    )
+
+    exhaustive = _p50_ms(lambda q: index.search(TENANT, q, args.chunks), queries)
+    maxscore = _p50_ms(lambda q: index.search(TENANT, q, args.top_k), queries)
+    vector = _p50_ms(lambda q: dense.query(tenant_id=TENANT, text=q, top_k=args.top_k), queries)
+    print(f"{'exhaustive_ms':>14} {'maxscore_ms':>12} {'speedup':>8} {'dense_ms':>9}")
+    print(f"{exhaustive:>14.2f} {maxscore:>12.2f} {exhaustive / maxscore:>7.1f}x {vector:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
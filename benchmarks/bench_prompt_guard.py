@@ -0,0 +1,88 @@
+"""Worst-case cost of the PromptGuard heuristics: legacy per-pattern scan vs. GuardEngine.
+
+Each corpus is scanned at increasing input sizes. A bounded engine keeps the time per
+character flat as inputs grow; the "max ns/char" column is the number to watch.
+
+Usage:
+  python -m benchmarks.bench_prompt_guard
+  python -m benchmarks.bench_prompt_guard --sizes 2000 20000 200000
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import time
+
+from app.rag.filters import PromptGuard
+
+# The pre-GuardEngine rule set, scanned one pattern after another.
+LEGACY_PATTERNS = (
+    re.compile(r"(?i)(ignore|disregard|forget)\s+(all|any|previous)\s+(instructions|prompts)"),
+    re.compile(
+        r"(?i)(reveal|print|show)\s+(the\s+)?(system\s+prompt|developer\s+message|hidden\s+instructions)"
+    ),
+    re.compile(r"(?i)(exfiltrate|leak|steal|bypass|jailbreak|dan\s+mode)"),
+    re.compile(r"(?i)system:\s*|user:\s*|assistant:\s*"),
+    re.compile(r"(\b\w+\b)(?:\W+\1\b){10,}"),
+)
+
+
+def _legacy(text: str) -> bool:
+    return any(p.search(text) for p in LEGACY_PATTERNS)
+
+
+def _engine(text: str) -> bool:
+    return PromptGuard.ENGINE.match(text) is not None
+
+
+def _fill(unit: str, size: int) -> str:
+    return (unit * (size // len(unit) + 1))[:size]
+
+
+CORPORA = {
+    # benign
+    "prose": lambda n: _fill("Our retention policy keeps audit logs for 400 days. ", n),
+    "code": lambda n: _fill("def f(x):\n    return x * 2  # double\n", n),
+    # adversarial near-misses: every position starts a partial match that then fails
+    "repeat_runs": lambda n: _fill("tok " * 9 + "other ", n),
+    "long_words": lambda n: _fill(("w" * 200 + " ") * 9 + "z ", n),
+    "ignore_spaces": lambda n: _fill("ignore" + " " * 40 + "all" + " " * 40, n),
+    "reveal_the": lambda n: _fill("reveal the the system ", n),
+    "punct_runs": lambda n: _fill("a" + "!?" * 30, n),
+}
+
+
+def _time_ns(fn, text: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter_ns()
+        fn(text)
+        best = min(best, time.perf_counter_ns() - t0)
+    return best
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[2_000, 20_000, 200_000])
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    worst = {"legacy": 0.0, "engine": 0.0}
+    print(f"{'corpus':>14} {'chars':>8} {'legacy_us':>10} {'engine_us':>10} {'speedup':>8}")
+    for name, make in CORPORA.items():
+        for n in args.sizes:
+            text = make(n)
+            legacy = _time_ns(_legacy, text, args.repeat)
+            engine = _time_ns(_engine, text, args.repeat)
+            worst["legacy"] = max(worst["legacy"], legacy / n)
+            worst["engine"] = max(worst["engine"], engine / n)
+            print(
+                f"{name:>14} {n:>8} {legacy / 1000:>10.1f} {engine / 1000:>10.1f} "
+                f"{legacy / engine:>7.1f}x"
+            )
+    print(f"max ns/char: legacy={worst['legacy']:.1f} engine={worst['engine']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Regex redaction fallback on large answers: legacy three-pass scan vs. RegexRedactor.
+
+The legacy e-mail pattern is quadratic on runs like "a.a.a.a...", so on that corpus it is
+only timed up to --legacy-max-chars.
+
+Usage:
+  python -m benchmarks.bench_redaction_fallback
+  python -m benchmarks.bench_redaction_fallback --sizes 10000 100000 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import time
+
+from app.core.redaction import FALLBACK_ENTITIES, RegexRedactor
+
+
+def _legacy(text: str) -> str:
+    # The pre-RegexRedactor fallback, verbatim.
+    redacted = text
+    redacted = re.sub(
+        r"\b[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}\b", "[EMAIL]", redacted, flags=re.IGNORECASE
+    )
+    redacted = re.sub(r"\b(?:\d[ -]*?){13,19}\b", "[CARD]", redacted)
+    redacted = re.sub(r"\bAKIA[0-9A-Z]{16}\b", "[AWS_KEY]", redacted)
+    return redacted
+
+
+def _fill(unit: str, size: int) -> str:
+    return (unit * (size // len(unit) + 1))[:size]
+
+
+# name -> (generator, quadratic for legacy)
+CORPORA = {
+    "answer": (
+        lambda n: _fill(
+            "Per policy 12, rotate keys every 90 days. Contact secops@example.com or card "
+            "4111 1111 1111 1111 owners; invoice 2024-0001 is settled. ",
+            n,
+        ),
+        False,
+    ),
+    "numbers": (lambda n: _fill("ref 1234567890123456789 amount 120.50 EUR ", n), False),
+    "digit_run": (lambda n: "7" * n, False),
+    "spaced_digits": (lambda n: _fill("1 ", n), False),
+    "dotted": (lambda n: _fill("a.", n), True),
+}
+
+
+def _time_ms(fn, text: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000.0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--legacy-max-chars", type=int, default=20_000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    redactor = RegexRedactor(FALLBACK_ENTITIES)
+    print(f"{'corpus':>13} {'chars':>9} {'legacy_ms':>10} {'single_ms':>10} {'speedup':>8}")
+    for name, (make, quadratic) in CORPORA.items():
+        for n in args.sizes:
+            text = make(n)
+            single = _time_ms(redactor.redact, text, args.repeat)
+            if quadratic and n > args.legacy_max_chars:
+                print(f"{name:>13} {n:>9} {'skipped':>10} {single:>10.2f} {'-':>8}")
+                continue
+            legacy = _time_ms(_legacy, text, args.repeat)
+            print(f"{name:>13} {n:>9} {legacy:>10.2f} {single:>10.2f} {legacy / single:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
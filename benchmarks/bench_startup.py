@@ -0,0 +1,66 @@
+"""Startup cost: import time, app construction and time to first request / to ready.
+
+Every run is a fresh interpreter, so module imports (and any model loading they trigger)
+are measured cold. "first_req" is process start to the first /health response; "ready"
+is process start to the first 200 from /ready (background warm-up finished).
+
+Usage:
+  python -m benchmarks.bench_startup
+  python -m benchmarks.bench_startup --runs 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+_CHILD = r"""
+import json, os, time
+t0 = time.perf_counter()
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+from fastapi.testclient import TestClient
+t_deps = time.perf_counter()
+import app.main
+t_import = time.perf_counter()
+application = app.main.create_app()
+t_create = time.perf_counter()
+with TestClient(application) as client:
+    client.get("/health").raise_for_status()
+    t_first = time.perf_counter()
+    while client.get("/ready").status_code != 200:
+        time.sleep(0.001)
+    t_ready = time.perf_counter()
+print(json.dumps({
+    "import_ms": (t_import - t_deps) * 1000.0,
+    "create_app_ms": (t_create - t_import) * 1000.0,
+    "first_req_ms": (t_first - t0) * 1000.0,
+    "ready_ms": (t_ready - t0) * 1000.0,
+}))
+"""
+
+COLUMNS = ("import_ms", "create_app_ms", "first_req_ms", "ready_ms")
+
+
+def _run_once() -> dict[str, float]:
+    out = subprocess.run(
+        [sys.executable, "-c", _CHILD], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--runs", type=int, default=5)
+    args = ap.parse_args()
+
+    samples = [_run_once() for _ in range(args.runs)]
+    print(f"{'':>8} " + " ".join(f"{c:>14}" for c in COLUMNS))
+    for label, agg in (("median", statistics.median), ("max", max)):
+        print(f"{label:>8} " + " ".join(f"{agg(s[c] for s in samples):>14.1f}" for c in COLUMNS))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Query latency of the vector stores vs. corpus size.
+
+Compares InMemoryVectorStore as-is (embeddings cached at upsert) against the
+previous behaviour, which re-embedded every stored chunk on every query, and
+against the NumPy matrix store.
+
+Usage:
+  python -m benchmarks.bench_vector_query
+  python -m benchmarks.bench_vector_query --sizes 1000 10000 --repeat 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import math
+import statistics
+import time
+
+from app.store.dense import NumpyVectorStore
+from app.store.metadata import ChunkMetadata, DocumentChunk
+from app.store.vector import InMemoryVectorStore
+
+TENANT = "bench-tenant"
+
+
+def _hash_embedding(text: str, dims: int = 64) -> list[float]:
+    """The original pure-Python toy embedding (now HashEmbedding), kept for the baseline."""
+
+    h = hashlib.sha256(text.encode("utf-8")).digest()
+    return [h[i % len(h)] / 255.0 for i in range(dims)]
+
+
+def _legacy_query(store: InMemoryVectorStore, *, tenant_id: str, text: str, top_k: int):
+    """Pre-caching query path: re-hash and re-normalize every chunk per query."""
+
+    def cosine(a: list[float], b: list[float]) -> float:
+        dot = sum(x * y for x, y in zip(a, b, strict=False))
+        na = math.sqrt(sum(x * x for x in a))
+        nb = math.sqrt(sum(y * y for y in b))
+        if na == 0.0 or nb == 0.0:
+            return 0.0
+        return dot / (na * nb)
+
+    qv = _hash_embedding(text)
+    scored = [(c, cosine(qv, _hash_embedding(c.text))) for c in store._by_tenant.get(tenant_id, [])]
+    scored.sort(key=lambda x: x[1], reverse=True)
+    return scored[: max(1, top_k)]
+
+
+def _build(n: int, store):
+    for i in range(n):
+        meta = ChunkMetadata(
+            tenant_id=TENANT, source="bench", doc_id=f"d{i // 10}", chunk_id=str(i)
+        )
+        store.upsert(DocumentChunk(metadata=meta, text=f"chunk {i}: policy section {i % 97}"))
+    return store
+
+
+def _median_ms(fn, store, *, top_k: int, repeat: int) -> float:
+    samples = []
+    for r in range(repeat):
+        t0 = time.perf_counter()
+        fn(store, tenant_id=TENANT, text=f"what does policy section {r} say?", top_k=top_k)
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--top-k", type=int, default=5)
+    args = ap.parse_args()
+
+    print(f"{'chunks':>8} {'before_ms':>10} {'after_ms':>10} {'speedup':>8} {'numpy_ms':>10}")
+    for n in args.sizes:
+        store = _build(n, InMemoryVectorStore())
+        before = _median_ms(_legacy_query, store, top_k=args.top_k, repeat=args.repeat)
+        after = _median_ms(InMemoryVectorStore.query, store, top_k=args.top_k, repeat=args.repeat)
+        dense = _build(n, NumpyVectorStore())
+        fast = _median_ms(NumpyVectorStore.query, dense, top_k=args.top_k, repeat=args.repeat)
+        print(f"{n:>8} {before:>10.2f} {after:>10.2f} {before / after:>7.1f}x {fast:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
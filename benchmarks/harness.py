@@ -0,0 +1,197 @@
+"""Shared pieces of the benchmark suite: timing, percentiles, peak RSS and JSON results.
+
+Result files look like:
+
+  {"meta": {"python": ..., "platform": ..., "git": ..., "seed": ..., "created": ...},
+   "peak_rss_mb": 182.4,
+   "results": {"store.inmemory.query": {"n": 200, "p50_ms": ..., "p95_ms": ...,
+                                        "p99_ms": ..., "mean_ms": ..., "ops_per_s": ...}}}
+
+`compare` checks one file against a baseline: a latency percentile that grew (or a
+throughput that fell) by more than the threshold is a regression.
+"""
+
+from __future__ import annotations
+
+import gc
+import json
+import math
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+from collections.abc import Callable, Sequence
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+# Small closed vocabulary so lexical and dense retrieval both have real overlaps to rank.
+_TOPICS = ("vpn", "backup", "retention", "oncall", "payroll", "laptop", "incident", "vendor")
+_WORDS = (
+    "policy rotate keys every days audit logs access review quarterly approval manager "
+    "encrypt storage region owner escalation ticket hardware token travel expense limit "
+    "contract renewal security training deadline exception request"
+).split()
+
+
+def synthetic_corpus(
+    rng: random.Random, *, tenants: int, docs_per_tenant: int, words: int = 120
+) -> list[dict[str, str]]:
+    """Deterministic multi-tenant documents ({tenant_id, source, doc_id, text}) for a seed."""
+
+    docs = []
+    for t in range(tenants):
+        for d in range(docs_per_tenant):
+            topic = rng.choice(_TOPICS)
+            body = " ".join(rng.choice(_WORDS) for _ in range(words))
+            text = f"{topic.title()} policy {d}: {body}. Contact {topic}@example.com."
+            docs.append(
+                {"tenant_id": f"tenant-{t}", "source": topic, "doc_id": f"doc-{d}", "text": text}
+            )
+    return docs
+
+
+def synthetic_question(rng: random.Random) -> str:
+    return f"What is the {rng.choice(_TOPICS)} policy on {rng.choice(_WORDS)}?"
+
+
+def percentile(samples: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile, q in [0, 1]."""
+
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+def summarize(samples_ms: Sequence[float], *, elapsed_s: float | None = None) -> dict[str, Any]:
+    """Latency percentiles of per-op samples; throughput from wall time when given."""
+
+    total_s = elapsed_s if elapsed_s is not None else sum(samples_ms) / 1000.0
+    return {
+        "n": len(samples_ms),
+        "p50_ms": round(percentile(samples_ms, 0.50), 4),
+        "p95_ms": round(percentile(samples_ms, 0.95), 4),
+        "p99_ms": round(percentile(samples_ms, 0.99), 4),
+        "mean_ms": round(sum(samples_ms) / len(samples_ms), 4) if samples_ms else float("nan"),
+        "ops_per_s": round(len(samples_ms) / total_s, 2) if total_s > 0 else float("nan"),
+    }
+
+
+def measure(fn: Callable[[int], Any], *, repeat: int, warmup: int = 10) -> dict[str, Any]:
+    """Call `fn(i)` `repeat` times (after `warmup` untimed calls) and summarize."""
+
+    for i in range(warmup):
+        fn(i)
+    samples: list[float] = []
+    # Like timeit: a collection landing inside one sample would dominate the tail.
+    gc.collect()
+    gc.disable()
+    try:
+        for i in range(repeat):
+            t0 = time.perf_counter()
+            fn(i)
+            samples.append((time.perf_counter() - t0) * 1000.0)
+    finally:
+        gc.enable()
+    return summarize(samples)
+
+
+def peak_rss_mb(pid: int | None = None) -> float:
+    """Peak resident set size of this process, or of `pid` (Linux /proc only)."""
+
+    if pid is not None:
+        try:
+            for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024.0, 1)
+        except OSError:
+            pass
+        return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return round(peak / (1024.0 * 1024.0 if sys.platform == "darwin" else 1024.0), 1)
+
+
+def _git_rev() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        )
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+    return out.stdout.strip() or "unknown"
+
+
+def write_results(
+    path: str | Path | None, results: dict[str, dict[str, Any]], *, seed: int, peak_rss: float
+) -> dict[str, Any]:
+    """The results document; also written to `path` unless it is None."""
+
+    doc = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "git": _git_rev(),
+            "seed": seed,
+            "created": datetime.now(UTC).isoformat(timespec="seconds"),
+        },
+        "peak_rss_mb": peak_rss,
+        "results": results,
+    }
+    if path is not None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(doc, indent=2, sort_keys=True) + "\n")
+    return doc
+
+
+def load_results(path: str | Path) -> dict[str, Any]:
+    return json.loads(Path(path).read_text())
+
+
+def compare(
+    current: dict[str, Any],
+    baseline: dict[str, Any],
+    *,
+    threshold: float = 0.15,
+    metrics: Sequence[str] = ("p50_ms", "p95_ms", "ops_per_s"),
+) -> tuple[list[str], list[str]]:
+    """(report lines, regressions) for every benchmark present in both files."""
+
+    lines: list[str] = []
+    regressions: list[str] = []
+    base, cur = baseline["results"], current["results"]
+    for name in sorted(base.keys() & cur.keys()):
+        for metric in metrics:
+            b, c = base[name].get(metric), cur[name].get(metric)
+            if not b or c is None or math.isnan(b) or math.isnan(c):
+                continue
+            change = (c - b) / b
+            # Latencies regress upwards, throughput downwards.
+            worse = -change if metric == "ops_per_s" else change
+            flag = "REGRESSION" if worse > threshold else ""
+            line = f"{name:<32} {metric:<10} {b:>12.4f} {c:>12.4f} {change:>+8.1%}  {flag}"
+            lines.append(line.rstrip())
+            if flag:
+                regressions.append(f"{name} {metric} {change:+.1%}")
+    missing = sorted(base.keys() - cur.keys())
+    if missing:
+        lines.append(f"not in this run: {', '.join(missing)}")
+    return lines, regressions
+
+
+def check_against(path: str | Path, current: dict[str, Any], *, threshold: float) -> int:
+    """Print the comparison with the baseline at `path`; exit status 1 on regressions."""
+
+    lines, regressions = compare(current, load_results(path), threshold=threshold)
+    print(f"\n{'benchmark':<32} {'metric':<10} {'baseline':>12} {'current':>12} {'change':>8}")
+    print("\n".join(lines))
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {threshold:.0%}: " + "; ".join(regressions))
+        return 1
+    print(f"\nNo regressions over {threshold:.0%}.")
+    return 0
@@ -0,0 +1,203 @@
+"""End-to-end load generator: ingest a synthetic multi-tenant corpus, then drive /chat.
+
+Targets, in order of fidelity:
+  - in-process (default): create_app() behind httpx's ASGI transport, no sockets;
+  - --spawn-uvicorn: starts `uvicorn app.main:create_app --factory` on a free port and
+    waits for /ready, so the numbers include HTTP parsing and the real event loop;
+  - --base-url: an already running server (set JWT_SECRET to match it).
+
+Reports requests/s, p50/p95/p99 and status codes per phase, plus the server's peak RSS
+(this process in-process, the uvicorn process when spawned; not available for
+--base-url). Results are written and compared the same way as benchmarks.suite.
+
+Usage:
+  python -m benchmarks.load --tenants 8 --docs 200 --chats 2000 --concurrency 32
+  python -m benchmarks.load --spawn-uvicorn --output .bench/load.json
+  python -m benchmarks.load --baseline .bench/load.json --threshold 0.2
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from typing import Any
+
+import httpx
+import jwt
+
+from benchmarks.harness import (
+    check_against,
+    peak_rss_mb,
+    summarize,
+    synthetic_corpus,
+    synthetic_question,
+    write_results,
+)
+
+
+def _token(tenant_id: str) -> str:
+    secret = os.environ.get("JWT_SECRET", "change-me")
+    payload = {"sub": "load", "tenant_id": tenant_id, "scopes": ["chat", "ingest:write"]}
+    return jwt.encode(payload, secret, algorithm="HS256")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@asynccontextmanager
+async def _target(args: argparse.Namespace) -> AsyncIterator[tuple[httpx.AsyncClient, int | None]]:
+    """(client, server pid or None when the server is this process / unknown)."""
+
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url, timeout=60.0) as client:
+            yield client, None
+        return
+
+    # Keep per-request access logs out of the report.
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    if not args.spawn_uvicorn:
+        from app.main import create_app
+
+        transport = httpx.ASGITransport(app=create_app())
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=60.0
+        ) as client:
+            yield client, os.getpid()
+        return
+
+    port = _free_port()
+    cmd = [sys.executable, "-m", "uvicorn", "app.main:create_app", "--factory"]
+    cmd += ["--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"]
+    proc = subprocess.Popen(cmd, env=os.environ.copy())
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60.0) as client:
+            deadline = time.monotonic() + 60.0
+            while True:
+                try:
+                    if (await client.get("/ready")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if proc.poll() is not None or time.monotonic() > deadline:
+                    raise SystemExit("uvicorn did not become ready")
+                await asyncio.sleep(0.1)
+            yield client, proc.pid
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+async def _drive(
+    jobs: list[Callable[[], Awaitable[httpx.Response]]], concurrency: int
+) -> tuple[list[float], Counter, float]:
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    pending = iter(jobs)
+
+    async def worker() -> None:
+        for job in pending:
+            t0 = time.perf_counter()
+            r = await job()
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+            statuses[r.status_code] += 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, statuses, time.perf_counter() - t0
+
+
+def _rss(pid: int | None) -> float:
+    if pid is None:
+        return float("nan")
+    return peak_rss_mb() if pid == os.getpid() else peak_rss_mb(pid)
+
+
+async def main_async(args: argparse.Namespace) -> dict[str, Any]:
+    rng = random.Random(args.seed)
+    docs = synthetic_corpus(rng, tenants=args.tenants, docs_per_tenant=args.docs)
+    headers = {
+        f"tenant-{t}": {"Authorization": f"Bearer {_token(f'tenant-{t}')}"}
+        for t in range(args.tenants)
+    }
+    questions = [
+        (f"tenant-{rng.randrange(args.tenants)}", synthetic_question(rng))
+        for _ in range(args.chats)
+    ]
+
+    results: dict[str, dict[str, Any]] = {}
+    async with _target(args) as (client, pid):
+
+        def ingest(batch: list[dict[str, str]]) -> Callable[[], Awaitable[httpx.Response]]:
+            tenant = batch[0]["tenant_id"]
+            return lambda: client.post(
+                "/ingest/batch", json={"documents": batch}, headers=headers[tenant]
+            )
+
+        def chat(tenant: str, question: str) -> Callable[[], Awaitable[httpx.Response]]:
+            body = {"tenant_id": tenant, "question": question}
+            return lambda: client.post("/chat", json=body, headers=headers[tenant])
+
+        # Batches never mix tenants: the ingest token is tenant-scoped.
+        per_tenant = [docs[i : i + args.docs] for i in range(0, len(docs), args.docs)]
+        batches = [
+            tenant_docs[i : i + args.batch]
+            for tenant_docs in per_tenant
+            for i in range(0, len(tenant_docs), args.batch)
+        ]
+        phases = {
+            "load.ingest_batch": [ingest(b) for b in batches],
+            "load.chat": [chat(t, q) for t, q in questions],
+        }
+
+        print(
+            f"{'phase':<20} {'n':>6} {'rps':>9} {'p50_ms':>9} {'p95_ms':>9} {'p99_ms':>9}  status"
+        )
+        for name, jobs in phases.items():
+            latencies, statuses, elapsed = await _drive(jobs, args.concurrency)
+            r = results[name] = summarize(latencies, elapsed_s=elapsed)
+            r["statuses"] = {str(k): v for k, v in sorted(statuses.items())}
+            print(
+                f"{name:<20} {r['n']:>6} {r['ops_per_s']:>9.1f} {r['p50_ms']:>9.2f} "
+                f"{r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f}  {r['statuses']}"
+            )
+        rss = _rss(pid)
+
+    print(f"\nserver peak RSS: {rss:.1f} MiB")
+    return write_results(args.output, results, seed=args.seed, peak_rss=rss)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    target = ap.add_mutually_exclusive_group()
+    target.add_argument("--base-url", default=None)
+    target.add_argument("--spawn-uvicorn", action="store_true")
+    ap.add_argument("--tenants", type=int, default=8)
+    ap.add_argument("--docs", type=int, default=200, help="documents per tenant")
+    ap.add_argument("--batch", type=int, default=32, help="documents per /ingest/batch call")
+    ap.add_argument("--chats", type=int, default=2000)
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--seed", type=int, default=1234)
+    ap.add_argument("--output", help="write JSON results here")
+    ap.add_argument("--baseline", help="compare against this results file")
+    ap.add_argument("--threshold", type=float, default=0.15)
+    args = ap.parse_args()
+
+    doc = asyncio.run(main_async(args))
+    if args.baseline:
+        sys.exit(check_against(args.baseline, doc, threshold=args.threshold))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Load test for /chat: p50/p99 latency at increasing concurrency.
+
+Runs in-process against create_app() by default, or against a live server with
+--base-url. A background probe hits /health throughout, so you can see whether chat
+load starves the liveness endpoints.
+
+Usage:
+  python -m benchmarks.load_chat
+  python -m benchmarks.load_chat --concurrency 1 8 32 128 --requests 400
+  JWT_SECRET=change-me python -m benchmarks.load_chat --base-url http://127.0.0.1:8000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from collections import Counter
+
+import httpx
+import jwt
+
+TENANT = "load-tenant"
+
+
+def _token() -> str:
+    secret = os.environ.get("JWT_SECRET", "change-me")
+    payload = {"sub": "load", "tenant_id": TENANT, "scopes": ["chat", "ingest:write"]}
+    return jwt.encode(payload, secret, algorithm="HS256")
+
+
+def _client(base_url: str | None) -> httpx.AsyncClient:
+    if base_url:
+        return httpx.AsyncClient(base_url=base_url, timeout=30.0)
+
+    from app.main import create_app
+
+    # Keep per-request access logs from drowning the report.
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    transport = httpx.ASGITransport(app=create_app())
+    return httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=30.0)
+
+
+def _pct(samples: list[float], q: float) -> float:
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def _seed(client: httpx.AsyncClient, headers: dict[str, str], docs: int) -> None:
+    body = {
+        "documents": [
+            {
+                "tenant_id": TENANT,
+                "source": "bench",
+                "text": f"Policy {i}: rotate keys every {i} days.",
+            }
+            for i in range(docs)
+        ]
+    }
+    r = await client.post("/ingest/batch", json=body, headers=headers)
+    r.raise_for_status()
+
+
+async def _run_level(
+    client: httpx.AsyncClient, headers: dict[str, str], *, concurrency: int, requests: int
+) -> tuple[list[float], list[float], Counter, float]:
+    latencies: list[float] = []
+    health: list[float] = []
+    statuses: Counter = Counter()
+    remaining = iter(range(requests))
+    done = asyncio.Event()
+
+    async def worker() -> None:
+        for i in remaining:
+            t0 = time.perf_counter()
+            r = await client.post(
+                "/chat",
+                json={"tenant_id": TENANT, "question": f"How often do we rotate keys ({i})?"},
+                headers=headers,
+            )
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+            statuses[r.status_code] += 1
+
+    async def probe() -> None:
+        while not done.is_set():
+            t0 = time.perf_counter()
+            await client.get("/health")
+            health.append((time.perf_counter() - t0) * 1000.0)
+            await asyncio.sleep(0.05)
+
+    probe_task = asyncio.create_task(probe())
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+    done.set()
+    await probe_task
+    return latencies, health, statuses, elapsed
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    headers = {"Authorization": f"Bearer {_token()}"}
+    async with _client(args.base_url) as client:
+        await _seed(client, headers, args.docs)
+        print(f"{'conc':>5} {'rps':>8} {'p50_ms':>8} {'p99_ms':>8} {'health_p99':>10}  statuses")
+        for c in args.concurrency:
+            lat, health, statuses, elapsed = await _run_level(
+                client, headers, concurrency=c, requests=args.requests
+            )
+            print(
+                f"{c:>5} {len(lat) / elapsed:>8.1f} {statistics.median(lat):>8.2f} "
+                f"{_pct(lat, 0.99):>8.2f} {_pct(health, 0.99):>10.2f}  {dict(statuses)}"
+            )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--base-url", default=None)
+    ap.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    ap.add_argument("--requests", type=int, default=200)
+    ap.add_argument("--docs", type=int, default=500)
+    asyncio.run(main_async(ap.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
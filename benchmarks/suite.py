@@ -0,0 +1,188 @@
+"""Microbenchmarks for the hot functions, with JSON results and a baseline check.
+
+Every input comes from a seeded synthetic multi-tenant corpus, so two runs on the same
+machine time the same work. Results (p50/p95/p99, ops/s, peak RSS) go to --output; with
+--baseline, the run fails (exit 1) when any benchmark regressed by more than --threshold.
+
+Usage:
+  python -m benchmarks.suite --output .bench/baseline.json
+  python -m benchmarks.suite --baseline .bench/baseline.json --threshold 0.15
+  python -m benchmarks.suite --quick --only store guard
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from collections.abc import Callable
+from typing import Any
+
+import jwt
+
+from app.core.redaction import PIIRedactor
+from app.core.security import TokenCache, TokenVerifier
+from app.rag.chunking import iter_chunks
+from app.rag.filters import check_prompt_injection
+from app.rag.pipeline import RagPipeline
+from app.store.dense import NumpyVectorStore
+from app.store.metadata import ChunkMetadata, DocumentChunk
+from app.store.vector import InMemoryVectorStore, VectorStoreAdapter
+from benchmarks.harness import (
+    check_against,
+    measure,
+    peak_rss_mb,
+    synthetic_corpus,
+    synthetic_question,
+    write_results,
+)
+
+Bench = Callable[[int], Any]
+
+
+def _chunks(docs: list[dict[str, str]]) -> list[DocumentChunk]:
+    return [
+        DocumentChunk(
+            metadata=ChunkMetadata(
+                tenant_id=d["tenant_id"], source=d["source"], doc_id=d["doc_id"], chunk_id="0"
+            ),
+            text=d["text"],
+        )
+        for d in docs
+    ]
+
+
+def _store_benches(rng: random.Random, chunks_per_tenant: int) -> dict[str, Bench]:
+    docs = synthetic_corpus(rng, tenants=4, docs_per_tenant=chunks_per_tenant, words=60)
+    chunks = _chunks(docs)
+    questions = [synthetic_question(rng) for _ in range(64)]
+
+    def loaded(store: VectorStoreAdapter) -> VectorStoreAdapter:
+        store.upsert_many(chunks)
+        return store
+
+    inmemory = loaded(InMemoryVectorStore())
+    dense = loaded(NumpyVectorStore(lexical=True))
+    batch = _chunks(synthetic_corpus(rng, tenants=1, docs_per_tenant=64, words=60))
+
+    def q(store: VectorStoreAdapter, fn: str) -> Bench:
+        method = getattr(store, fn)
+        return lambda i: method(tenant_id="tenant-0", text=questions[i % 64], top_k=5)
+
+    return {
+        "store.inmemory.query": q(inmemory, "query"),
+        "store.numpy.query": q(dense, "query"),
+        "store.numpy.lexical_query": q(dense, "lexical_query"),
+        "store.numpy.upsert_64": lambda i: NumpyVectorStore().upsert_many(batch),
+    }
+
+
+def _guard_benches(rng: random.Random) -> dict[str, Bench]:
+    prompts = [" ".join(synthetic_question(rng) for _ in range(20)) for _ in range(64)]
+    return {"guard.check_prompt_injection": lambda i: check_prompt_injection(prompts[i % 64])}
+
+
+def _redaction_benches(rng: random.Random) -> dict[str, Bench]:
+    redactor = PIIRedactor()
+    docs = synthetic_corpus(rng, tenants=1, docs_per_tenant=64, words=200)
+    answers = [d["text"] + " Card 4111 1111 1111 1111, call +1 415 555 0100." for d in docs]
+    clean = [d["text"].rsplit(" Contact ", 1)[0] for d in docs]
+    return {
+        "redaction.redact": lambda i: redactor.redact(answers[i % 64]),
+        "redaction.redact_no_pii": lambda i: redactor.redact(clean[i % 64]),
+    }
+
+
+def _chunking_benches(rng: random.Random) -> dict[str, Bench]:
+    text = "\n\n".join(d["text"] for d in synthetic_corpus(rng, tenants=1, docs_per_tenant=200))
+    return {"chunking.iter_chunks_200kb": lambda i: list(iter_chunks([text], overlap=100))}
+
+
+def _auth_benches(rng: random.Random) -> dict[str, Bench]:
+    secret = "bench-secret-" + "x" * 32
+    tokens = [
+        jwt.encode(
+            {
+                "sub": f"u{n}",
+                "tenant_id": "tenant-0",
+                "scopes": ["chat"],
+                "exp": time.time() + 3600,
+            },
+            secret,
+            algorithm="HS256",
+        )
+        for n in range(64)
+    ]
+    cold = TokenVerifier(secret=secret, algorithm="HS256")
+    warm = TokenVerifier(secret=secret, algorithm="HS256", cache=TokenCache(128))
+    for token in tokens:
+        warm.verify(token)
+    return {
+        "auth.verify": lambda i: cold.verify(tokens[i % 64]),
+        "auth.verify_cached": lambda i: warm.verify(tokens[i % 64]),
+    }
+
+
+def _pipeline_benches(rng: random.Random, chunks_per_tenant: int) -> dict[str, Bench]:
+    store = NumpyVectorStore()
+    store.upsert_many(_chunks(synthetic_corpus(rng, tenants=4, docs_per_tenant=chunks_per_tenant)))
+    pipeline = RagPipeline(store=store)
+    questions = [synthetic_question(rng) for _ in range(64)]
+    return {
+        "pipeline.answer": lambda i: pipeline.answer(
+            tenant_id=f"tenant-{i % 4}", question=questions[i % 64]
+        )
+    }
+
+
+GROUPS = ("store", "guard", "redaction", "chunking", "auth", "pipeline")
+
+
+def run(args: argparse.Namespace) -> dict[str, dict[str, Any]]:
+    size = 1_000 if args.quick else args.chunks
+    repeat = 50 if args.quick else args.repeat
+    builders: dict[str, Callable[[random.Random], dict[str, Bench]]] = {
+        "store": lambda rng: _store_benches(rng, size),
+        "guard": _guard_benches,
+        "redaction": _redaction_benches,
+        "chunking": _chunking_benches,
+        "auth": _auth_benches,
+        "pipeline": lambda rng: _pipeline_benches(rng, size),
+    }
+    results: dict[str, dict[str, Any]] = {}
+    print(f"{'benchmark':<32} {'n':>5} {'p50_ms':>9} {'p95_ms':>9} {'p99_ms':>9} {'ops/s':>10}")
+    for group in args.only or GROUPS:
+        # One RNG per group: adding a group never changes another group's inputs.
+        benches = builders[group](random.Random(f"{args.seed}:{group}"))
+        for name, fn in benches.items():
+            r = results[name] = measure(fn, repeat=repeat)
+            print(
+                f"{name:<32} {r['n']:>5} {r['p50_ms']:>9.3f} {r['p95_ms']:>9.3f} "
+                f"{r['p99_ms']:>9.3f} {r['ops_per_s']:>10.1f}"
+            )
+    return results
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--only", nargs="+", choices=GROUPS)
+    ap.add_argument("--chunks", type=int, default=10_000, help="chunks per tenant (4 tenants)")
+    ap.add_argument("--repeat", type=int, default=200)
+    ap.add_argument("--seed", type=int, default=1234)
+    ap.add_argument("--quick", action="store_true", help="small corpus and 50 repeats")
+    ap.add_argument("--output", help="write JSON results here")
+    ap.add_argument("--baseline", help="compare against this results file")
+    ap.add_argument("--threshold", type=float, default=0.15)
+    args = ap.parse_args()
+
+    results = run(args)
+    rss = peak_rss_mb()
+    print(f"\npeak RSS: {rss:.1f} MiB")
+    doc = write_results(args.output, results, seed=args.seed, peak_rss=rss)
+    if args.baseline:
+        sys.exit(check_against(args.baseline, doc, threshold=args.threshold))
+
+
+if __name__ == "__main__":
+    main()